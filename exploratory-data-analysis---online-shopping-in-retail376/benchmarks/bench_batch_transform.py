@@ -0,0 +1,50 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from data_transform import CATEGORICAL_COLUMNS, BatchTransform, DataTransform
+from synthetic_data import generate
+
+def object_columns(df):
+    return int((df[CATEGORICAL_COLUMNS].dtypes != 'category').sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one DataTransform over all rows with per-chunk and batch transforms.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunksize', type=int, default=1000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    raw = generate(args.rows)
+    chunks = [raw.iloc[start:start + args.chunksize] for start in range(0, len(raw), args.chunksize)]
+    runs = {
+        'single': lambda: DataTransform(raw.copy()).apply_transforms(),
+        'per chunk': lambda: pd.concat([DataTransform(chunk.copy()).apply_transforms() for chunk in chunks],
+                                       ignore_index=True),
+    }
+    for workers in sorted(set(args.workers)):
+        runs[f"batch, {workers} threads"] = lambda workers=workers: pd.concat(
+            BatchTransform().fit(chunks).transform_chunks(chunks, workers), ignore_index=True)
+
+    results = []
+    reference = None
+    for name, run in runs.items():
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = run()
+        seconds = time.perf_counter() - start
+        reference = df if reference is None else reference
+        results.append({'run': name, 'seconds': seconds, 'memory_mb': df.memory_usage(deep=True).sum() / 1e6,
+                        'non_category_columns': object_columns(df), 'same_as_single': df.equals(reference)})
+    print(f"{args.rows} rows in chunks of {args.chunksize}")
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from column_engine import ColumnEngine
+from data_without_skewness import DataFrameTransform
+
+def build_frame(n_rows, n_columns, seed=0):
+    """Skewed numeric columns; one in three has negative values, so it needs Box-Cox."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_columns):
+        values = rng.gamma(1 + i % 3, 1, n_rows)
+        data[f'column_{i}'] = values - 0.5 if i % 3 == 0 else values
+    return pd.DataFrame(data)
+
+def run_steps(df, engine):
+    """Skewness detection and transformation, then the quantiles used by the outlier step."""
+    transformer = DataFrameTransform(df.copy(), engine=engine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transformer.transform_skewed_columns(transformer.identify_skewed_columns())
+    numeric_columns = list(transformer.df.columns)
+    transformer.stats_cache.quantile(transformer.df, numeric_columns, 0.25)
+    transformer.stats_cache.quantile(transformer.df, numeric_columns, 0.75)
+    return transformer.df
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the per-column steps serially and with ColumnEngine.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--columns', type=int, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    df = build_frame(args.rows, args.columns)
+    print(f"{args.rows} rows, {args.columns} columns, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = run_steps(df, None)
+    baseline = time.perf_counter() - start
+    results = [{'workers': 'pandas', 'seconds': baseline, 'speedup': 1.0, 'identical': True}]
+
+    for workers in args.workers:
+        with ColumnEngine(max_workers=workers, min_cells=0) as engine:
+            start = time.perf_counter()
+            output = run_steps(df, engine)
+            seconds = time.perf_counter() - start
+        results.append({'workers': workers, 'seconds': seconds, 'speedup': baseline / seconds,
+                        'identical': output.equals(expected)})
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
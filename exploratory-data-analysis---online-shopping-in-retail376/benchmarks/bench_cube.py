@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from aggregate_cube import AggregateCube
+from data_transform import DataTransform
+from synthetic_data import generate
+
+def is_ads(traffic_type):
+    return traffic_type.str.contains('ads', case=False, na=False)
+
+# The group-bys of the notebook, on the sessions and on the cube
+QUESTIONS = {
+    'revenue by region': (lambda df: df.groupby('region', observed=True)['revenue'].sum(),
+                          lambda cube: cube.query('region', 'revenue')),
+    'revenue by traffic type': (lambda df: df.groupby('traffic_type', observed=True)['revenue'].sum(),
+                                lambda cube: cube.query('traffic_type', 'revenue')),
+    'revenue by month': (lambda df: df.groupby('month')['revenue'].sum(),
+                         lambda cube: cube.query('month', 'revenue')),
+    'revenue by weekend': (lambda df: df.groupby('weekend')['revenue'].sum(),
+                           lambda cube: cube.query('weekend', 'revenue')),
+    'sessions by region and OS': (lambda df: df.groupby(['region', 'operating_systems'], observed=True).size(),
+                                  lambda cube: cube.query(['region', 'operating_systems'], 'sessions')),
+    'revenue by region and traffic': (lambda df: df.groupby(['region', 'traffic_type'], observed=True)['revenue'].sum(),
+                                      lambda cube: cube.query(['region', 'traffic_type'], 'revenue')),
+    'bounce rate by region and traffic': (lambda df: df.groupby(['region', 'traffic_type'], observed=True)['bounce_rates'].mean(),
+                                          lambda cube: cube.mean('bounce_rates', ['region', 'traffic_type'])),
+    'ads revenue by month': (lambda df: df[is_ads(df['traffic_type'].astype('str'))].groupby('month')['revenue'].sum(),
+                             lambda cube: cube.query('month', 'revenue', where={'traffic_type': is_ads})),
+    'conversion by visitor type': (lambda df: df.groupby('visitor_type', observed=True)['revenue'].mean(),
+                                   lambda cube: cube.mean('revenue', 'visitor_type')),
+}
+
+def best_time(func, arg, repeats):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(arg)
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the notebook questions on the sessions and on the aggregate cube.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--update-rows', type=int, default=10000, help="Size of the batch of new sessions added incrementally.")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataTransform(generate(args.rows + args.update_rows)).apply_transforms()
+        sessions, new_sessions = df.iloc[:args.rows], df.iloc[args.rows:]
+
+        start = time.perf_counter()
+        cube = AggregateCube.build(sessions)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        cube.update(new_sessions)
+        update_seconds = time.perf_counter() - start
+    print(f"{args.rows} sessions -> {len(cube.cells)} cells: build {build_seconds:.3f} s, "
+          f"update with {args.update_rows} sessions {update_seconds:.3f} s")
+
+    results = []
+    for question, (on_sessions, on_cube) in QUESTIONS.items():
+        scan = best_time(on_sessions, df, args.repeats)
+        cube.views = {}
+        first = best_time(on_cube, cube, 1)
+        cached = best_time(on_cube, cube, args.repeats)
+        results.append({'question': question, 'scan_ms': scan * 1000, 'cube_ms': first * 1000,
+                        'cube_repeated_ms': cached * 1000, 'speedup': scan / first})
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
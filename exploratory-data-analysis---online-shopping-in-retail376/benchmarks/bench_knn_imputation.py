@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from data_without_null_values import DataFrameTransform
+from synthetic_data import generate
+
+def hide_values(df, share, seed=0):
+    """Blank out 'share' of the known numeric values, returning the frame and the hidden {column: (rows, values)}."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    hidden = {}
+    for column in df.select_dtypes(include=['float64']).columns:
+        values = df[column].to_numpy(copy=True)
+        rows = np.flatnonzero(~np.isnan(values) & (rng.random(len(values)) < share))
+        hidden[column] = (rows, values[rows])
+        values[rows] = np.nan
+        df[column] = values
+    return df, hidden
+
+def imputation_error(df, hidden):
+    """Mean absolute error on the hidden values, each column divided by its standard deviation."""
+    errors = []
+    for column, (rows, values) in hidden.items():
+        scale = np.std(values) or 1
+        errors.append(np.abs(df[column].to_numpy()[rows] - values) / scale)
+    return float(np.mean(np.concatenate(errors)))
+
+def impute(df, strategy, n_neighbors):
+    transformer = DataFrameTransform(df.copy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        transformer.impute_missing_data(strategy=strategy, n_neighbors=n_neighbors)
+    return transformer.df
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the rows per second and accuracy of KNN and median imputation.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--neighbors', type=int, default=5)
+    parser.add_argument('--hidden', type=float, default=0.02, help="Share of known values hidden to measure the error.")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    results = []
+    for n_rows in args.rows:
+        df, hidden = hide_values(generate(n_rows).dropna(subset=['operating_systems']), args.hidden)
+        rows_with_gaps = int(df.select_dtypes(include=['float64']).isna().any(axis=1).sum())
+        for strategy in ['median', 'knn']:
+            start = time.perf_counter()
+            output = impute(df, strategy, args.neighbors)
+            seconds = time.perf_counter() - start
+            results.append({'rows': n_rows, 'strategy': strategy, 'rows_with_gaps': rows_with_gaps,
+                            'seconds': seconds, 'rows_per_second': len(df) / seconds,
+                            'error': imputation_error(output, hidden)})
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from db_utils import RDSDatabaseConnector  # noqa: E402
+
+PLACEHOLDER_CREDENTIALS = {
+    'RDS_HOST': 'localhost', 'RDS_PASSWORD': '', 'RDS_USER': '', 'RDS_DATABASE': '', 'RDS_PORT': 0
+}
+
+def build_sqlite_table(db_path, n_rows, seed=0):
+    """Create a local SQLite stand-in for 'customer_activity' with an integer 'id' key."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(n_rows),
+        'administrative': rng.poisson(2, n_rows).astype(float),
+        'product_related_duration': rng.exponential(1000, n_rows),
+        'bounce_rates': rng.beta(1, 20, n_rows),
+        'month': rng.choice(['Feb', 'Mar', 'May', 'Nov', 'Dec'], n_rows),
+        'region': rng.choice(['North America', 'Western Europe', 'Asia'], n_rows),
+        'revenue': rng.random(n_rows) < 0.15,
+    })
+    connector = RDSDatabaseConnector(PLACEHOLDER_CREDENTIALS)
+    connector.create_engine(connection_string=f"sqlite:///{db_path}")
+    df.to_sql('customer_activity', connector.engine, index=False, chunksize=50000)
+    connector.engine.dispose()
+
+def run_benchmark(connection_string, worker_counts, repeats=3):
+    """Time 'fetch_data' and 'fetch_data_partitioned' for each worker count."""
+    results = []
+    for workers in worker_counts:
+        connector = RDSDatabaseConnector(PLACEHOLDER_CREDENTIALS)
+        connector.create_engine(pool_size=workers, max_overflow=0, connection_string=connection_string)
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if workers == 1:
+                df = connector.fetch_data()
+            else:
+                df = connector.fetch_data_partitioned(partition_column='id', num_partitions=workers,
+                                                      max_workers=workers)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        results.append({'workers': workers, 'rows': len(df), 'seconds': best, 'rows_per_second': len(df) / best})
+        connector.engine.dispose()
+    return pd.DataFrame(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partitioned reads of 'customer_activity'.")
+    parser.add_argument('--rows', type=int, default=500000, help="Rows in the generated SQLite table.")
+    parser.add_argument('--url', default=None, help="Use an existing database (e.g. a local Postgres) instead.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        connection_string = args.url
+        if connection_string is None:
+            db_path = os.path.join(tmp_dir, 'customer_activity.db')
+            build_sqlite_table(db_path, args.rows)
+            connection_string = f"sqlite:///{db_path}"
+
+        results = run_benchmark(connection_string, args.workers)
+    print(results.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from stratified_sample import StratifiedSample
+from synthetic_data import generate
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def compare(name, exact, estimate, full_seconds, sample_seconds):
+    """One row per estimated value: its exact value, the interval and whether the interval covers it."""
+    frame = estimate[['estimate', 'lower', 'upper']].copy()
+    frame['exact'] = exact.reindex(frame.index)
+    frame['covered'] = (frame['lower'] <= frame['exact']) & (frame['exact'] <= frame['upper'])
+    return {'statistic': name, 'values': len(frame), 'covered': frame['covered'].mean(),
+            'full_s': full_seconds, 'sample_s': sample_seconds, 'speedup': full_seconds / sample_seconds}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sample estimates and their intervals with the exact full-data statistics.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--rows-per-stratum', type=int, default=1000)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    args = parser.parse_args()
+
+    df = generate(args.rows)
+    chunks = (df.iloc[start:start + args.chunksize] for start in range(0, len(df), args.chunksize))
+    sample, seconds = timed(lambda: StratifiedSample.from_chunks(chunks, rows_per_stratum=args.rows_per_stratum))
+    print(f"{args.rows} rows -> {len(sample.frame)} sampled in {len(sample.strata)} strata, one pass in {seconds:.2f} s")
+
+    columns = sample.numeric_columns()
+    results = []
+    for name, full, on_sample in [
+        ('mean', lambda: df[columns].mean(), sample.mean),
+        ('median', lambda: df[columns].median(), sample.quantile),
+        ('skew', lambda: df[columns].skew(), sample.skew),
+        ('corr', lambda: df[columns].corr().stack().rename_axis(['column', 'other']), sample.corr),
+        ('revenue by region', lambda: df.groupby('region')['revenue'].sum(),
+         lambda: sample.total('revenue', by='region')),
+        ('conversion by region and traffic', lambda: df.groupby(['region', 'traffic_type'])['revenue'].mean(),
+         lambda: sample.mean('revenue', by=['region', 'traffic_type'])),
+    ]:
+        exact, full_seconds = timed(full)
+        estimate, sample_seconds = timed(on_sample)
+        results.append(compare(name, exact, estimate, full_seconds, sample_seconds))
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from bench_partitioned_reads import PLACEHOLDER_CREDENTIALS
+from bench_typed_loader import peak_rss_mb, reset_peak_rss
+from data_transform import DataTransform
+from data_without_higly_correlated_columns import DataFrameTransform as CorrelationTransform
+from data_without_null_values import DataFrameTransform as NullValuesTransform
+from data_without_outliers import DataFrameTransform as OutliersTransform
+from data_without_skewness import DataFrameTransform as SkewnessTransform
+from db_utils import RDSDatabaseConnector, save_data, save_to_csv
+from synthetic_data import generate
+
+STAGE_NAMES = ['fetch_data', 'apply_transforms', 'impute_missing_data', 'transform_skewed_columns',
+               'remove_outliers', 'identify_and_remove_outliers', 'remove_highly_correlated_columns',
+               'save_data', 'save_to_csv']
+
+def build_stages(raw, work_dir):
+    """Return {stage: (function, input)} for the stages of the cleaning scripts.
+
+    Every function takes a fresh copy of its input and returns its output. Each stage's
+    input is the output of the stage before it in the cleaning workflow, computed once
+    here outside the timed runs.
+    """
+    db_path = os.path.join(work_dir, 'customer_activity.db')
+    connector = RDSDatabaseConnector(PLACEHOLDER_CREDENTIALS)
+    connector.create_engine(connection_string=f"sqlite:///{db_path}")
+    raw.to_sql('customer_activity', connector.engine, index=False, chunksize=50000)
+
+    def fetch_data(_):
+        return connector.fetch_data()
+
+    def apply_transforms(df):
+        return DataTransform(df).apply_transforms()
+
+    def impute_missing_data(df):
+        transformer = NullValuesTransform(df)
+        transformer.impute_missing_data(strategy='median')
+        transformer.impute_missing_data(strategy='category')
+        return transformer.df
+
+    def transform_skewed_columns(df):
+        transformer = SkewnessTransform(df)
+        transformer.transform_skewed_columns(transformer.identify_skewed_columns())
+        return transformer.df
+
+    def remove_outliers(df):
+        transformer = OutliersTransform(df)
+        transformer.remove_outliers()
+        return transformer.df
+
+    def identify_and_remove_outliers(df):
+        transformer = CorrelationTransform(df)
+        transformer.identify_and_remove_outliers(z_threshold=3)
+        return transformer.df
+
+    def remove_highly_correlated_columns(df):
+        transformer = CorrelationTransform(df)
+        transformer.remove_highly_correlated_columns(threshold=0.9)
+        return transformer.df
+
+    def write_parquet(df):
+        save_data(df, os.path.join(work_dir, 'customer_activity.parquet'))
+        return df
+
+    def write_csv(df):
+        save_to_csv(df, os.path.join(work_dir, 'customer_activity.csv'))
+        return df
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        nulls = NullValuesTransform(raw.copy())
+        nulls.remove_missing_operating_systems()
+        nulls.drop_columns_with_missing_data(threshold=30)
+        imputed = impute_missing_data(nulls.df.copy())
+        skewed = transform_skewed_columns(imputed.copy())
+        without_outliers = remove_outliers(skewed.copy())
+
+    stages = {
+        'fetch_data': (fetch_data, raw),
+        'apply_transforms': (apply_transforms, raw),
+        'impute_missing_data': (impute_missing_data, nulls.df),
+        'transform_skewed_columns': (transform_skewed_columns, imputed),
+        'remove_outliers': (remove_outliers, skewed),
+        'identify_and_remove_outliers': (identify_and_remove_outliers, skewed),
+        'remove_highly_correlated_columns': (remove_highly_correlated_columns, without_outliers),
+        'save_data': (write_parquet, without_outliers),
+        'save_to_csv': (write_csv, without_outliers),
+    }
+    return stages, connector
+
+def time_stage(func, df, repeats):
+    """Best wall time and largest peak RSS increase over 'repeats' runs on fresh copies of 'df'.
+
+    RSS can stay flat when a stage reuses memory freed by an earlier one, so one more
+    untimed run is traced with tracemalloc, which sees every Python and NumPy allocation.
+    """
+    seconds = []
+    peaks = []
+    for _ in range(repeats):
+        data = df.copy()
+        reset_peak_rss()
+        baseline_mb = peak_rss_mb()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = func(data)
+        seconds.append(time.perf_counter() - start)
+        peaks.append(peak_rss_mb() - baseline_mb)
+        del data
+
+    data = df.copy()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(data)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), max(peaks), traced_peak / 1e6, output
+
+def git_commit():
+    """Commit of the working tree, so results can be matched to the code that produced them."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, stage_names, repeats, seed):
+    results = []
+    for n_rows in sizes:
+        raw = generate(n_rows, seed=seed)
+        with tempfile.TemporaryDirectory() as work_dir:
+            stages, connector = build_stages(raw, work_dir)
+            for name in stage_names:
+                func, df = stages[name]
+                seconds, peak_mb, traced_mb, output = time_stage(func, df, repeats)
+                results.append({'rows': n_rows, 'stage': name, 'seconds': seconds,
+                                'rows_per_second': len(df) / seconds, 'peak_rss_delta_mb': peak_mb,
+                                'traced_peak_mb': traced_mb,
+                                'rows_in': len(df), 'rows_out': len(output),
+                                'columns_in': df.shape[1], 'columns_out': output.shape[1]})
+                print(f"{n_rows:>10} rows  {name:<34} {seconds:9.3f} s  {peak_mb:9.1f} MB RSS  {traced_mb:9.1f} MB traced")
+            connector.engine.dispose()
+    return results
+
+def compare(results, baseline_path):
+    """Table of the time and memory ratios against a previous results file (> 1 means slower / larger)."""
+    with open(baseline_path, 'r') as file:
+        baseline = json.load(file)
+    current = pd.DataFrame(results).set_index(['rows', 'stage'])
+    previous = pd.DataFrame(baseline['results']).set_index(['rows', 'stage'])
+    joined = current.join(previous, rsuffix='_baseline', how='inner')
+    return pd.DataFrame({
+        'seconds': joined['seconds'],
+        'seconds_baseline': joined['seconds_baseline'],
+        'time_ratio': joined['seconds'] / joined['seconds_baseline'],
+        'memory_ratio': joined['traced_peak_mb'] / joined['traced_peak_mb_baseline'],
+    }), baseline.get('commit')
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile every stage of the cleaning scripts.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Sizes of the synthetic data, up to tens of millions of rows.")
+    parser.add_argument('--stages', nargs='+', choices=STAGE_NAMES, default=STAGE_NAMES)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_stages.json', help="JSON file for the results.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Results file of an earlier commit to compare with.")
+    args = parser.parse_args()
+
+    results = run_suite(args.rows, args.stages, args.repeats, args.seed)
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'repeats': args.repeats,
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        comparison, baseline_commit = compare(results, args.compare)
+        print(f"\nCompared with {baseline_commit or args.compare}:")
+        print(comparison.round(3).to_string())
+
+if __name__ == "__main__":
+    main()
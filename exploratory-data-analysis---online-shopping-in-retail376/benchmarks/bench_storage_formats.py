@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from data_transform import DataTransform  # noqa: E402
+from storage import save_dataframe, load_dataframe  # noqa: E402
+
+def build_transformed_frame(n_rows, seed=0):
+    """Build a frame with the dtypes produced by 'DataTransform.apply_transforms'."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'administrative': rng.poisson(2, n_rows).astype(float),
+        'administrative_duration': rng.exponential(80, n_rows),
+        'informational': rng.poisson(0.5, n_rows),
+        'informational_duration': rng.exponential(30, n_rows),
+        'product_related': rng.poisson(30, n_rows).astype(float),
+        'product_related_duration': rng.exponential(1000, n_rows),
+        'bounce_rates': rng.beta(1, 20, n_rows),
+        'exit_rates': rng.beta(2, 20, n_rows),
+        'page_values': rng.exponential(5, n_rows),
+        'month': rng.choice(['Feb', 'Mar', 'May', 'Jul', 'Nov', 'Dec'], n_rows),
+        'operating_systems': rng.choice(['Windows', 'MACOS', 'Android', 'iOS'], n_rows),
+        'browser': rng.choice(['Google Chrome', 'Safari', 'Mozilla Firefox', 'Microsoft Edge'], n_rows),
+        'region': rng.choice(['North America', 'Western Europe', 'Asia', 'Oceania'], n_rows),
+        'traffic_type': rng.choice(['Google search', 'Facebook ads', 'Direct Traffic'], n_rows),
+        'visitor_type': rng.choice(['Returning_Visitor', 'New_Visitor'], n_rows),
+        'weekend': rng.random(n_rows) < 0.25,
+        'revenue': rng.random(n_rows) < 0.15,
+    })
+    return DataTransform(df).apply_transforms()
+
+def time_call(func, repeats):
+    """Return the best wall time of 'repeats' calls to 'func'."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run_benchmark(df, tmp_dir, repeats=3):
+    """Compare write time, full and projected read time, file size and dtype fidelity per format."""
+    formats = {'csv': 'data.csv', 'parquet (zstd)': 'data.parquet', 'feather (zstd)': 'data.feather'}
+    projected_columns = ['product_related_duration', 'revenue']
+    results = []
+    for name, file_name in formats.items():
+        path = os.path.join(tmp_dir, file_name)
+        write_seconds = time_call(lambda: save_dataframe(df, path), repeats)
+        read_seconds = time_call(lambda: load_dataframe(path), repeats)
+        projected_seconds = time_call(lambda: load_dataframe(path, columns=projected_columns), repeats)
+        loaded = load_dataframe(path)
+        results.append({
+            'format': name,
+            'size_mb': os.path.getsize(path) / 1e6,
+            'write_s': write_seconds,
+            'read_s': read_seconds,
+            'projected_read_s': projected_seconds,
+            'dtypes_kept': (loaded.dtypes.astype(str) == df.dtypes.astype(str)).sum(),
+        })
+    return pd.DataFrame(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV with the columnar storage formats.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    df = build_transformed_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run_benchmark(df, tmp_dir)
+    print(f"{args.rows} rows, {df.shape[1]} columns")
+    print(results.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
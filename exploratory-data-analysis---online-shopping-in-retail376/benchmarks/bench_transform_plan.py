@@ -0,0 +1,118 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from bench_typed_loader import peak_rss_mb, reset_peak_rss
+
+def build_frame(n_rows, extra_columns, seed=0):
+    """A wide customer_activity-like frame with missing values, skewed and correlated columns."""
+    rng = np.random.default_rng(seed)
+    data = {
+        'administrative': rng.poisson(2, n_rows).astype(float),
+        'informational': rng.poisson(0.5, n_rows),
+        'product_related': rng.poisson(30, n_rows).astype(float),
+        'product_related_duration': rng.exponential(1000, n_rows),
+        'bounce_rates': rng.beta(1, 20, n_rows),
+        'exit_rates': rng.beta(2, 20, n_rows),
+        'page_values': rng.exponential(5, n_rows),
+        'operating_systems': rng.choice(['Windows', 'MACOS', 'Android', 'iOS'], n_rows),
+        'browser': rng.choice(['Google Chrome', 'Safari', 'Mozilla Firefox'], n_rows),
+        'visitor_type': rng.choice(['Returning_Visitor', 'New_Visitor'], n_rows),
+    }
+    for i in range(extra_columns):
+        data[f'feature_{i}'] = rng.gamma(2, 1, n_rows)
+    df = pd.DataFrame(data)
+    df['product_related_copy'] = df['product_related'] * 2 + rng.normal(0, 1, n_rows)
+    for column in ['administrative', 'page_values', 'operating_systems', 'browser']:
+        df.loc[rng.random(n_rows) < 0.05, column] = np.nan
+    df.loc[rng.random(n_rows) < 0.4, 'exit_rates'] = np.nan
+    return df
+
+def run_eager(df):
+    """The DataFrameTransform chain of the cleaning scripts, one class after another."""
+    from data_without_higly_correlated_columns import DataFrameTransform as CorrelationTransform
+    from data_without_null_values import DataFrameTransform as NullValuesTransform
+    from data_without_outliers import DataFrameTransform as OutliersTransform
+    from data_without_skewness import DataFrameTransform as SkewnessTransform
+
+    transformer = NullValuesTransform(df)
+    transformer.remove_missing_operating_systems()
+    transformer.drop_columns_with_missing_data(threshold=30)
+    transformer.impute_missing_data(strategy='median')
+    transformer.impute_missing_data(strategy='category')
+    transformer = SkewnessTransform(transformer.df)
+    transformer.transform_skewed_columns(transformer.identify_skewed_columns())
+    transformer = OutliersTransform(transformer.df)
+    transformer.remove_outliers()
+    transformer = CorrelationTransform(transformer.df)
+    transformer.remove_highly_correlated_columns(threshold=0.9)
+    return transformer.df
+
+def run_lazy(df):
+    """The same steps recorded on a TransformPlan and collected once."""
+    from transform_plan import TransformPlan
+
+    return (TransformPlan(df)
+            .remove_missing_operating_systems()
+            .drop_columns_with_missing_data(threshold=30)
+            .impute_missing_data(strategy='median')
+            .impute_missing_data(strategy='category')
+            .transform_skewed_columns()
+            .remove_outliers()
+            .remove_highly_correlated_columns(threshold=0.9)
+            .collect())
+
+def run_mode(mode, n_rows, extra_columns):
+    """Build the frame, run one mode in this process and print its timing and peak RSS as JSON."""
+    df = build_frame(n_rows, extra_columns)
+    run = run_eager if mode == 'eager' else run_lazy
+    # Import the modules before measuring, so only the transformations count
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(df.head(1000))
+
+    reset_peak_rss()
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run(df)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({'mode': mode, 'seconds': seconds, 'peak_rss_delta_mb': peak_rss_mb() - baseline_mb,
+                      'input_mb': df.memory_usage(deep=True).sum() / 1e6,
+                      'rows_out': len(result), 'columns_out': result.shape[1],
+                      'checksum': float(result.select_dtypes('number').to_numpy().sum())}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the peak memory of the eager DataFrameTransform chain and TransformPlan.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--extra-columns', type=int, default=30, help="Additional numeric columns, to make the frame wide.")
+    parser.add_argument('--child', metavar='MODE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.rows, args.extra_columns)
+        return
+
+    # Each mode runs in a fresh interpreter so peak RSS is measured independently
+    results = []
+    for mode in ['eager', 'lazy']:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode,
+                                 '--rows', str(args.rows), '--extra-columns', str(args.extra_columns)],
+                                check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.rows} rows, {args.extra_columns} extra columns")
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
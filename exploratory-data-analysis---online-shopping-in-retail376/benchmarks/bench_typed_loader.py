@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+def build_raw_csv(file_path, n_rows, seed=0):
+    """Write a CSV shaped like the 'customer_activity' export, before any type conversion."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'administrative': rng.poisson(2, n_rows).astype(float),
+        'administrative_duration': rng.exponential(80, n_rows),
+        'informational': rng.poisson(0.5, n_rows),
+        'informational_duration': rng.exponential(30, n_rows),
+        'product_related': rng.poisson(30, n_rows).astype(float),
+        'product_related_duration': rng.exponential(1000, n_rows),
+        'bounce_rates': rng.beta(1, 20, n_rows),
+        'exit_rates': rng.beta(2, 20, n_rows),
+        'page_values': rng.exponential(5, n_rows),
+        'month': rng.choice(['Feb', 'Mar', 'May', 'June', 'Jul', 'Nov', 'Dec'], n_rows),
+        'operating_systems': rng.choice(['Windows', 'MACOS', 'Android', 'iOS'], n_rows),
+        'browser': rng.choice(['Google Chrome', 'Safari', 'Mozilla Firefox', 'Microsoft Edge'], n_rows),
+        'region': rng.choice(['North America', 'Western Europe', 'Asia', 'Oceania'], n_rows),
+        'traffic_type': rng.choice(['Google search', 'Facebook ads', 'Direct Traffic'], n_rows),
+        'visitor_type': rng.choice(['Returning_Visitor', 'New_Visitor'], n_rows),
+        'weekend': rng.random(n_rows) < 0.25,
+        'revenue': rng.random(n_rows) < 0.15,
+    })
+    df.to_csv(file_path, index=False)
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS mark to the current RSS (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1e6 if sys.platform == 'darwin' else peak_rss / 1e3
+
+def as_float32(df):
+    """'df' with its float64 columns stored as float32."""
+    return df.astype({column: 'float32' for column in df.select_dtypes(include=['float64']).columns})
+
+def float32_errors(file_path):
+    """Largest relative change of the statistics the cleaning steps use when the floats are float32."""
+    from schema import load_csv
+
+    df, _ = load_csv(file_path)
+    columns = df.select_dtypes(include=['float64']).columns
+    exact = df[columns]
+    approximate = as_float32(exact).astype('float64')
+    errors = {}
+    for name, statistic in [('mean', lambda frame: frame.mean()), ('skew', lambda frame: frame.skew()),
+                            ('q3', lambda frame: frame.quantile(0.75))]:
+        errors[name] = float(((statistic(approximate) - statistic(exact)) / statistic(exact)).abs().max())
+    errors['corr'] = float((approximate.corr() - exact.corr()).abs().to_numpy().max())
+    return errors
+
+def run_loader(loader, file_path):
+    """Load the CSV with one loader in this process and print its timing and peak RSS as JSON."""
+    from data_transform import DataTransform
+    from schema import load_csv
+
+    # Measure from after the imports, so only the loading itself counts
+    reset_peak_rss()
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    if loader == 'apply_transforms':
+        df = DataTransform(pd.read_csv(file_path)).apply_transforms()
+    else:
+        df, _ = load_csv(file_path)
+        if loader == 'schema_float32':
+            df = as_float32(df)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({'loader': loader, 'seconds': seconds, 'peak_rss_delta_mb': peak_rss_mb() - baseline_mb,
+                      'frame_mb': df.memory_usage(deep=True).sum() / 1e6}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the schema loader with DataTransform.apply_transforms.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--child', nargs=2, metavar=('LOADER', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_loader(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'customer_activity_data.csv')
+        build_raw_csv(file_path, args.rows)
+
+        # Each loader runs in a fresh interpreter so peak RSS is measured independently
+        results = []
+        for loader in ['apply_transforms', 'schema', 'schema_float32']:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', loader, file_path],
+                                    check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        errors = float32_errors(file_path)
+
+    print(f"{args.rows} rows")
+    print(pd.DataFrame(results).to_string(index=False))
+    # The schema keeps float64: the precision would allow float32, but the saving is small
+    # and float32 columns are skipped by the float64/int64 selectors of the cleaning scripts
+    print("\nLargest relative error of the statistics with float32 columns:")
+    print(pd.Series(errors).to_string())
+
+if __name__ == "__main__":
+    main()
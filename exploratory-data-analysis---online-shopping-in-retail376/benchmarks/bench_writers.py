@@ -0,0 +1,74 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from data_transform import DataTransform
+from storage import save_dataframe
+from synthetic_data import generate
+
+def pandas_csv(df, path):
+    """The writer used before: one pandas 'to_csv' call, compressed by pandas when the name ends in '.gz'."""
+    df.to_csv(path, index=False)
+
+def pandas_parquet(df, path):
+    df.to_parquet(path, index=False, compression='zstd')
+
+def writers(max_workers):
+    return {
+        'pandas csv': ('data.csv', pandas_csv),
+        'pandas csv.gz': ('data.csv.gz', pandas_csv),
+        'pandas parquet': ('data.parquet', pandas_parquet),
+        'storage csv': ('data.csv', lambda df, path: save_dataframe(df, path, max_workers=max_workers)),
+        'storage csv.gz': ('data.csv.gz', lambda df, path: save_dataframe(df, path, max_workers=max_workers)),
+        'storage csv.zst': ('data.csv.zst', lambda df, path: save_dataframe(df, path, max_workers=max_workers)),
+        'storage parquet': ('data.parquet', lambda df, path: save_dataframe(df, path, max_workers=max_workers)),
+        'storage parquet by month': ('by_month', lambda df, path: save_dataframe(df, path, partition_cols='month',
+                                                                                   max_workers=max_workers)),
+    }
+
+def output_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+    return os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the MB/s of the pandas writers and the threaded writers of 'storage'.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    parser.add_argument('--repeats', type=int, default=2)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataTransform(generate(args.rows)).apply_transforms()
+    # Throughput is measured against the in-memory size, the same for every format
+    memory_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{args.rows} rows, {memory_mb:.1f} MB in memory, {os.cpu_count()} CPUs")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in sorted(set(args.workers)):
+            for name, (file_name, write) in writers(workers).items():
+                if name.startswith('pandas') and workers != min(args.workers):
+                    continue
+                path = os.path.join(tmp_dir, file_name)
+                seconds = []
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        write(df, path)
+                    seconds.append(time.perf_counter() - start)
+                results.append({'writer': name, 'workers': 1 if name.startswith('pandas') else workers,
+                                'seconds': min(seconds), 'mb_per_second': memory_mb / min(seconds),
+                                'file_mb': output_size(path) / 1e6})
+    print(pd.DataFrame(results).round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
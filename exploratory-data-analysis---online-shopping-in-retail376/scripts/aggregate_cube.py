@@ -0,0 +1,245 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from schema import VALID_MONTHS
+from storage import PROJECT_DIR, save_dataframe, load_dataframe
+
+# Dimensions the notebook questions group and filter by
+DIMENSIONS = ['weekend', 'region', 'traffic_type', 'month', 'operating_systems', 'browser', 'visitor_type']
+
+# Columns summed per cell; each also gets a '<measure>_count' of its non-missing values, so means are exact
+DURATION_COLUMNS = ['administrative_duration', 'informational_duration', 'product_related_duration']
+SHARE_COLUMNS = {'administrative_share': 'administrative_duration',
+                 'informational_share': 'informational_duration',
+                 'product_related_share': 'product_related_duration'}
+MEASURES = ['revenue'] + DURATION_COLUMNS + ['bounce_rates', 'exit_rates', 'page_values'] + list(SHARE_COLUMNS)
+
+# Above this many possible combinations of the grouped dimensions, only the present ones are enumerated
+MAX_DENSE_GROUPS = 1 << 20
+
+DEFAULT_CUBE = os.path.join(PROJECT_DIR, 'customer_activity_cube.parquet')
+
+def month_labels(months):
+    """Short month names ('Jun') of distinct months given as dates (data_transform.py) or raw text ('June')."""
+    if isinstance(months, pd.DatetimeIndex):
+        return months.strftime('%b')
+    names = months.astype(str)
+    short = names.str[:3].str.title()
+    # Text that is not a month name is kept as it is
+    return pd.Index(np.where(short.isin(VALID_MONTHS), short, names))
+
+def dimension_values(df):
+    """Dimension labels as categoricals of strings, months as their short names whether raw or converted."""
+    labels = {}
+    for dimension in DIMENSIONS:
+        # Only the distinct values are formatted, then spread back to the rows through their codes
+        codes, uniques = pd.factorize(df[dimension])
+        uniques = pd.Index(uniques)
+        names = month_labels(uniques) if dimension == 'month' else uniques.astype(str)
+        name_codes, categories = pd.factorize(names)
+        labels[dimension] = pd.Categorical.from_codes(np.where(codes >= 0, name_codes[codes], -1), categories=categories)
+    return pd.DataFrame(labels, index=df.index)
+
+def measure_values(df):
+    """Per-session values of the measures: revenue as 0/1, durations in seconds and each task's % of the total duration."""
+    values = pd.DataFrame(index=df.index)
+    for measure in MEASURES:
+        if measure not in df.columns:
+            continue
+        column = df[measure]
+        if pd.api.types.is_timedelta64_dtype(column):
+            column = column.dt.total_seconds()
+        values[measure] = column.astype('float64')
+    if all(column in values.columns for column in DURATION_COLUMNS):
+        total_duration = values[DURATION_COLUMNS].sum(axis=1, min_count=len(DURATION_COLUMNS))
+        for share, column in SHARE_COLUMNS.items():
+            # Sessions without any duration have no share, as in the notebook (0 / 0 is skipped by mean())
+            values[share] = (values[column] / total_duration * 100).replace([np.inf, -np.inf], np.nan)
+    return values
+
+class AggregateCube:
+    """Sessions, revenue and duration sums of 'customer_activity' per combination of DIMENSIONS.
+
+    The cube keeps one row per combination of dimension values that occurs in the data
+    (the finest grain), with the number of sessions and, for every measure, its sum and
+    count of non-missing values. Any group-by over a subset of the dimensions, with
+    filters, is a small aggregation of these rows instead of a scan of the sessions.
+    All figures are sums, so new sessions are added with 'update' without rebuilding.
+    Unfiltered group-bys are kept in 'views' until the next update, so asking the same
+    question again is a lookup.
+    """
+
+    def __init__(self, cells=None):
+        self.cells = cells
+        self.views = {}
+
+    @staticmethod
+    def aggregate(df):
+        """Aggregate sessions into cells (not yet merged with any existing cube)."""
+        missing = [dimension for dimension in DIMENSIONS if dimension not in df.columns]
+        if missing:
+            raise ValueError(f"Missing dimension columns: {missing}")
+
+        values = measure_values(df)
+        frame = dimension_values(df)
+        frame['sessions'] = 1
+        for measure in values.columns:
+            frame[measure] = values[measure].fillna(0)
+            frame[f'{measure}_count'] = values[measure].notna().astype('int64')
+        # dropna=False keeps sessions with a missing dimension, so totals cover every session
+        return frame.groupby(DIMENSIONS, observed=True, dropna=False, sort=False).sum().reset_index()
+
+    @classmethod
+    def build(cls, df):
+        """Build the cube from a DataFrame of sessions, e.g. transformed_data."""
+        cube = cls()
+        cube.update(df)
+        return cube
+
+    def update(self, df):
+        """Add new sessions to the cube. Cells of unseen dimension combinations are created."""
+        new_cells = self.aggregate(df)
+        if self.cells is None or self.cells.empty:
+            cells = new_cells
+        else:
+            current = self.cells.astype({dimension: 'str' for dimension in DIMENSIONS})
+            cells = pd.concat([current, new_cells], ignore_index=True)
+            cells = cells.groupby(DIMENSIONS, dropna=False, sort=False).sum().reset_index()
+        # Dictionary-encoded dimensions keep the cube small in memory and on disk
+        self.cells = cells.astype({dimension: 'category' for dimension in DIMENSIONS})
+        self.views = {}
+        print(f"\nCube updated with {len(df)} sessions: {len(self.cells)} cells.")
+        return self
+
+    def mask(self, where):
+        """Boolean mask of the cells matching 'where': {dimension: value, list of values, or function of the column returning a mask}."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dimension, condition in (where or {}).items():
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}'. Use one of {DIMENSIONS}.")
+            column = self.cells[dimension]
+            # The condition is evaluated once per category, then spread to the cells by their codes
+            categories = pd.Series(column.cat.categories)
+            if callable(condition):
+                matches = np.asarray(condition(categories).fillna(False), dtype=bool)
+            elif isinstance(condition, (list, tuple, set)):
+                matches = categories.isin([str(value) for value in condition]).to_numpy()
+            else:
+                matches = (categories == str(condition)).to_numpy()
+            mask &= np.append(matches, False)[column.cat.codes.to_numpy()]  # Code -1 (missing) never matches
+        return mask
+
+    def select(self, where=None):
+        """Cells matching 'where' (see 'mask')."""
+        return self.cells[self.mask(where)] if where else self.cells
+
+    def group_sums(self, by, measures, mask):
+        """Sums of 'measures' per combination of 'by' present in the masked cells.
+
+        Cells are grouped by the combined category codes of 'by' with np.bincount,
+        which is much cheaper than a groupby on the cube's tens of thousands of cells.
+        """
+        codes = [self.cells[dimension].cat.codes.to_numpy() for dimension in by]
+        categories = [self.cells[dimension].cat.categories for dimension in by]
+        sizes = [len(values) for values in categories]
+        # Cells with a missing value in 'by' (code -1) are left out, like DataFrame.groupby
+        keep = mask & np.logical_and.reduce([code >= 0 for code in codes])
+        flat = np.ravel_multi_index([code[keep] for code in codes], sizes)
+        size = int(np.prod(sizes))
+        if size <= MAX_DENSE_GROUPS:
+            groups = np.flatnonzero(np.bincount(flat, minlength=size))
+            positions, length = flat, size
+        else:
+            groups, positions = np.unique(flat, return_inverse=True)
+            length = len(groups)
+
+        columns = {}
+        for measure in measures:
+            sums = np.bincount(positions, weights=self.cells[measure].to_numpy(dtype='float64')[keep], minlength=length)
+            columns[measure] = (sums[groups] if size <= MAX_DENSE_GROUPS else sums).astype(self.cells[measure].dtype)
+        labels = np.unravel_index(groups, sizes)
+        if len(by) == 1:
+            index = pd.Index(categories[0][labels[0]], name=by[0])
+        else:
+            index = pd.MultiIndex.from_arrays([values[label] for values, label in zip(categories, labels)], names=by)
+        return pd.DataFrame(columns, index=index)
+
+    def query(self, by=(), measures=('sessions', 'revenue'), where=None, sort=None):
+        """Sums of 'measures' grouped by the dimensions 'by' (none: grand totals), over the cells matching 'where'.
+
+        Groups with a missing dimension value are left out, like DataFrame.groupby.
+        """
+        if self.cells is None:
+            raise RuntimeError("The cube is empty. Build it with 'AggregateCube.build()' or load it first.")
+        by = [by] if isinstance(by, str) else list(by)
+        measures = [measures] if isinstance(measures, str) else list(measures)
+        unknown = [name for name in measures if name not in self.cells.columns or name in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown measures: {unknown}")
+        unknown = [name for name in by if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {unknown}. Use some of {DIMENSIONS}.")
+        if not by:
+            return self.select(where)[measures].sum()
+        if where:
+            result = self.group_sums(by, measures, self.mask(where))
+        else:
+            key = (tuple(by), tuple(measures))
+            if key not in self.views:
+                self.views[key] = self.group_sums(by, measures, np.ones(len(self.cells), dtype=bool))
+            result = self.views[key]
+        if sort is not None:
+            result = result.sort_values(sort, ascending=False)
+        return result
+
+    def mean(self, measure, by=(), where=None):
+        """Mean of a measure per session that has it (e.g. average bounce rate per region)."""
+        totals = self.query(by, [measure, f'{measure}_count'], where)
+        return totals[measure] / totals[f'{measure}_count']
+
+    def share(self, by, measure='sessions', where=None, within=None):
+        """Percentage of the total of 'measure' in each group of 'by'.
+
+        'within' names dimensions of 'by' to normalise inside (e.g. the share of every
+        operating system within each region).
+        """
+        totals = self.query(by, measure, where)[measure]
+        if within:
+            return totals / totals.groupby(level=within, observed=True).transform('sum') * 100
+        return totals / totals.sum() * 100
+
+    def save(self, file_path=DEFAULT_CUBE):
+        # Written atomically, so readers never see a half-written cube
+        save_dataframe(self.cells, file_path)
+        print(f"\nCube with {len(self.cells)} cells saved to {file_path}")
+
+    @classmethod
+    def load(cls, file_path=DEFAULT_CUBE):
+        cells = load_dataframe(file_path)
+        return cls(cells.astype({dimension: 'category' for dimension in DIMENSIONS}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, update or query the aggregate cube of 'customer_activity'.")
+    parser.add_argument('--cube', default=DEFAULT_CUBE)
+    parser.add_argument('--build', metavar='FILE', help="Build the cube from a Parquet, Feather or CSV file of sessions.")
+    parser.add_argument('--update', metavar='FILE', help="Add the new sessions of a file to the existing cube.")
+    parser.add_argument('--by', nargs='*', default=[], help="Dimensions to group the query by.")
+    parser.add_argument('--measures', nargs='+', default=['sessions', 'revenue'])
+    args = parser.parse_args()
+
+    if args.build:
+        cube = AggregateCube.build(load_dataframe(args.build))
+        cube.save(args.cube)
+    elif args.update:
+        cube = AggregateCube.load(args.cube).update(load_dataframe(args.update))
+        cube.save(args.cube)
+    else:
+        cube = AggregateCube.load(args.cube)
+
+    print(cube.query(args.by, args.measures, sort=args.measures[0] if args.by else None))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from streaming_stats import NullPatternProfile
+
+# Plots are drawn from small precomputed summaries, so rendering time depends on the
+# number of bins and the sample size, not on the number of rows in the frame.
+DEFAULT_BINS = 50
+DEFAULT_KDE_SAMPLE = 50000
+DEFAULT_FLIER_SAMPLE = 2000
+
+def summarize_histogram(series, bins=DEFAULT_BINS, kde_sample_size=DEFAULT_KDE_SAMPLE, seed=0):
+    """Binned counts of a column plus a bounded sample for its KDE curve."""
+    values = series.dropna().to_numpy(dtype='float64')
+    counts, edges = np.histogram(values, bins=bins)
+    if len(values) > kde_sample_size:
+        values = np.random.default_rng(seed).choice(values, kde_sample_size, replace=False)
+    return {'counts': counts, 'edges': edges, 'kde_sample': values}
+
+def summarize_boxplot(series, flier_sample_size=DEFAULT_FLIER_SAMPLE, seed=0):
+    """Quartiles, whiskers and a bounded sample of outliers, in the format of Axes.bxp.
+
+    Return None for a column without any value, which is drawn as an empty panel.
+    """
+    values = series.dropna().to_numpy(dtype='float64')
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    fliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if len(fliers) > flier_sample_size:
+        fliers = np.random.default_rng(seed).choice(fliers, flier_sample_size, replace=False)
+    return {'med': median, 'q1': q1, 'q3': q3, 'whislo': inside.min(), 'whishi': inside.max(),
+            'fliers': fliers, 'label': series.name}
+
+def build_tasks(df, requests, bins=DEFAULT_BINS, kde_sample_size=DEFAULT_KDE_SAMPLE):
+    """Turn (kind, column) requests into small picklable rendering tasks."""
+    tasks = []
+    for kind, column in requests:
+        if kind == 'histogram':
+            data = summarize_histogram(df[column], bins, kde_sample_size)
+        elif kind == 'boxplot':
+            data = summarize_boxplot(df[column])
+        elif kind == 'correlation_matrix':
+            data = df.select_dtypes(include=['float64', 'int64']).corr()
+        elif kind == 'missing_values':
+            data = NullPatternProfile().update_frame(df).null_density()
+        elif kind == 'missing_summary':
+            missing_percentage = df.isnull().mean() * 100
+            data = missing_percentage[missing_percentage > 0].sort_values()
+        else:
+            raise ValueError(f"Unknown plot kind '{kind}'.")
+        tasks.append((kind, column, data))
+    return tasks
+
+def render_task(task, output_dir):
+    """Draw one figure from its summary and save it as a PNG. Runs inside a worker.
+
+    Figures are created without pyplot, so they are drawn on the Agg canvas whatever
+    the interactive backend is and never open a window.
+    """
+    from matplotlib.figure import Figure
+    from scipy import stats
+
+    kind, column, data = task
+    if kind == 'histogram':
+        fig = Figure(figsize=(8, 6))
+        ax = fig.subplots()
+        edges = data['edges']
+        ax.stairs(data['counts'], edges, fill=True, color='skyblue', edgecolor='white')
+        sample = data['kde_sample']
+        if len(sample) > 1 and np.ptp(sample) > 0:
+            grid = np.linspace(edges[0], edges[-1], 200)
+            # Scale the density to the histogram counts, as seaborn does with kde=True
+            scale = data['counts'].sum() * (edges[1] - edges[0])
+            ax.plot(grid, stats.gaussian_kde(sample)(grid) * scale, color='steelblue')
+        ax.set_title(f"Distribution of {column}")
+    elif kind == 'boxplot':
+        fig = Figure(figsize=(8, 6))
+        ax = fig.subplots()
+        if data is None:
+            ax.text(0.5, 0.5, "No values", ha='center', va='center', transform=ax.transAxes)
+        else:
+            ax.bxp([data], vert=False, patch_artist=True, boxprops={'facecolor': 'skyblue'})
+        ax.set_title(f"Boxplot of {column}")
+    elif kind == 'correlation_matrix':
+        import seaborn as sns
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
+        sns.heatmap(data, annot=True, cmap='coolwarm', fmt='.2f', linewidths=0.5, ax=ax)
+        ax.set_title("Correlation Matrix")
+    elif kind == 'missing_values':
+        import seaborn as sns
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
+        sns.heatmap(data, cmap='viridis', vmin=0, vmax=1, yticklabels=False, ax=ax)
+        ax.set_title("Missing Values Heatmap")
+    else:
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        data.plot(kind='bar', color='orange', ax=ax)
+        ax.set_title("Missing Values by Column (%)")
+        ax.set_xlabel("Columns")
+        ax.set_ylabel("Percentage of Missing Data")
+
+    file_name = f"{kind}_{column}.png" if column is not None else f"{kind}.png"
+    path = os.path.join(output_dir, file_name)
+    fig.savefig(path, bbox_inches='tight')
+    return path
+
+def write_html_report(paths, report_path, title="EDA report"):
+    """Write a single HTML page showing every rendered figure in order."""
+    report_dir = os.path.dirname(os.path.abspath(report_path))
+    lines = [f"<html><head><title>{html.escape(title)}</title></head><body>", f"<h1>{html.escape(title)}</h1>"]
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        lines.append(f"<h3>{html.escape(name)}</h3>")
+        lines.append(f'<img src="{html.escape(os.path.relpath(path, report_dir))}">')
+    lines.append("</body></html>")
+    with open(report_path, 'w') as file:
+        file.write("\n".join(lines))
+
+def render_batch(df, requests, output_dir, report_path=None, max_workers=None,
+                 bins=DEFAULT_BINS, kde_sample_size=DEFAULT_KDE_SAMPLE):
+    """Render all requested figures to PNG files in 'output_dir' without opening any window.
+
+    'requests' is a list of (kind, column) pairs where kind is 'histogram', 'boxplot',
+    'correlation_matrix', 'missing_values' or 'missing_summary' (column is None for
+    the last three).
+    Figures are drawn in a process pool and returned in the order requested.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = build_tasks(df, requests, bins, kde_sample_size)
+
+    if max_workers == 1 or len(tasks) <= 1:
+        paths = [render_task(task, output_dir) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(executor.map(render_task, tasks, [output_dir] * len(tasks)))
+
+    if report_path is not None:
+        write_html_report(paths, report_path)
+        print(f"\nReport with {len(paths)} figures saved to {report_path}")
+    else:
+        print(f"\n{len(paths)} figures saved to {output_dir}")
+    return paths
@@ -0,0 +1,173 @@
+import os
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Per-column work. Every function receives one column as a float64 array and is
+# run the same way serially and in the workers, so both give identical results.
+
+def column_statistic(values, stat, **params):
+    """One pandas reduction ('skew', 'min', 'mean', 'median', 'std', 'quantile') of a column."""
+    return getattr(pd.Series(values, copy=False), stat)(**params)
+
+def transform_skewed(values):
+    """Reduce the skewness of a column in place, choosing the method as transform_skewed_columns does.
+
+    Return (method, lambda), lambda being None unless the method is 'boxcox'.
+    """
+    minimum = np.nanmin(values)
+    if minimum > 0:
+        np.log1p(values, out=values)
+        return 'log1p', None
+    if minimum >= 0:
+        np.sqrt(values, out=values)
+        return 'sqrt', None
+    values[:], lmbda = stats.boxcox(values + 1)
+    return 'boxcox', float(lmbda)
+
+COLUMN_TASKS = {
+    'statistic': column_statistic,
+    'transform_skewed': transform_skewed,
+}
+
+def run_column_task(path, shape, index, task, params):
+    """Worker entry point: map the shared block and run 'task' on column 'index' in place."""
+    block = np.memmap(path, dtype='float64', mode='r+', shape=shape)
+    try:
+        return COLUMN_TASKS[task](block[index], **params)
+    finally:
+        block.flush()
+        del block
+
+def column_fingerprint(series):
+    """(buffer address, length, stride, dtype) of a column, and the array owning its buffer."""
+    values = series.to_numpy()
+    owner = values
+    while isinstance(owner.base, np.ndarray):
+        owner = owner.base
+    return (values.__array_interface__['data'][0], len(values), values.strides, str(values.dtype)), owner
+
+class ColumnEngine:
+    """Run per-column statistics and transformations of the numeric columns in a process pool.
+
+    The columns are copied into a memory-mapped block (in /dev/shm when it exists),
+    one contiguous row per column, and every worker maps the same file instead of
+    receiving a pickled frame. Each task handles one column and only writes to its own
+    row, so no locking is needed, and the results are merged back in column order,
+    whatever order the workers finish in. Frames with fewer than 'min_cells' values
+    (rows x columns) are processed serially, where the pool would cost more than it saves.
+
+    The pool and the block are kept between calls: the skewness steps ask for one
+    statistic at a time, and starting processes and copying the frame for each would
+    cost more than the work. The block is reused while the requested columns still
+    point to the buffers it was copied from (see ColumnStatsCache) and rebuilt when the
+    frame changes. Call 'close' (or use the engine in a 'with' block) to stop the
+    workers and remove the block.
+    """
+
+    def __init__(self, max_workers=None, min_cells=5000000):
+        self.max_workers = max_workers or os.cpu_count()
+        self.min_cells = min_cells
+        self.executor = None
+        self.block_path = None
+        self.block_shape = None
+        self.block_columns = {}  # {column: (row in the block, fingerprint, weak reference to the owner)}
+        self.finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def is_parallel(self, df, columns):
+        return self.max_workers > 1 and len(columns) > 1 and len(df) * len(columns) >= self.min_cells
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor
+
+    def release_block(self):
+        """Forget the shared block and remove its file."""
+        if self.finalizer is not None:
+            self.finalizer()  # Removes the file, once
+        self.block_path = self.block_shape = self.finalizer = None
+        self.block_columns = {}
+
+    def close(self):
+        """Stop the worker processes and remove the shared block."""
+        self.release_block()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def block_rows(self, df, columns):
+        """Rows of 'columns' in the shared block, copying them into a new block unless it already holds them."""
+        fingerprints = {column: column_fingerprint(df[column]) for column in columns}
+        rows = []
+        for column in columns:
+            entry = self.block_columns.get(column)
+            if entry is None or entry[1] != fingerprints[column][0] or entry[2]() is not fingerprints[column][1]:
+                break
+            rows.append(entry[0])
+        else:
+            return rows
+
+        self.release_block()
+        shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        file_descriptor, path = tempfile.mkstemp(suffix='.columns', dir=shm_dir)
+        os.close(file_descriptor)
+        self.finalizer = weakref.finalize(self, os.remove, path)
+        shape = (len(columns), len(df))
+        block = np.memmap(path, dtype='float64', mode='w+', shape=shape)
+        for index, column in enumerate(columns):
+            block[index] = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        block.flush()
+        del block
+        self.block_path, self.block_shape = path, shape
+        self.block_columns = {column: (index, fingerprints[column][0], weakref.ref(fingerprints[column][1]))
+                              for index, column in enumerate(columns)}
+        return list(range(len(columns)))
+
+    def run(self, df, columns, task, **params):
+        """Run 'task' on each of 'columns' and return (results, block).
+
+        'results' is a list in column order. 'block' is a (columns, rows) float64 array
+        holding the column values as left by the task.
+        """
+        columns = list(columns)
+        if not self.is_parallel(df, columns):
+            block = np.empty((len(columns), len(df)), dtype='float64')
+            for index, column in enumerate(columns):
+                block[index] = df[column].to_numpy(dtype='float64', na_value=np.nan)
+            results = [COLUMN_TASKS[task](block[index], **params) for index in range(len(columns))]
+            return results, block
+
+        rows = self.block_rows(df, columns)
+        path, shape = self.block_path, self.block_shape
+        # map returns the results in the order of the columns, not of completion
+        results = list(self.get_executor().map(run_column_task, [path] * len(rows), [shape] * len(rows), rows,
+                                                [task] * len(rows), [params] * len(rows)))
+        values = None
+        if task == 'transform_skewed':
+            # The block now holds transformed values, so it no longer matches the frame
+            values = np.array(np.memmap(path, dtype='float64', mode='r', shape=shape)[rows])
+            self.release_block()
+        return results, values
+
+    def column_stats(self, df, columns, stat, **params):
+        """Series of one statistic per column, like getattr(df[columns], stat)(**params)."""
+        results, _ = self.run(df, columns, 'statistic', stat=stat, **params)
+        return pd.Series(results, index=list(columns), dtype='float64')
+
+    def transform_skewed(self, df, columns):
+        """Return (transformed columns as a DataFrame, {column: (method, lambda)})."""
+        results, values = self.run(df, columns, 'transform_skewed')
+        transformed = pd.DataFrame(values.T, index=df.index, columns=list(columns))
+        return transformed, dict(zip(columns, results))
+
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pandas as pd
+
+from storage import atomic_path
+
+WATERMARK_FILE = '_watermark.json'
+
+class CustomerActivityCache:
+    """Local Parquet cache of 'customer_activity', kept up to date incrementally when the table allows it.
+
+    With a 'watermark_column', every sync appends the rows whose value in that column is
+    greater than the last value seen as new 'part-NNNNN.parquet' files, so unchanged
+    history is never downloaded twice. The column must be unique and only grow with new
+    rows (e.g. an auto-increment key): 'WHERE column > watermark' skips any row added
+    later with a value equal to or lower than the last one synced, so a timestamp shared
+    by several rows silently loses the late ones.
+
+    Without a watermark column (the table has no such key), every sync is a full
+    refresh: the whole table is downloaded and replaces the cache in one step.
+    """
+
+    def __init__(self, cache_dir='customer_activity_cache', watermark_column=None):
+        self.cache_dir = cache_dir
+        self.watermark_column = watermark_column
+        self.watermark_path = os.path.join(cache_dir, WATERMARK_FILE)
+
+    def read_watermark(self):
+        """Return the stored watermark state, or an empty state if the cache has never been synced."""
+        if not os.path.exists(self.watermark_path):
+            return {'column': self.watermark_column, 'value': None, 'parts': 0}
+
+        with open(self.watermark_path, 'r') as file:
+            state = json.load(file)
+        if None not in (state['column'], self.watermark_column) and state['column'] != self.watermark_column:
+            raise ValueError(f"The cache in {self.cache_dir} was built on '{state['column']}', "
+                             f"not '{self.watermark_column}'.")
+        return state
+
+    def write_watermark(self, state, watermark_path=None):
+        """Persist the watermark state, replacing the previous file atomically."""
+        watermark_path = watermark_path or self.watermark_path
+        tmp_path = watermark_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(tmp_path, watermark_path)
+
+    def sql_literal(self, value):
+        """Format a watermark value for use in a WHERE clause."""
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def sync(self, connector, table_name='customer_activity', chunksize=50000):
+        """Bring the cache up to date: an incremental sync with a watermark column, a full refresh without."""
+        if self.watermark_column is None:
+            return self.refresh(connector, table_name, chunksize)
+        return self.sync_incremental(connector, table_name, chunksize)
+
+    def refresh(self, connector, table_name='customer_activity', chunksize=50000):
+        """Download the whole table and replace the cache with it.
+
+        The partitions are written to a temporary directory that is swapped in once the
+        download is complete, so a failed refresh leaves the previous cache as it was.
+        """
+        rows = 0
+        parts = 0
+        with atomic_path(self.cache_dir) as tmp_dir:
+            os.makedirs(tmp_dir)
+            for chunk in connector.fetch_data_in_chunks(table_name, chunksize=chunksize):
+                if chunk.empty:
+                    continue
+                chunk.to_parquet(os.path.join(tmp_dir, f"part-{parts:05d}.parquet"), index=False, compression='zstd')
+                parts += 1
+                rows += len(chunk)
+            # The refresh time is part of the state, so a refreshed cache never looks unchanged
+            state = {'column': None, 'value': None, 'parts': parts, 'refreshed': pd.Timestamp.now('UTC').isoformat()}
+            self.write_watermark(state, os.path.join(tmp_dir, WATERMARK_FILE))
+
+        print(f"Refreshed '{self.cache_dir}' with all {rows} rows of {table_name} (no watermark column).")
+        return rows
+
+    def sync_incremental(self, connector, table_name='customer_activity', chunksize=50000):
+        """Fetch only the rows newer than the watermark and append them as new cache partitions."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        state = self.read_watermark()
+        if state['column'] != self.watermark_column:
+            # The cache was filled by full refreshes: start over from the first value of the column
+            state = {'column': self.watermark_column, 'value': None, 'parts': 0}
+            for name in os.listdir(self.cache_dir):
+                if name.startswith('part-') and name.endswith('.parquet'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+        where = None
+        if state['value'] is not None:
+            where = f"{self.watermark_column} > {self.sql_literal(state['value'])}"
+
+        new_rows = 0
+        chunks = connector.fetch_data_in_chunks(table_name, chunksize=chunksize, where=where,
+                                                order_by=self.watermark_column)
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if self.watermark_column not in chunk.columns:
+                raise KeyError(f"Watermark column '{self.watermark_column}' not found in {table_name}.")
+
+            part_path = os.path.join(self.cache_dir, f"part-{state['parts']:05d}.parquet")
+            chunk.to_parquet(part_path, index=False, compression='zstd')
+
+            # Rows arrive ordered by the watermark column, so the watermark only moves
+            # forward once the partition holding those rows is safely on disk
+            max_value = chunk[self.watermark_column].max()
+            state['value'] = max_value.item() if hasattr(max_value, 'item') else str(max_value)
+            state['parts'] += 1
+            self.write_watermark(state)
+            new_rows += len(chunk)
+
+        print(f"Synced {new_rows} new rows into '{self.cache_dir}' (watermark: {state['value']}).")
+        return new_rows
+
+    def load(self, columns=None):
+        """Load the cached table (or only the requested columns) as a DataFrame."""
+        if not os.path.isdir(self.cache_dir) or self.read_watermark()['parts'] == 0:
+            raise FileNotFoundError(f"The cache {self.cache_dir} is empty, run 'sync()' first.")
+        return pd.read_parquet(self.cache_dir, columns=columns)
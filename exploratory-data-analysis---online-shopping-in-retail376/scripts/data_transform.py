@@ -1,44 +1,66 @@
+import argparse
+import numpy as np
 import pandas as pd
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from storage import PROJECT_DIR, save_dataframe, load_dataframe, iter_chunks, save_chunks
+from instrumentation import instrument_class
+from schema import convert_month
 
+DURATION_COLUMNS = ['administrative_duration', 'informational_duration', 'product_related_duration']
+CATEGORICAL_COLUMNS = ['operating_systems', 'browser', 'region', 'traffic_type', 'visitor_type']
+
+@instrument_class
 class DataTransform:
-    
-    def __init__(self, df):
+
+    def __init__(self, df, categories=None):
         self.df = df
-    
+        # {column: categories} shared by every batch (see BatchTransform); None: the values of this DataFrame
+        self.categories = categories or {}
+
     def convert_month(self):
         """Ensure all values are in a valid format before converting."""
-        valid_months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        self.df['month'] = self.df['month'].apply(lambda x: x if x in valid_months else 'Jan')
-        
-        try:
-            self.df['month'] = pd.to_datetime(self.df['month'], format='%b')
-        except Exception as e:
-            print(f"Error converting 'month' column: {e}")
+        if 'month' not in self.df.columns or pd.api.types.is_datetime64_dtype(self.df['month']):
+            return
+        # Invalid and missing months become 'Jan'; mapped through the distinct values, not row by row
+        self.df['month'], _ = convert_month(self.df['month'])
 
     def convert_duration_columns(self):
         """Convert duration columns (in seconds) to timedelta format."""
-        duration_columns = [
-            'administrative_duration',
-            'informational_duration',
-            'product_related_duration'
-        ]
-        for col in duration_columns:
+        # Columns dropped by an earlier cleaning step are skipped
+        for col in DURATION_COLUMNS:
+            if col not in self.df.columns:
+                continue
             self.df[col] = pd.to_timedelta(self.df[col], unit='s')
-    
+
     def convert_categorical_columns(self):
-        """Convert categorical columns to 'category' type."""
-        categorical_columns = [
-            'operating_systems', 'browser', 'region', 'traffic_type', 'visitor_type'
-        ]
-        for col in categorical_columns:
-            self.df[col] = self.df[col].astype('category', errors='ignore')
-    
+        """Convert categorical columns to 'category' type, with the shared categories when there are some."""
+        for col in CATEGORICAL_COLUMNS:
+            if col not in self.df.columns:
+                continue
+            if col not in self.categories:
+                self.df[col] = self.df[col].astype('category', errors='ignore')
+                continue
+            dtype = self.categories[col]
+            if not isinstance(dtype, pd.CategoricalDtype):
+                dtype = pd.CategoricalDtype(dtype)
+            # Only the distinct values of the chunk are looked up in the shared categories
+            series = self.df[col]
+            chunk_codes, uniques = pd.factorize(series)
+            recode = np.append(dtype.categories.get_indexer(uniques), -1)  # Missing values (-1) stay missing
+            codes = recode[chunk_codes]
+            unknown = int(((codes < 0) & (chunk_codes >= 0)).sum())
+            if unknown:
+                print(f"\n{unknown} values of '{col}' are not in its categories and are set as missing.")
+            self.df[col] = pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+
     def convert_booleans(self):
         """Ensure 'weekend' and 'revenue' columns are of 'bool' type."""
-        self.df['weekend'] = self.df['weekend'].astype('bool', errors='ignore')
-        self.df['revenue'] = self.df['revenue'].astype('bool', errors='ignore')
-    
+        for col in ['weekend', 'revenue']:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('bool', errors='ignore')
+
     def apply_transforms(self):
         """Apply all type transformations."""
         self.convert_month()
@@ -47,19 +69,97 @@ class DataTransform:
         self.convert_booleans()
         return self.df
 
+def numeric_view(df):
+    """Return 'df' with its timedelta columns as float seconds, for the numerical statistics.
+
+    The other columns are shared with 'df', not copied.
+    """
+    durations = df.select_dtypes(include=['timedelta']).columns
+    return df.assign(**{col: df[col].dt.total_seconds() for col in durations})
+
+class BatchTransform:
+    """Apply DataTransform to chunks with the same categories for every chunk.
+
+    Converted separately, each chunk would get the categories it happens to contain,
+    so the codes of a value would differ between chunks and concatenating them would
+    fall back to object columns. Here the categories of every column are collected
+    first ('partial_fit' on each chunk, or given), and sorted like 'astype("category")'
+    sorts them: chunks share one CategoricalDtype, concatenate by copying their codes,
+    and the result is the same as one DataTransform over all the rows.
+    """
+
+    def __init__(self, categories=None):
+        self.values = {col: set(values) for col, values in (categories or {}).items()}
+        self.categories = None
+
+    def partial_fit(self, chunk):
+        """Add the values of the categorical columns of a chunk to the categories."""
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                self.values.setdefault(col, set()).update(chunk[col].dropna().unique())
+        self.categories = None
+        return self
+
+    def fit(self, chunks):
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def get_categories(self):
+        if self.categories is None:
+            self.categories = {col: pd.CategoricalDtype(sorted(values)) for col, values in self.values.items()}
+        return self.categories
+
+    def transform(self, chunk):
+        """Converted copy of a chunk."""
+        return DataTransform(chunk.copy(), self.get_categories()).apply_transforms()
+
+    def transform_chunks(self, chunks, max_workers=None):
+        """Yield the converted chunks in order, converting up to 'max_workers' chunks at a time in threads."""
+        max_workers = max_workers or os.cpu_count()
+        self.get_categories()  # Built once, before the threads share it
+        pending = deque()
+        with ThreadPoolExecutor(max_workers) as executor:
+            for chunk in chunks:
+                pending.append(executor.submit(self.transform, chunk))
+                # At most two chunks per thread are held in memory
+                while len(pending) > 2 * max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+def transform_file(input_file_path, output_file_path, chunksize=100000, max_workers=None):
+    """Convert a file chunk by chunk: one pass over the categorical columns, then one over all columns."""
+    transformer = BatchTransform()
+    for chunk in iter_chunks(input_file_path, chunksize):
+        transformer.partial_fit(chunk[[col for col in CATEGORICAL_COLUMNS if col in chunk.columns]])
+    chunks = transformer.transform_chunks(iter_chunks(input_file_path, chunksize), max_workers)
+    return save_chunks(chunks, output_file_path)
+
 def main():
     """Main function to load, transform, and save the dataset."""
-    input_file_path = "/content/transformed_data.csv"  # Cambia esta ruta si es necesario
-    output_file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\transformed_data.csv"
+    parser = argparse.ArgumentParser(description="Convert the data without null values to the analysis types.")
+    parser.add_argument('--input', default=os.path.join(PROJECT_DIR, 'data_without_null_values.parquet'))
+    parser.add_argument('--output', default=os.path.join(PROJECT_DIR, 'transformed_data.parquet'))
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Convert the file this many rows at a time instead of loading it whole.")
+    parser.add_argument('--workers', type=int, default=None, help="Threads converting chunks (default: all CPUs).")
+    args = parser.parse_args()
+
+    if args.chunksize:
+        rows = transform_file(args.input, args.output, args.chunksize, args.workers)
+        print(f"{rows} rows converted in chunks of {args.chunksize}")
+        print(f"File saved in: {args.output}")
+        return
 
-    df = pd.read_csv(input_file_path)
+    df = load_dataframe(args.input)
     print(df)
 
     data_transformer = DataTransform(df)
     df_transformed = data_transformer.apply_transforms()
 
-    df_transformed.to_csv(output_file_path, index=False)
-    print(f"File CSV saved in: {output_file_path}")
+    save_dataframe(df_transformed, args.output)
+    print(f"File saved in: {args.output}")
 
 if __name__ == "__main__":
     main()
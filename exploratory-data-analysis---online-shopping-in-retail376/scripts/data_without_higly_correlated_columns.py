@@ -1,16 +1,26 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+from storage import PROJECT_DIR, save_dataframe, load_dataframe
+from instrumentation import instrument_class
+from streaming_stats import CorrelationAccumulator
+from stats_cache import ColumnStatsCache
+from batch_plots import render_batch
+import os
 from scipy import stats
 
-# Plotter class to visualize the data
+# Names of the transformations in the messages printed by transform_skewed_columns
+TRANSFORMATION_NAMES = {'log1p': 'Log', 'sqrt': 'Square root', 'boxcox': 'Box-Cox'}
+
+# Plotter class to visualize the data (matplotlib and seaborn are only imported when a plot is drawn)
 class Plotter:
     def __init__(self, df):
         self.df = df
 
     def plot_histogram(self, column):
         """Plot a histogram to visualize the distribution of a column."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         plt.figure(figsize=(8, 6))
         sns.histplot(self.df[column], kde=True, color='skyblue')
         plt.title(f"Distribution of {column}")
@@ -18,6 +28,9 @@ class Plotter:
 
     def plot_correlation_matrix(self):
         """Plot the correlation matrix as a heatmap."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         plt.figure(figsize=(12, 8))
         
         # Filter out non-numeric columns for correlation calculation
@@ -32,28 +45,40 @@ class Plotter:
         plt.show()
 
 # DataFrameTransform class for EDA transformations
+@instrument_class
 class DataFrameTransform:
-    def __init__(self, df):
+    def __init__(self, df, stats_cache=None, engine=None):
         self.df = df
         self.plotter = Plotter(df)
+        self.engine = engine  # Optional ColumnEngine running the per-column work in a process pool
+        self.stats_cache = stats_cache if stats_cache is not None else ColumnStatsCache(engine)
 
     # Step 1: Identify skewed columns
     def identify_skewed_columns(self, threshold=0.5):
         """Identify columns with skewness greater than the specified threshold."""
-        skewness = self.df.select_dtypes(include=['float64', 'int64']).skew()
+        numeric_columns = self.stats_cache.numeric_columns(self.df)
+        skewness = self.stats_cache.skew(self.df, numeric_columns)
         skewed_columns = skewness[abs(skewness) > threshold].index
         return skewed_columns
 
     # Step 2: Transform skewed columns
     def transform_skewed_columns(self, skewed_columns):
         """Apply transformations to reduce skewness in skewed columns."""
+        if self.engine is not None:
+            transformed, methods = self.engine.transform_skewed(self.df, skewed_columns)
+            self.df = self.df.assign(**transformed)
+            for column, (method, _) in methods.items():
+                print(f"\n{TRANSFORMATION_NAMES[method]} transformation applied to {column}.")
+            return
+
+        minimums = self.stats_cache.min(self.df, skewed_columns)
         for column in skewed_columns:
             # Apply log transformation if the column is positively skewed
-            if self.df[column].min() > 0:
+            if minimums[column] > 0:
                 self.df[column] = np.log1p(self.df[column])
                 print(f"\nLog transformation applied to {column}.")
             # Apply square root transformation if the column is positively skewed
-            elif self.df[column].min() >= 0:
+            elif minimums[column] >= 0:
                 self.df[column] = np.sqrt(self.df[column])
                 print(f"\nSquare root transformation applied to {column}.")
             # Use Box-Cox transformation if needed
@@ -62,51 +87,66 @@ class DataFrameTransform:
                 print(f"\nBox-Cox transformation applied to {column}.")
 
     # Step 3: Apply transformations and check the results
-    def apply_transforms_and_check(self):
+    def apply_transforms_and_check(self, output_dir=None):
+        """Transform the skewed columns, rendering the histograms to 'output_dir' if given."""
         skewed_columns = self.identify_skewed_columns()
-        for column in skewed_columns:
-            self.plotter.plot_histogram(column)  # Visualize the original distribution of the skewed columns
+        histograms = [('histogram', column) for column in skewed_columns]
+        if output_dir is not None:
+            render_batch(self.df, histograms, os.path.join(output_dir, 'before'))
+        else:
+            for column in skewed_columns:
+                self.plotter.plot_histogram(column)  # Visualize the original distribution of the skewed columns
         
         # Transform skewed columns
         self.transform_skewed_columns(skewed_columns)
         
         # Visualize the transformed columns
-        for column in skewed_columns:
-            self.plotter.plot_histogram(column)
+        if output_dir is not None:
+            render_batch(self.df, histograms, os.path.join(output_dir, 'after'))
+        else:
+            for column in skewed_columns:
+                self.plotter.plot_histogram(column)
         
         return skewed_columns
 
     # Step 4: Identify and remove outliers
     def identify_and_remove_outliers(self, z_threshold=3):
         """Identify and remove outliers based on Z-score."""
-        numeric_df = self.df.select_dtypes(include=['float64', 'int64'])
-        z_scores = np.abs(stats.zscore(numeric_df))
+        numeric_columns = self.stats_cache.numeric_columns(self.df)
+        z_scores = self.stats_cache.zscores(self.df, numeric_columns)
         outliers = (z_scores > z_threshold).all(axis=1)
         print(f"\n{sum(outliers)} outliers identified.")
         
-        # Remove the rows containing outliers
-        self.df = self.df[~outliers]
+        # Remove the rows containing outliers (keeping the same frame, and its cached stats, if there are none)
+        if outliers.any():
+            self.df = self.df[~outliers]
         print(f"\nOutliers removed. Remaining data shape: {self.df.shape}")
 
     # Step 5: Identify and remove highly correlated columns
-    def identify_highly_correlated_columns(self, threshold=0.9):
-        """Identify columns with a correlation higher than the threshold."""
-        numeric_df = self.df.select_dtypes(include=['float64', 'int64'])
-        correlation_matrix = numeric_df.corr()
-        
-        highly_correlated = set()
-        
-        for i in range(len(correlation_matrix.columns)):
-            for j in range(i):
-                if abs(correlation_matrix.iloc[i, j]) > threshold:
-                    column_name = correlation_matrix.columns[i]
-                    highly_correlated.add(column_name)
-                    
-        return list(highly_correlated)
-
-    def remove_highly_correlated_columns(self, threshold=0.9):
+    def identify_highly_correlated_columns(self, threshold=0.9, chunks=None):
+        """Identify columns with a correlation higher than the threshold.
+
+        If 'chunks' (an iterable of DataFrames) is given, the correlation matrix is
+        accumulated chunk by chunk instead of being computed on self.df.
+        """
+        if chunks is not None:
+            accumulator = CorrelationAccumulator()
+            for chunk in chunks:
+                accumulator.update(chunk)
+            correlation_matrix = accumulator.correlation()
+        else:
+            numeric_columns = self.stats_cache.numeric_columns(self.df)
+            correlation_matrix = self.stats_cache.corr(self.df, list(numeric_columns))
+
+        # A column is flagged when it is highly correlated with any column before it
+        upper_triangle = np.triu(np.abs(correlation_matrix.to_numpy()), k=1)
+        highly_correlated = (upper_triangle > threshold).any(axis=0)
+
+        return list(correlation_matrix.columns[highly_correlated])
+
+    def remove_highly_correlated_columns(self, threshold=0.9, chunks=None):
         """Remove the highly correlated columns."""
-        highly_correlated_columns = self.identify_highly_correlated_columns(threshold)
+        highly_correlated_columns = self.identify_highly_correlated_columns(threshold, chunks)
         
         if highly_correlated_columns:
             self.df = self.df.drop(columns=highly_correlated_columns)
@@ -114,28 +154,33 @@ class DataFrameTransform:
         else:
             print("\nNo highly correlated columns were found above the threshold.")
 
-    # Save the transformed data to a CSV file
+    # Save the transformed data to a file
     def save_transformed_data(self, output_file):
-        """Save the transformed data to a new CSV file."""
-        self.df.to_csv(output_file, index=False)
+        """Save the transformed data to a new file (Parquet, Feather or CSV by extension)."""
+        save_dataframe(self.df, output_file)
         print(f"\nTransformed data saved to {output_file}")
 
-# Load the data (from the previous cleaned file)
-file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_null_values.csv"
-df = pd.read_csv(file_path)
+def main():
+    """Remove the outliers and highly correlated columns of the data without skewness and save the result."""
+    # Load the data (from the previous data without skewness)
+    file_path = os.path.join(PROJECT_DIR, 'data_without_skewness.parquet')
+    df = load_dataframe(file_path)
+
+    # Create an instance of the DataFrameTransform class
+    data_transformer = DataFrameTransform(df)
 
-# Create an instance of the DataFrameTransform class
-data_transformer = DataFrameTransform(df)
+    # Step 1: Visualize the correlation matrix
+    data_transformer.plotter.plot_correlation_matrix()
 
-# Step 1: Visualize the correlation matrix
-data_transformer.plotter.plot_correlation_matrix()
+    # Step 2 and 3: Identify and remove outliers
+    data_transformer.identify_and_remove_outliers(z_threshold=3)
 
-# Step 2 and 3: Identify and remove outliers
-data_transformer.identify_and_remove_outliers(z_threshold=3)
+    # Step 4: Identify and remove highly correlated columns
+    data_transformer.remove_highly_correlated_columns(threshold=0.9)
 
-# Step 4: Identify and remove highly correlated columns
-data_transformer.remove_highly_correlated_columns(threshold=0.9)
+    # Step 5: Save the transformed data after removing outliers and highly correlated columns
+    output_file = os.path.join(PROJECT_DIR, 'data_cleaned.parquet')
+    data_transformer.save_transformed_data(output_file)
 
-# Step 5: Save the transformed data after removing outliers and highly correlated columns
-output_file = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_cleaned.csv"
-data_transformer.save_transformed_data(output_file)
+if __name__ == "__main__":
+    main()
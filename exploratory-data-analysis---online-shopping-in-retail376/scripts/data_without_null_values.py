@@ -1,23 +1,44 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-
-# Plotter class to visualize insights
+from storage import PROJECT_DIR, save_dataframe
+from instrumentation import instrument_class
+from data_cache import CustomerActivityCache
+from streaming_stats import ColumnProfile, NullPatternProfile
+from stats_cache import ColumnStatsCache
+from knn_imputer import KNNImputer
+from batch_plots import render_batch
+import os
+
+# Plotter class to visualize insights (matplotlib and seaborn are only imported when a plot is drawn)
 class Plotter:
     def __init__(self, df):
         self.df = df
 
-    def plot_missing_values(self):
-        """Visualize the missing values in the dataset using a heatmap."""
+    def plot_missing_values(self, profile=None):
+        """Visualize the missing values in the dataset using a heatmap.
+
+        Each heatmap row is a bin of consecutive rows coloured by its share of missing
+        values, so the plot has at most 'profile.max_bins' rows however large the data is.
+        """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        if profile is None:
+            profile = NullPatternProfile().update_frame(self.df)
         plt.figure(figsize=(12, 8))
-        sns.heatmap(self.df.isnull(), cbar=False, cmap='viridis', yticklabels=False)
+        sns.heatmap(profile.null_density(), cbar=profile.rows_per_bin > 1, cmap='viridis',
+                    vmin=0, vmax=1, yticklabels=False)
         plt.title("Missing Values Heatmap")
         plt.show()
 
-    def plot_missing_summary(self):
+    def plot_missing_summary(self, profile=None):
         """Generate a bar plot summarizing the missing values percentage for each column."""
-        missing_percentage = self.df.isnull().mean() * 100
+        import matplotlib.pyplot as plt
+
+        if profile is not None:
+            missing_percentage = profile.missing_percentage()
+        else:
+            missing_percentage = self.df.isnull().mean() * 100
         missing_data = missing_percentage[missing_percentage > 0]
         
         plt.figure(figsize=(12, 6))
@@ -28,36 +49,65 @@ class Plotter:
         plt.show()
 
 # DataFrameTransform class for EDA transformations
+@instrument_class
 class DataFrameTransform:
-    def __init__(self, df):
+    def __init__(self, df, stats_cache=None):
         self.df = df
         self.plotter = Plotter(df)  # Instantiating the Plotter class for visualization
+        # Column statistics reused across steps (and across classes when a cache is passed in)
+        self.stats_cache = stats_cache if stats_cache is not None else ColumnStatsCache()
 
     # Step 1: Drop columns with more than 30% missing data
-    def drop_columns_with_missing_data(self, threshold=30):
-        """Drop columns with more than 'threshold' percentage of missing data."""
-        missing_percentage = self.df.isnull().mean() * 100
-        columns_to_drop = missing_percentage[missing_percentage > threshold].index
+    def drop_columns_with_missing_data(self, threshold=30, profile=None):
+        """Drop columns with more than 'threshold' percentage of missing data.
+
+        If a ColumnProfile is given, the percentages come from it instead of self.df.
+        """
+        if profile is not None:
+            missing_percentage = profile.missing_percentage()
+        else:
+            missing_percentage = self.df.isnull().mean() * 100
+        columns_to_drop = missing_percentage[missing_percentage > threshold].index.intersection(self.df.columns)
         self.df = self.df.drop(columns=columns_to_drop)  # Make sure to assign back
         print(f"\nDropped columns with more than {threshold}% missing data: {list(columns_to_drop)}")
 
     # Step 2: Impute missing data
-    def impute_missing_data(self, strategy='median'):
-        """Impute missing data using the specified strategy ('mean', 'median', 'category')."""
+    def impute_missing_data(self, strategy='median', profile=None, n_neighbors=5):
+        """Impute missing data using the specified strategy ('mean', 'median', 'knn', 'category').
+
+        If a ColumnProfile is given, the means and (approximate) medians come from it,
+        so a chunk can be imputed with statistics of the whole table. 'knn' fills each
+        gap with the mean of the 'n_neighbors' most similar rows (see KNNImputer).
+        """
         if strategy == 'mean':
             numerical_cols = self.df.select_dtypes(include=['float64', 'int64']).columns
-            self.df.loc[:, numerical_cols] = self.df[numerical_cols].fillna(self.df[numerical_cols].mean())
+            if profile is not None:
+                fill_values = profile.mean().reindex(numerical_cols)
+            else:
+                fill_values = self.stats_cache.mean(self.df, numerical_cols)
+            self.df.loc[:, numerical_cols] = self.df[numerical_cols].fillna(fill_values)
+            self.stats_cache.invalidate(numerical_cols)  # The columns were written in place
             print("\nMissing values imputed with the mean for numerical columns.")
         elif strategy == 'median':
             numerical_cols = self.df.select_dtypes(include=['float64', 'int64']).columns
-            self.df.loc[:, numerical_cols] = self.df[numerical_cols].fillna(self.df[numerical_cols].median())
+            if profile is not None:
+                fill_values = profile.median().reindex(numerical_cols)
+            else:
+                fill_values = self.stats_cache.median(self.df, numerical_cols)
+            self.df.loc[:, numerical_cols] = self.df[numerical_cols].fillna(fill_values)
+            self.stats_cache.invalidate(numerical_cols)  # The columns were written in place
             print("\nMissing values imputed with the median for numerical columns.")
+        elif strategy == 'knn':
+            numerical_cols = self.df.select_dtypes(include=['float64', 'int64']).columns
+            self.df = KNNImputer(n_neighbors=n_neighbors).fit_transform(self.df, numerical_cols)
+            self.stats_cache.invalidate(numerical_cols)
+            print(f"\nMissing values imputed with the {n_neighbors} nearest neighbours for numerical columns.")
         elif strategy == 'category':
-            categorical_columns = self.df.select_dtypes(include=['object']).columns
+            categorical_columns = self.df.select_dtypes(include=['object', 'string']).columns
             self.df.loc[:, categorical_columns] = self.df[categorical_columns].fillna("Unknown")
             print("\nMissing values in categorical columns imputed with 'Unknown'.")
         else:
-            print("Invalid strategy. Use 'mean', 'median', or 'category'.")
+            print("Invalid strategy. Use 'mean', 'median', 'knn' or 'category'.")
 
     # Step 3: Remove rows with null values in the 'operating_systems' column
     def remove_missing_operating_systems(self):
@@ -67,142 +117,99 @@ class DataFrameTransform:
         print(f"\nRemoved rows with null values in 'operating_systems'. Now there are {rows_after} rows.")
 
     # Step 4: Check missing data after imputation
-    def check_missing_data(self):
-        """Check for missing data after imputation."""
-        missing_data = self.df.isnull().sum()
-        missing_percentage = (missing_data / len(self.df)) * 100
-        missing_summary = pd.DataFrame({
-            'Count': missing_data,
-            'Percentage': missing_percentage
-        })
+    def check_missing_data(self, profile=None):
+        """Check for missing data after imputation, or as recorded in a ColumnProfile."""
+        if profile is not None:
+            missing_summary = profile.missing_summary()
+        else:
+            missing_data = self.df.isnull().sum()
+            missing_percentage = (missing_data / len(self.df)) * 100
+            missing_summary = pd.DataFrame({
+                'Count': missing_data,
+                'Percentage': missing_percentage
+            })
         print("\nMissing Data (Count and Percentage):")
         print(missing_summary)
 
     # Step 5: Visualize missing data
-    def visualize_missing_data(self):
-        """Call Plotter functions to visualize missing data."""
-        self.plotter.plot_missing_values()  # Show the heatmap of missing values
-        self.plotter.plot_missing_summary()  # Show the bar plot of missing data summary
-
-    # Step 6: Save the cleaned data to a new CSV file
+    def visualize_missing_data(self, output_dir=None):
+        """Call Plotter functions to visualize missing data, or save them to 'output_dir'."""
+        if output_dir is not None:
+            return render_batch(self.df, [('missing_values', None), ('missing_summary', None)], output_dir)
+        # Both plots are drawn from the same single scan of the null mask
+        profile = NullPatternProfile().update_frame(self.df)
+        self.plotter.plot_missing_values(profile)  # Show the heatmap of missing values
+        self.plotter.plot_missing_summary(profile)  # Show the bar plot of missing data summary
+
+    # Step 6: Save the cleaned data to a new file
     def save_cleaned_data(self, output_file):
-        """Save the cleaned data to a new CSV file."""
-        self.df.to_csv(output_file, index=False)
+        """Save the cleaned data to a new file (Parquet, Feather or CSV by extension)."""
+        save_dataframe(self.df, output_file)
         print(f"\nCleaned data saved to {output_file}")
 
-# Load the data
-file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\customer_activity_data.csv"
-df = pd.read_csv(file_path)  # Make sure to have the file in the correct path
-
-# Create an instance of the DataFrameTransform class
-data_transformer = DataFrameTransform(df)
-
-# Step 1: Remove rows with missing values in 'operating_systems'
-data_transformer.remove_missing_operating_systems()
-
-# Step 2: Drop columns with more than 30% missing data
-data_transformer.drop_columns_with_missing_data(threshold=30)
-
-# Step 3: Impute missing values
-data_transformer.impute_missing_data(strategy='median')  # Impute numerical values with the median
-data_transformer.impute_missing_data(strategy='category')  # Impute categorical values with "Unknown"
-
-# Step 4: Check for missing data after imputation
-data_transformer.check_missing_data()
-
-# Step 5: Visualize missing data
-data_transformer.visualize_missing_data()
-
-# Step 6: Save the cleaned data to a new CSV file
-output_file = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_null_values.csv"
-data_transformer.save_cleaned_data(output_file)
-
-
-
+def clean_in_chunks(make_chunks, threshold=30, strategy='median', relative_accuracy=0.01):
+    """Out-of-core version of Steps 1-3, yielding cleaned chunks with bounded memory.
+
+    'make_chunks' must return a fresh iterator of DataFrame chunks each time it is called
+    (e.g. lambda: pd.read_csv(path, chunksize=100000)), as the data is scanned twice:
+    the first pass builds a ColumnProfile (null counts, quantile sketches with the given
+    'relative_accuracy', category frequencies) and the second pass fills the gaps.
+    With strategy='knn' the first pass also keeps a bounded random sample of rows, the
+    neighbours numerical gaps are filled from.
+    """
+    # Pass 1: collect every statistic in a single scan
+    profile = ColumnProfile(relative_accuracy)
+    imputer = KNNImputer() if strategy == 'knn' else None
+    for chunk in make_chunks():
+        chunk = chunk.dropna(subset=['operating_systems'])
+        profile.update(chunk)
+        if imputer is not None:
+            imputer.partial_fit(chunk)
+
+    missing_percentage = profile.missing_percentage()
+    columns_to_drop = missing_percentage[missing_percentage > threshold].index
+    numeric_fill = profile.mean() if strategy == 'mean' else profile.median()
+    text_fill = pd.Series("Unknown", index=list(profile.category_counts), dtype='object')
+    fill_values = pd.concat([numeric_fill, text_fill]).drop(columns_to_drop, errors='ignore').dropna()
+
+    print(f"\nDropping columns with more than {threshold}% missing data: {list(columns_to_drop)}")
+    print(f"Imputing numerical columns with the {strategy} and categorical columns with 'Unknown'.")
+
+    # Pass 2: apply the same cleaning to every chunk
+    for chunk in make_chunks():
+        chunk = chunk.dropna(subset=['operating_systems']).drop(columns=columns_to_drop, errors='ignore')
+        if imputer is not None:
+            chunk = imputer.transform(chunk)
+        yield chunk.fillna(fill_values.reindex(chunk.columns).dropna().to_dict())
+
+def main():
+    """Clean the missing values of the cached 'customer_activity' data and save the result."""
+    # Load the data from the local cache of 'customer_activity' (see db_utils.py)
+    cache_dir = os.path.join(PROJECT_DIR, 'customer_activity_cache')
+    df = CustomerActivityCache(cache_dir).load()
+
+    # Create an instance of the DataFrameTransform class
+    data_transformer = DataFrameTransform(df)
+
+    # Step 1: Remove rows with missing values in 'operating_systems'
+    data_transformer.remove_missing_operating_systems()
+
+    # Step 2: Drop columns with more than 30% missing data
+    data_transformer.drop_columns_with_missing_data(threshold=30)
+
+    # Step 3: Impute missing values
+    data_transformer.impute_missing_data(strategy='median')  # Impute numerical values with the median
+    data_transformer.impute_missing_data(strategy='category')  # Impute categorical values with "Unknown"
+
+    # Step 4: Check for missing data after imputation
+    data_transformer.check_missing_data()
 
+    # Step 5: Visualize missing data
+    data_transformer.visualize_missing_data()
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from scipy import stats
-
-# Plotter class to visualize the distributions
-class Plotter:
-    def __init__(self, df):
-        self.df = df
-
-    def plot_histogram(self, column):
-        """Plot a histogram to visualize the distribution of a column."""
-        plt.figure(figsize=(8, 6))
-        sns.histplot(self.df[column], kde=True, color='skyblue')
-        plt.title(f"Distribution of {column}")
-        plt.show()
-
-    def plot_skewed_columns(self, skewed_columns):
-        """Visualize the distributions of skewed columns."""
-        for column in skewed_columns:
-            self.plot_histogram(column)
-
-# DataFrameTransform class for transformations in EDA
-class DataFrameTransform:
-    def __init__(self, df):
-        self.df = df
-        self.plotter = Plotter(df)
-
-    # Step 1: Identify skewed columns
-    def identify_skewed_columns(self, threshold=0.5):
-        """Identify columns with skewness greater than the specified threshold."""
-        skewness = self.df.select_dtypes(include=['float64', 'int64']).skew()
-        skewed_columns = skewness[abs(skewness) > threshold].index
-        return skewed_columns
-
-    # Step 2: Transform skewed columns
-    def transform_skewed_columns(self, skewed_columns):
-        """Apply transformations to reduce skewness in skewed columns."""
-        for column in skewed_columns:
-            # Apply logarithmic transformation if the column is positively skewed
-            if self.df[column].min() > 0:  # Log transformation requires positive values
-                self.df[column] = np.log1p(self.df[column])
-                print(f"\nLog transformation applied to {column}.")
-            # Apply square root transformation if the column is positively skewed
-            elif self.df[column].min() >= 0:
-                self.df[column] = np.sqrt(self.df[column])
-                print(f"\nSquare root transformation applied to {column}.")
-            # Use Box-Cox if necessary
-            else:
-                self.df[column], _ = stats.boxcox(self.df[column] + 1)  # Box-Cox transformation
-                print(f"\nBox-Cox transformation applied to {column}.")
-
-    # Step 3: Apply transformations and check results
-    def apply_transforms_and_check(self):
-        skewed_columns = self.identify_skewed_columns()
-        self.plotter.plot_skewed_columns(skewed_columns)  # Visualize original skewed columns
-        
-        # Transform skewed columns
-        self.transform_skewed_columns(skewed_columns)
-        
-        # Visualize transformed columns
-        self.plotter.plot_skewed_columns(skewed_columns)
-        
-        return skewed_columns
-
-    # Step 4: Save the transformed data to a new CSV file
-    def save_transformed_data(self, output_file):
-        """Save the transformed data to a new CSV file."""
-        self.df.to_csv(output_file, index=False)
-        print(f"\nThe transformed data has been saved to {output_file}")
-
-# Load the data (the data_without_null_values.csv file generated previously)
-file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_null_values.csv"
-df = pd.read_csv(file_path)
-
-# Create an instance of the DataFrameTransform class
-data_transformer = DataFrameTransform(df)
-
-# Step 1, 2, and 3: Identify and transform skewed columns
-skewed_columns = data_transformer.apply_transforms_and_check()
+    # Step 6: Save the cleaned data to a new file
+    output_file = os.path.join(PROJECT_DIR, 'data_without_null_values.parquet')
+    data_transformer.save_cleaned_data(output_file)
 
-# Step 4: Save the transformed data in the data_without_null_values.csv file
-output_file = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_null_values.csv"
-data_transformer.save_transformed_data(output_file)
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+from storage import PROJECT_DIR, save_dataframe, load_dataframe
+from instrumentation import instrument_class
+from stats_cache import ColumnStatsCache
+from batch_plots import render_batch
+import os
 
-# Plotter class to visualize distributions and outliers
+# Plotter class to visualize distributions and outliers (matplotlib and seaborn are only imported when a plot is drawn)
 class Plotter:
     def __init__(self, df):
         self.df = df
 
     def plot_boxplot(self, column):
         """Plot a boxplot to visualize outliers in a column."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         plt.figure(figsize=(8, 6))
         sns.boxplot(x=self.df[column], color='skyblue')
         plt.title(f"Boxplot of {column}")
@@ -17,6 +23,9 @@ class Plotter:
 
     def plot_histogram(self, column):
         """Plot a histogram to visualize the distribution of a column."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         plt.figure(figsize=(8, 6))
         sns.histplot(self.df[column], kde=True, color='skyblue')
         plt.title(f"Distribution of {column}")
@@ -28,59 +37,108 @@ class Plotter:
             self.plot_boxplot(column)
 
 # DataFrameTransform class for EDA transformations, including outlier removal
+@instrument_class
 class DataFrameTransform:
-    def __init__(self, df):
+    def __init__(self, df, stats_cache=None):
         self.df = df
         self.plotter = Plotter(df)
+        self.stats_cache = stats_cache if stats_cache is not None else ColumnStatsCache()
 
     # Step 1: Visualize the data to identify outliers
-    def visualize_data_for_outliers(self):
-        """Visualize columns to identify potential outliers using boxplots."""
-        for column in self.df.select_dtypes(include=['float64', 'int64']).columns:
+    def visualize_data_for_outliers(self, output_dir=None):
+        """Visualize columns to identify potential outliers using boxplots.
+
+        If 'output_dir' is given, all boxplots are rendered to files in parallel instead of shown.
+        """
+        numeric_columns = self.df.select_dtypes(include=['float64', 'int64']).columns
+        if output_dir is not None:
+            return render_batch(self.df, [('boxplot', column) for column in numeric_columns], output_dir)
+        for column in numeric_columns:
             self.plotter.plot_boxplot(column)
 
     # Step 2: Remove outliers using the IQR method
-    def remove_outliers(self):
-        """Remove outliers based on the IQR method."""
-        for column in self.df.select_dtypes(include=['float64', 'int64']).columns:
-            Q1 = self.df[column].quantile(0.25)
-            Q3 = self.df[column].quantile(0.75)
+    def remove_outliers(self, bounds='sequential'):
+        """Remove outliers based on the IQR method and return the number of rows dropped per column.
+
+        With bounds='sequential' each column's quartiles are computed on the rows left by the
+        previous columns. With bounds='original' all quartiles are computed on the original data
+        in one vectorized call and a single combined mask is applied once.
+        """
+        numeric_columns = self.stats_cache.numeric_columns(self.df)
+
+        if bounds == 'original':
+            values = self.df[numeric_columns].to_numpy(dtype='float64')
+            Q1 = self.stats_cache.quantile(self.df, numeric_columns, 0.25).to_numpy()
+            Q3 = self.stats_cache.quantile(self.df, numeric_columns, 0.75).to_numpy()
             IQR = Q3 - Q1
             lower_bound = Q1 - 1.5 * IQR
             upper_bound = Q3 + 1.5 * IQR
-            
-            # Remove the outliers from the column
-            self.df = self.df[(self.df[column] >= lower_bound) & (self.df[column] <= upper_bound)]
-            print(f"Outliers removed from {column}.")
-    
+
+            # One boolean column per numeric column; NaN compares as False, like the sequential filter
+            inside = (values >= lower_bound) & (values <= upper_bound)
+            drop_counts = pd.Series((~inside).sum(axis=0), index=numeric_columns)
+            keep = inside.all(axis=1)
+            if not keep.all():
+                self.df = self.df[keep]
+        elif bounds == 'sequential':
+            drop_counts = pd.Series(0, index=numeric_columns)
+            for column in numeric_columns:
+                Q1 = self.stats_cache.quantile(self.df, [column], 0.25)[column]
+                Q3 = self.stats_cache.quantile(self.df, [column], 0.75)[column]
+                IQR = Q3 - Q1
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+
+                # Remove the outliers from the column
+                keep = (self.df[column] >= lower_bound) & (self.df[column] <= upper_bound)
+                drop_counts[column] = len(self.df) - keep.sum()
+                if drop_counts[column] > 0:
+                    self.df = self.df[keep]
+                print(f"Outliers removed from {column}.")
+        else:
+            print("Invalid bounds. Use 'original' or 'sequential'.")
+            return None
+
+        print(f"\nRows flagged as outliers per column:\n{drop_counts}")
+        print(f"\nRemaining data shape: {self.df.shape}")
+        return drop_counts
+
     # Step 3: Visualize the data again after removing outliers
-    def re_visualize_data(self):
+    def re_visualize_data(self, output_dir=None):
         """Re-visualize the data after removing outliers."""
-        for column in self.df.select_dtypes(include=['float64', 'int64']).columns:
+        numeric_columns = self.df.select_dtypes(include=['float64', 'int64']).columns
+        if output_dir is not None:
+            return render_batch(self.df, [('boxplot', column) for column in numeric_columns], output_dir)
+        for column in numeric_columns:
             self.plotter.plot_boxplot(column)
 
     # Save the transformed data after removing outliers
     def save_transformed_data(self, output_file):
-        """Save the transformed data to a new CSV file."""
-        self.df.to_csv(output_file, index=False)
+        """Save the transformed data to a new file (Parquet, Feather or CSV by extension)."""
+        save_dataframe(self.df, output_file)
         print(f"\nThe data after removing outliers has been saved to {output_file}")
 
-# Load the data (from the previous data without null values)
-file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_null_values.csv"
-df = pd.read_csv(file_path)
+def main():
+    """Remove the outliers of the data without skewness and save the result."""
+    # Load the data (from the previous data without skewness)
+    file_path = os.path.join(PROJECT_DIR, 'data_without_skewness.parquet')
+    df = load_dataframe(file_path)
+
+    # Create an instance of the DataFrameTransform class
+    data_transformer = DataFrameTransform(df)
 
-# Create an instance of the DataFrameTransform class
-data_transformer = DataFrameTransform(df)
+    # Step 1: Visualize the data to identify outliers
+    data_transformer.visualize_data_for_outliers()
 
-# Step 1: Visualize the data to identify outliers
-data_transformer.visualize_data_for_outliers()
+    # Step 2: Remove outliers
+    data_transformer.remove_outliers()
 
-# Step 2: Remove outliers
-data_transformer.remove_outliers()
+    # Step 3: Re-visualize the data after removing outliers
+    data_transformer.re_visualize_data()
 
-# Step 3: Re-visualize the data after removing outliers
-data_transformer.re_visualize_data()
+    # Step 4: Save the cleaned data to a new file
+    output_file = os.path.join(PROJECT_DIR, 'data_without_outliers.parquet')
+    data_transformer.save_transformed_data(output_file)
 
-# Step 4: Save the cleaned data to a new file
-output_file = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\data_without_outliers.csv"
-data_transformer.save_transformed_data(output_file)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import pandas as pd
+import numpy as np
+from storage import PROJECT_DIR, save_dataframe, load_dataframe
+from instrumentation import instrument_class
+from stats_cache import ColumnStatsCache
+from batch_plots import render_batch
+import os
+from scipy import stats
+
+# Names of the transformations in the messages printed by transform_skewed_columns
+TRANSFORMATION_NAMES = {'log1p': 'Log', 'sqrt': 'Square root', 'boxcox': 'Box-Cox'}
+
+# Plotter class to visualize the distributions (matplotlib and seaborn are only imported when a plot is drawn)
+class Plotter:
+    def __init__(self, df):
+        self.df = df
+
+    def plot_histogram(self, column):
+        """Plot a histogram to visualize the distribution of a column."""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        plt.figure(figsize=(8, 6))
+        sns.histplot(self.df[column], kde=True, color='skyblue')
+        plt.title(f"Distribution of {column}")
+        plt.show()
+
+    def plot_skewed_columns(self, skewed_columns):
+        """Visualize the distributions of skewed columns."""
+        for column in skewed_columns:
+            self.plot_histogram(column)
+
+# DataFrameTransform class for transformations in EDA
+@instrument_class
+class DataFrameTransform:
+    def __init__(self, df, stats_cache=None, engine=None):
+        self.df = df
+        self.plotter = Plotter(df)
+        self.engine = engine  # Optional ColumnEngine running the per-column work in a process pool
+        self.stats_cache = stats_cache if stats_cache is not None else ColumnStatsCache(engine)
+
+    # Step 1: Identify skewed columns
+    def identify_skewed_columns(self, threshold=0.5):
+        """Identify columns with skewness greater than the specified threshold."""
+        numeric_columns = self.stats_cache.numeric_columns(self.df)
+        skewness = self.stats_cache.skew(self.df, numeric_columns)
+        skewed_columns = skewness[abs(skewness) > threshold].index
+        return skewed_columns
+
+    # Step 2: Transform skewed columns
+    def transform_skewed_columns(self, skewed_columns):
+        """Apply transformations to reduce skewness in skewed columns."""
+        if self.engine is not None:
+            transformed, methods = self.engine.transform_skewed(self.df, skewed_columns)
+            self.df = self.df.assign(**transformed)
+            for column, (method, _) in methods.items():
+                print(f"\n{TRANSFORMATION_NAMES[method]} transformation applied to {column}.")
+            return
+
+        minimums = self.stats_cache.min(self.df, skewed_columns)
+        for column in skewed_columns:
+            # Apply logarithmic transformation if the column is positively skewed
+            if minimums[column] > 0:  # Log transformation requires positive values
+                self.df[column] = np.log1p(self.df[column])
+                print(f"\nLog transformation applied to {column}.")
+            # Apply square root transformation if the column is positively skewed
+            elif minimums[column] >= 0:
+                self.df[column] = np.sqrt(self.df[column])
+                print(f"\nSquare root transformation applied to {column}.")
+            # Use Box-Cox if necessary
+            else:
+                self.df[column], _ = stats.boxcox(self.df[column] + 1)  # Box-Cox transformation
+                print(f"\nBox-Cox transformation applied to {column}.")
+
+    # Step 3: Apply transformations and check results
+    def apply_transforms_and_check(self, output_dir=None):
+        """Transform the skewed columns, plotting them before and after.
+
+        If 'output_dir' is given, the histograms are saved to its 'before' and 'after'
+        subfolders instead of being shown one by one.
+        """
+        skewed_columns = self.identify_skewed_columns()
+        histograms = [('histogram', column) for column in skewed_columns]
+        if output_dir is not None:
+            render_batch(self.df, histograms, os.path.join(output_dir, 'before'))
+        else:
+            self.plotter.plot_skewed_columns(skewed_columns)  # Visualize original skewed columns
+        
+        # Transform skewed columns
+        self.transform_skewed_columns(skewed_columns)
+        
+        # Visualize transformed columns
+        if output_dir is not None:
+            render_batch(self.df, histograms, os.path.join(output_dir, 'after'))
+        else:
+            self.plotter.plot_skewed_columns(skewed_columns)
+        
+        return skewed_columns
+
+    # Step 4: Save the transformed data to a new file
+    def save_transformed_data(self, output_file):
+        """Save the transformed data to a new file (Parquet, Feather or CSV by extension)."""
+        save_dataframe(self.df, output_file)
+        print(f"\nThe transformed data has been saved to {output_file}")
+
+def main():
+    """Reduce the skewness of the data without null values and save the result."""
+    # Load the data (the data_without_null_values.parquet file generated previously)
+    file_path = os.path.join(PROJECT_DIR, 'data_without_null_values.parquet')
+    df = load_dataframe(file_path)
+
+    # Create an instance of the DataFrameTransform class
+    data_transformer = DataFrameTransform(df)
+
+    # Step 1, 2, and 3: Identify and transform skewed columns
+    skewed_columns = data_transformer.apply_transforms_and_check()
+
+    # Step 4: Save the transformed data to a new file, keeping data_without_null_values.parquet unchanged
+    output_file = os.path.join(PROJECT_DIR, 'data_without_skewness.parquet')
+    data_transformer.save_transformed_data(output_file)
+
+if __name__ == "__main__":
+    main()
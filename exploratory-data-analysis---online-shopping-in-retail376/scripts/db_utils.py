@@ -1,7 +1,43 @@
+import argparse
 import yaml  # Import PyYAML package
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, Table, and_, bindparam, create_engine, func, literal, select, sql, text
+from sqlalchemy import types as sqltypes
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 import pandas as pd
+import numpy as np
 import os
+from concurrent.futures import ThreadPoolExecutor
+from data_cache import CustomerActivityCache
+from storage import PROJECT_DIR, save_chunks
+from streaming_stats import CorrelationAccumulator
+from instrumentation import instrument_class
+
+# Column types for the 'customer_activity' table, applied to every streamed chunk
+# so that all chunks share the same dtypes regardless of which rows they contain
+CUSTOMER_ACTIVITY_DTYPES = {
+    'administrative': 'float64',
+    'administrative_duration': 'float64',
+    'informational': 'float64',
+    'informational_duration': 'float64',
+    'product_related': 'float64',
+    'product_related_duration': 'float64',
+    'bounce_rates': 'float64',
+    'exit_rates': 'float64',
+    'page_values': 'float64',
+    'month': 'string',
+    'operating_systems': 'string',
+    'browser': 'string',
+    'region': 'string',
+    'traffic_type': 'string',
+    'visitor_type': 'string',
+    'weekend': 'boolean',
+    'revenue': 'boolean',
+}
+
+# Backends with percentile_cont(...) WITHIN GROUP and corr(); on the others these
+# statistics are computed locally from the projected numeric columns only
+PUSHDOWN_DIALECTS = ('postgresql',)
 
 # Function to load credentials from a YAML file
 def load_credentials(file_path='credentials.yaml'):
@@ -16,6 +52,7 @@ def load_credentials(file_path='credentials.yaml'):
     except yaml.YAMLError as e:
         raise ValueError(f"Error reading the YAML file: {e}")
 
+@instrument_class
 class RDSDatabaseConnector:
     """Class to manage connection to an RDS database using SQLAlchemy."""
     
@@ -32,20 +69,40 @@ class RDSDatabaseConnector:
 
         self.engine = None
 
-    def create_engine(self):
-        """Create and return a SQLAlchemy engine for database connection."""
+    def create_engine(self, pool_size=5, max_overflow=10, connection_string=None):
+        """Create a pooled SQLAlchemy engine for database connection.
+
+        'connection_string' overrides the RDS URL, e.g. 'sqlite:///local.db' to run
+        against a local stand-in database. 'pool_size' and 'max_overflow' only apply to
+        dialects with a sized pool; e.g. an in-memory SQLite database has none.
+        """
         try:
-            connection_string = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
-            self.engine = create_engine(connection_string)
+            if connection_string is None:
+                connection_string = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+            url = make_url(connection_string)
+            pool_options = {}
+            if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+                pool_options = {'pool_size': pool_size, 'max_overflow': max_overflow}
+            self.engine = create_engine(url, **pool_options)
         except Exception as e:
             raise ConnectionError(f"Error connecting to the database: {e}")
 
-    def fetch_data(self, table_name='customer_activity'):
+    def build_select_query(self, table_name='customer_activity', columns=None, where=None, order_by=None):
+        """Build the SELECT statement for the given table, optionally restricted to some columns and rows."""
+        column_list = ", ".join(columns) if columns else "*"
+        query = f"SELECT {column_list} FROM {table_name}"
+        if where:
+            query += f" WHERE {where}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        return query
+
+    def fetch_data(self, table_name='customer_activity', columns=None):
         """Retrieve data from the specified table and return it as a Pandas DataFrame."""
         if self.engine is None:
             raise Exception("You must create the engine first using 'create_engine()'")
 
-        query = f"SELECT * FROM {table_name}"
+        query = self.build_select_query(table_name, columns)
         try:
             with self.engine.connect() as connection:
                 data = pd.read_sql(query, connection)
@@ -53,18 +110,317 @@ class RDSDatabaseConnector:
         except Exception as e:
             raise RuntimeError(f"Error fetching data from the database: {e}")
 
-# Function to save data to a CSV file
-def save_to_csv(data, file_name='customer_activity_data.csv'):
-    """Save data to a CSV file, only if the DataFrame is not empty."""
-    if data.empty:
-        print("Warning: The DataFrame is empty, the CSV file will not be saved.")
+    def fetch_data_in_chunks(self, table_name='customer_activity', columns=None, chunksize=50000, dtypes=None,
+                             where=None, order_by=None, query=None):
+        """Stream the specified table through a server-side cursor, yielding typed DataFrames of 'chunksize' rows.
+
+        'query' runs a prebuilt statement (e.g. from 'build_cleaning_query') instead of the generated SELECT.
+        """
+        if self.engine is None:
+            raise Exception("You must create the engine first using 'create_engine()'")
+
+        if dtypes is None:
+            dtypes = CUSTOMER_ACTIVITY_DTYPES if table_name == 'customer_activity' else {}
+
+        if query is None:
+            query = self.build_select_query(table_name, columns, where, order_by)
+        try:
+            with self.engine.connect() as connection:
+                # Server-side cursor: only 'chunksize' rows are held on the client at a time
+                connection = connection.execution_options(stream_results=True, max_row_buffer=chunksize)
+                for chunk in pd.read_sql(query, connection, chunksize=chunksize):
+                    yield chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk.columns})
+        except Exception as e:
+            raise RuntimeError(f"Error fetching data from the database: {e}")
+
+    def get_partition_ranges(self, table_name='customer_activity', partition_column='id', num_partitions=4):
+        """Split the range of 'partition_column' into at most 'num_partitions' contiguous WHERE conditions.
+
+        The key can be an integer, numeric, float, date or timestamp column. Integer
+        bounds are computed with integer arithmetic, so large ids keep every digit, and
+        every bound is sent as a bound parameter in the column's own type.
+        """
+        key = sql.column(partition_column)
+        query = select(func.min(key), func.max(key)).select_from(sql.table(table_name))
+        with self.engine.connect() as connection:
+            low, high = connection.execute(query).one()
+
+        if low is None:
+            return []
+
+        bounds = [low]
+        for i in range(1, num_partitions):
+            if isinstance(low, int):
+                bound = low + (high - low) * i // num_partitions
+            else:
+                bound = low + (high - low) * i / num_partitions
+            if bound > bounds[-1]:  # Narrow ranges give fewer partitions rather than empty ones
+                bounds.append(bound)
+        bounds.append(high)
+
+        ranges = []
+        for i in range(len(bounds) - 1):
+            lower = key >= bindparam(f'low_{i}', bounds[i])
+            # The last range is closed so that the maximum value is included
+            if i == len(bounds) - 2:
+                upper = key <= bindparam(f'high_{i}', bounds[i + 1])
+            else:
+                upper = key < bindparam(f'high_{i}', bounds[i + 1])
+            ranges.append(and_(lower, upper))
+        return ranges
+
+    def fetch_data_partitioned(self, table_name='customer_activity', partition_column='id', columns=None,
+                               num_partitions=4, max_workers=4):
+        """Fetch the table as key ranges of 'partition_column' read concurrently from the engine's pool.
+
+        Use a monotonic key (a serial id, or 'rowid' on SQLite) so partitions are balanced.
+        Partitions are concatenated in key order, so the result does not depend on which
+        worker finishes first. Create the engine with 'pool_size' >= 'max_workers' so that
+        no worker waits for a connection.
+        """
+        if self.engine is None:
+            raise Exception("You must create the engine first using 'create_engine()'")
+
+        selected = [sql.column(name) for name in columns] if columns else [text('*')]
+
+        def fetch_partition(condition):
+            query = select(*selected).select_from(sql.table(table_name)).where(condition)
+            with self.engine.connect() as connection:
+                return pd.read_sql(query, connection)
+
+        try:
+            ranges = self.get_partition_ranges(table_name, partition_column, num_partitions)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # executor.map returns results in submission order
+                partitions = list(executor.map(fetch_partition, ranges))
+        except Exception as e:
+            raise RuntimeError(f"Error fetching data from the database: {e}")
+
+        if not partitions:
+            return self.fetch_data(table_name, columns)
+        return pd.concat(partitions, ignore_index=True)
+
+    # Cleaning statistics computed in the database
+
+    def reflect_table(self, table_name='customer_activity'):
+        """Read the table definition, to build statements with SQLAlchemy and know the column types."""
+        if self.engine is None:
+            raise Exception("You must create the engine first using 'create_engine()'")
+        return Table(table_name, MetaData(), autoload_with=self.engine)
+
+    def supports_pushdown(self):
+        """True if the backend can compute percentiles and correlations itself."""
+        return self.engine.dialect.name in PUSHDOWN_DIALECTS
+
+    @staticmethod
+    def numeric_columns(table):
+        return [column.name for column in table.columns if isinstance(column.type, (sqltypes.Integer, sqltypes.Float, sqltypes.Numeric))]
+
+    @staticmethod
+    def text_columns(table):
+        return [column.name for column in table.columns if isinstance(column.type, sqltypes.String)]
+
+    @staticmethod
+    def filled(table, column, fill_values):
+        """Column expression with its imputation value applied, as COALESCE(column, value)."""
+        if fill_values and column in fill_values:
+            return func.coalesce(table.c[column], literal(fill_values[column]))
+        return table.c[column]
+
+    def execute_one(self, query):
+        with self.engine.connect() as connection:
+            return connection.execute(query).one()
+
+    def missing_percentage(self, table_name='customer_activity', columns=None, where=None):
+        """Percentage of missing values per column, counted in the database as count(*) - count(column)."""
+        table = self.reflect_table(table_name)
+        columns = columns or [column.name for column in table.columns]
+        query = select(func.count(), *[func.count() - func.count(table.c[column]) for column in columns])
+        query = query.select_from(table)
+        if where:
+            query = query.where(text(where))
+        rows, *missing = self.execute_one(query)
+        return pd.Series([100 * count / rows if rows else 0.0 for count in missing], index=columns, dtype='float64')
+
+    def column_quantiles(self, table_name='customer_activity', columns=None, q=(0.25, 0.5, 0.75), where=None,
+                         fill_values=None):
+        """Quantiles of numeric columns with percentile_cont (the same interpolation as pandas), one row per q."""
+        table = self.reflect_table(table_name)
+        columns = columns or self.numeric_columns(table)
+        q = list(q)
+        query = select(*[func.percentile_cont(p).within_group(self.filled(table, column, fill_values))
+                         for column in columns for p in q]).select_from(table)
+        if where:
+            query = query.where(text(where))
+        values = np.array(self.execute_one(query), dtype='float64').reshape(len(columns), len(q))
+        return pd.DataFrame(values.T, index=q, columns=columns)
+
+    def column_correlation(self, table_name='customer_activity', columns=None, where=None, fill_values=None):
+        """Pearson correlation matrix computed with corr() in the database, like DataFrame.corr()."""
+        table = self.reflect_table(table_name)
+        columns = columns or self.numeric_columns(table)
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i + 1, len(columns))]
+        matrix = np.eye(len(columns))
+        if pairs:
+            query = select(*[func.corr(self.filled(table, columns[i], fill_values),
+                                       self.filled(table, columns[j], fill_values)) for i, j in pairs])
+            query = query.select_from(table)
+            if where:
+                query = query.where(text(where))
+            for (i, j), value in zip(pairs, self.execute_one(query)):
+                matrix[i, j] = matrix[j, i] = np.nan if value is None else value
+        return pd.DataFrame(matrix, index=columns, columns=columns)
+
+    def fetch_columns(self, table, expressions, where=None, chunksize=50000):
+        """Download only the given column expressions (labelled by name), for statistics computed locally."""
+        query = select(*[expression.label(name) for name, expression in expressions.items()]).select_from(table)
+        if where is not None:
+            query = query.where(where)
+        chunks = list(self.fetch_data_in_chunks(table.name, chunksize=chunksize, query=query))
+        if not chunks:
+            return pd.DataFrame(columns=list(expressions), dtype='float64')
+        return pd.concat(chunks, ignore_index=True).astype('float64')
+
+    def cleaning_summary(self, table_name='customer_activity', missing_threshold=30, strategy='median',
+                         correlation_threshold=None, where="operating_systems IS NOT NULL", pushdown=None):
+        """Decide the cleaning of the table from aggregates, without downloading its rows.
+
+        Takes the decisions of the cleaning scripts on the rows matching 'where':
+        drop the columns with more than 'missing_threshold' % of missing values, impute
+        numeric columns with the median (or mean) and text columns with 'Unknown', IQR
+        outlier bounds of the imputed values (the 'original' bounds of remove_outliers)
+        and, if 'correlation_threshold' is given, the highly correlated columns of the
+        rows inside those bounds.
+        Missing counts and means are always computed in the database. Percentiles and
+        correlations are too when the backend supports them ('pushdown' None = detect);
+        otherwise only the numeric columns are downloaded and they are computed locally.
+        """
+        table = self.reflect_table(table_name)
+        pushdown = self.supports_pushdown() if pushdown is None else pushdown
+        condition = text(where) if where else None
+
+        missing_percentage = self.missing_percentage(table_name, where=where)
+        dropped_columns = list(missing_percentage[missing_percentage > missing_threshold].index)
+        numeric_columns = [column for column in self.numeric_columns(table) if column not in dropped_columns]
+        text_columns = [column for column in self.text_columns(table) if column not in dropped_columns]
+
+        local = None
+        if not pushdown:
+            local = self.fetch_columns(table, {column: table.c[column] for column in numeric_columns}, condition)
+
+        # Imputation values
+        if strategy == 'mean':
+            query = select(*[func.avg(table.c[column]) for column in numeric_columns]).select_from(table)
+            if condition is not None:
+                query = query.where(condition)
+            fill = pd.Series(self.execute_one(query), index=numeric_columns, dtype='float64')
+        elif strategy == 'median':
+            fill = local.median() if local is not None else \
+                self.column_quantiles(table_name, numeric_columns, [0.5], where).loc[0.5]
+        else:
+            raise ValueError("Invalid strategy. Use 'mean' or 'median'.")
+        fill_values = {column: float(value) for column, value in fill.items() if pd.notna(value)}
+        fill_values.update({column: "Unknown" for column in text_columns})
+
+        # IQR bounds of the imputed values
+        if local is not None:
+            local = local.fillna({column: fill_values[column] for column in numeric_columns if column in fill_values})
+            quartiles = local.quantile([0.25, 0.75])
+        else:
+            quartiles = self.column_quantiles(table_name, numeric_columns, [0.25, 0.75], where, fill_values)
+        IQR = quartiles.loc[0.75] - quartiles.loc[0.25]
+        outlier_bounds = {column: [float(quartiles.loc[0.25, column] - 1.5 * IQR[column]),
+                                   float(quartiles.loc[0.75, column] + 1.5 * IQR[column])]
+                          for column in numeric_columns}
+
+        summary = {
+            'table_name': table_name,
+            'where': where,
+            'dropped_columns': dropped_columns,
+            'fill_values': fill_values,
+            'outlier_bounds': outlier_bounds,
+            'correlated_columns': [],
+        }
+
+        # Highly correlated columns, as in identify_highly_correlated_columns
+        if correlation_threshold is not None and numeric_columns:
+            if local is not None:
+                lower = np.array([outlier_bounds[column][0] for column in numeric_columns])
+                upper = np.array([outlier_bounds[column][1] for column in numeric_columns])
+                values = local[numeric_columns].to_numpy()
+                inside = ((values >= lower) & (values <= upper)).all(axis=1)
+                accumulator = CorrelationAccumulator(numeric_columns)
+                accumulator.update(local[inside])
+                correlation_matrix = accumulator.correlation()
+            else:
+                bounds_where = self.compile_condition(self.cleaning_condition(table, summary))
+                correlation_matrix = self.column_correlation(table_name, numeric_columns, bounds_where, fill_values)
+            upper_triangle = np.triu(np.abs(correlation_matrix.to_numpy()), k=1)
+            highly_correlated = (upper_triangle > correlation_threshold).any(axis=0)
+            summary['correlated_columns'] = list(correlation_matrix.columns[highly_correlated])
+
+        print(f"\nCleaning decided from aggregates ({'in the database' if pushdown else 'local fallback'}): "
+              f"dropped {dropped_columns}, correlated {summary['correlated_columns']}")
+        return summary
+
+    def cleaning_condition(self, table, summary):
+        """WHERE condition keeping the rows of 'where' whose imputed values are inside the outlier bounds."""
+        conditions = [text(summary['where'])] if summary['where'] else []
+        for column, (lower, upper) in summary['outlier_bounds'].items():
+            conditions.append(self.filled(table, column, summary['fill_values']).between(lower, upper))
+        return and_(*conditions)
+
+    def compile_condition(self, condition):
+        """Render a condition as SQL text for this backend, with its values inlined."""
+        return str(condition.compile(self.engine, compile_kwargs={'literal_binds': True}))
+
+    def build_cleaning_query(self, summary):
+        """SELECT that applies a cleaning summary in the database: imputed columns, no outliers, no dropped columns."""
+        table = self.reflect_table(summary['table_name'])
+        removed = set(summary['dropped_columns']) | set(summary['correlated_columns'])
+        columns = [self.filled(table, column.name, summary['fill_values']).label(column.name)
+                   for column in table.columns if column.name not in removed]
+        return select(*columns).select_from(table).where(self.cleaning_condition(table, summary))
+
+    def fetch_cleaned_data(self, summary, chunksize=50000):
+        """Download only the cleaned rows, cleaned by the database with 'build_cleaning_query'."""
+        query = self.build_cleaning_query(summary)
+        chunks = list(self.fetch_data_in_chunks(summary['table_name'], chunksize=chunksize, query=query))
+        if not chunks:
+            return pd.DataFrame(columns=[column.name for column in query.selected_columns])
+        return pd.concat(chunks, ignore_index=True)
+
+# Function to save data to a Parquet, Feather or CSV file
+def save_data(data, file_name='customer_activity_data.parquet', max_workers=None):
+    """Save data to a file whose format is chosen by its extension, only if it is not empty.
+
+    'data' can be a single DataFrame or an iterable of DataFrame chunks (e.g. from
+    'fetch_data_in_chunks'), which are written one by one so memory stays bounded.
+    CSV files can be compressed with a '.csv.gz' or '.csv.zst' name.
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+    rows_written = save_chunks(chunks, file_name, max_workers=max_workers)
+    if rows_written == 0:
+        print("Warning: The DataFrame is empty, the file will not be saved.")
         return
-    
-    data.to_csv(file_name, index=False)
+
     print(f"Data successfully saved to '{file_name}'.")
 
+# Function to save data to a CSV file
+def save_to_csv(data, file_name='customer_activity_data.csv'):
+    """Save data to a CSV file, only if it is not empty."""
+    save_data(data, file_name)
+
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep a local Parquet cache of 'customer_activity' up to date.")
+    parser.add_argument('--cache-dir', default=os.path.join(PROJECT_DIR, 'customer_activity_cache'))
+    parser.add_argument('--watermark-column', default=None,
+                        help="Unique, increasing column (e.g. an auto-increment key) used to fetch only new rows. "
+                             "Without it, every run downloads the whole table again.")
+    args = parser.parse_args()
+
     try:
         # Load credentials from the YAML file
         credentials = load_credentials()
@@ -73,11 +429,9 @@ if __name__ == "__main__":
         db_connector = RDSDatabaseConnector(credentials)
         db_connector.create_engine()
 
-        # Fetch data from the 'customer_activity' table
-        data = db_connector.fetch_data()
-
-        # Save data to a CSV file
-        save_to_csv(data)
+        # Append only the new rows of 'customer_activity' to the local Parquet cache, or refresh it whole
+        cache = CustomerActivityCache(args.cache_dir, watermark_column=args.watermark_column)
+        cache.sync(db_connector)
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,178 @@
+import json
+import math
+
+import numpy as np
+from scipy import special, stats
+
+ARTIFACT_VERSION = 1
+
+def is_missing(value):
+    """True for None and NaN, the two ways a missing value shows up in a record."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+class FittedCleaner:
+    """Fit the cleaning steps once, save their parameters and re-apply them to new data.
+
+    'fit' runs the same steps as the cleaning scripts (drop sparse columns, impute
+    with the median / 'Unknown', reduce skewness, IQR outlier bounds, drop highly
+    correlated columns) and records what each step decided. 'transform' and
+    'transform_record' then apply those decisions to new batches or single sessions
+    without rescanning the historical data.
+    """
+
+    def __init__(self, missing_threshold=30, skew_threshold=0.5, correlation_threshold=0.9):
+        self.missing_threshold = missing_threshold
+        self.skew_threshold = skew_threshold
+        self.correlation_threshold = correlation_threshold
+        self.dropped_columns = []
+        self.fill_values = {}
+        self.skew_transforms = {}
+        self.outlier_bounds = {}
+        self.correlated_columns = []
+
+    def fit(self, df):
+        """Learn the parameters of every step from 'df' and return the cleaned training data."""
+        df = df.dropna(subset=['operating_systems'])
+
+        # Step 1: columns with too much missing data
+        missing_percentage = df.isnull().mean() * 100
+        self.dropped_columns = list(missing_percentage[missing_percentage > self.missing_threshold].index)
+        df = df.drop(columns=self.dropped_columns)
+
+        # Step 2: imputation values
+        numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'string']).columns
+        self.fill_values = {column: float(value) for column, value in df[numerical_cols].median().items()}
+        self.fill_values.update({column: "Unknown" for column in categorical_cols})
+        df = df.fillna(self.fill_values)
+
+        # Step 3: skewness transformations, choosing the method from each column's minimum
+        skewness = df[numerical_cols].skew()
+        self.skew_transforms = {}
+        for column in skewness[abs(skewness) > self.skew_threshold].index:
+            minimum = df[column].min()
+            if minimum > 0:
+                self.skew_transforms[column] = {'method': 'log1p'}
+            elif minimum >= 0:
+                self.skew_transforms[column] = {'method': 'sqrt'}
+            else:
+                _, lmbda = stats.boxcox(df[column] + 1)
+                self.skew_transforms[column] = {'method': 'boxcox', 'lambda': float(lmbda)}
+        df = self.apply_skew_transforms(df)
+
+        # Step 4: IQR bounds, all taken from the same (transformed) data
+        Q1 = df[numerical_cols].quantile(0.25)
+        Q3 = df[numerical_cols].quantile(0.75)
+        IQR = Q3 - Q1
+        self.outlier_bounds = {
+            column: [float(Q1[column] - 1.5 * IQR[column]), float(Q3[column] + 1.5 * IQR[column])]
+            for column in numerical_cols
+        }
+        df = df[self.outlier_mask(df)]
+
+        # Step 5: highly correlated columns
+        correlation_matrix = df[numerical_cols].corr()
+        upper_triangle = np.triu(np.abs(correlation_matrix.to_numpy()), k=1)
+        highly_correlated = (upper_triangle > self.correlation_threshold).any(axis=0)
+        self.correlated_columns = list(correlation_matrix.columns[highly_correlated])
+        return df.drop(columns=self.correlated_columns)
+
+    def apply_skew_transforms(self, df):
+        """Apply the fitted log1p / sqrt / Box-Cox transformation of every skewed column."""
+        transformed = {}
+        for column, params in self.skew_transforms.items():
+            if column not in df.columns:
+                continue
+            if params['method'] == 'log1p':
+                transformed[column] = np.log1p(df[column])
+            elif params['method'] == 'sqrt':
+                transformed[column] = np.sqrt(df[column])
+            else:
+                transformed[column] = special.boxcox(df[column] + 1, params['lambda'])
+        return df.assign(**transformed)
+
+    def outlier_mask(self, df):
+        """Boolean mask of the rows that fall inside every fitted IQR interval."""
+        columns = [column for column in self.outlier_bounds if column in df.columns]
+        bounds = np.array([self.outlier_bounds[column] for column in columns]).reshape(-1, 2)
+        values = df[columns].to_numpy(dtype='float64')
+        return ((values >= bounds[:, 0]) & (values <= bounds[:, 1])).all(axis=1)
+
+    def transform(self, df, remove_outliers=True):
+        """Clean a new batch with the fitted parameters."""
+        df = df.dropna(subset=['operating_systems'])
+        df = df.drop(columns=self.dropped_columns, errors='ignore')
+        df = df.fillna({column: value for column, value in self.fill_values.items() if column in df.columns})
+        df = self.apply_skew_transforms(df)
+        if remove_outliers:
+            df = df[self.outlier_mask(df)]
+        return df.drop(columns=self.correlated_columns, errors='ignore')
+
+    def transform_record(self, record, remove_outliers=True):
+        """Clean a single session given as a dict, without pandas. Return None if it is filtered out."""
+        if is_missing(record.get('operating_systems')):
+            return None
+
+        result = {}
+        for column, value in record.items():
+            if column in self.dropped_columns:
+                continue
+            if is_missing(value):
+                value = self.fill_values.get(column, value)
+
+            params = self.skew_transforms.get(column)
+            if params is not None:
+                # The NumPy / SciPy scalar functions of the batch path: a value outside the
+                # domain (e.g. a negative duration) becomes NaN instead of raising
+                value = np.nan if value is None else float(value)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    if params['method'] == 'log1p':
+                        value = float(np.log1p(value))
+                    elif params['method'] == 'sqrt':
+                        value = float(np.sqrt(value))
+                    else:
+                        value = float(special.boxcox(value + 1, params['lambda']))
+
+            bounds = self.outlier_bounds.get(column)
+            if remove_outliers and bounds is not None and not bounds[0] <= value <= bounds[1]:
+                return None
+
+            if column not in self.correlated_columns:
+                result[column] = value
+        return result
+
+    def to_dict(self):
+        """Return the fitted parameters as a JSON-serialisable dict."""
+        return {
+            'version': ARTIFACT_VERSION,
+            'missing_threshold': self.missing_threshold,
+            'skew_threshold': self.skew_threshold,
+            'correlation_threshold': self.correlation_threshold,
+            'dropped_columns': self.dropped_columns,
+            'fill_values': self.fill_values,
+            'skew_transforms': self.skew_transforms,
+            'outlier_bounds': self.outlier_bounds,
+            'correlated_columns': self.correlated_columns,
+        }
+
+    def save(self, file_path='fitted_cleaner.json'):
+        """Save the fitted parameters to a small JSON artifact."""
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+        print(f"\nFitted parameters saved to {file_path}")
+
+    @classmethod
+    def load(cls, file_path='fitted_cleaner.json'):
+        """Load a cleaner saved with 'save'."""
+        with open(file_path, 'r') as file:
+            state = json.load(file)
+        if state.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version {state.get('version')} in {file_path}.")
+
+        cleaner = cls(state['missing_threshold'], state['skew_threshold'], state['correlation_threshold'])
+        cleaner.dropped_columns = state['dropped_columns']
+        cleaner.fill_values = state['fill_values']
+        cleaner.skew_transforms = state['skew_transforms']
+        cleaner.outlier_bounds = state['outlier_bounds']
+        cleaner.correlated_columns = state['correlated_columns']
+        return cleaner
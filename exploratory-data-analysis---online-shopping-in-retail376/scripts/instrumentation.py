@@ -0,0 +1,339 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import threading
+import time
+
+import pandas as pd
+
+def read_memory_status():
+    """Current and peak resident memory of this process in bytes, or (None, None) off Linux."""
+    try:
+        with open('/proc/self/status') as file:
+            status = dict(line.split(':', 1) for line in file if line.startswith(('VmRSS', 'VmHWM')))
+        return int(status['VmRSS'].split()[0]) * 1024, int(status['VmHWM'].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def reset_memory_peak():
+    """Reset the kernel's peak RSS mark to the current RSS (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+def frame_shape(value):
+    """(rows, columns) of a DataFrame, or of the 'df' attribute of a transform object."""
+    if isinstance(value, pd.DataFrame):
+        return value.shape
+    df = getattr(value, 'df', None)
+    if isinstance(df, pd.DataFrame):
+        return df.shape
+    return None, None
+
+class Call:
+    """Measurements of one instrumented call while it runs."""
+
+    def __init__(self, step, owner, peak_reset=True):
+        self.step = step
+        self.peak_reset = peak_reset  # False: the peak mark still holds an older peak, so it is not recorded
+        self.thread = threading.get_ident()
+        self.overlapped = False  # Set when a call runs in another thread meanwhile
+        self.rows_in, self.columns_in = frame_shape(owner)
+        self.child_peak = 0
+        self.start_rss, peak = read_memory_status()
+        self.start_time = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.thread_time()
+
+class Instrumentation:
+    """Records wall time, CPU time, peak memory and row/column flow of instrumented methods.
+
+    Methods are instrumented with the 'instrument_class' decorator. While disabled
+    (the default) a wrapped call only checks one flag. Peak memory is the highest
+    resident memory reached during the call minus the memory at its start, read from
+    the kernel's high-water mark, so it includes NumPy and Arrow buffers; it is None
+    where /proc is not available or the mark cannot be reset. Nested calls (e.g.
+    apply_transforms calling convert_month) are recorded separately, with the caller's
+    figures including theirs.
+
+    Calls may run in several threads (e.g. BatchTransform.transform_chunks). CPU time
+    is the time of the calling thread only. The high-water mark belongs to the whole
+    process, so the peak memory of a call that overlapped a call in another thread is
+    recorded as None, and only one thread at a time is profiled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.local = threading.local()  # Each thread nests its own calls
+        self.lock = threading.Lock()
+        self.running = []  # Calls in progress in every thread
+        self.stream = None
+        self.profile_steps = None
+        self.profiler = None
+        self.profile_stats = None
+
+    @property
+    def stack(self):
+        """Instrumented calls in progress in the current thread, outermost first."""
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def enable(self, stream_path=None, profile=False, profile_steps=None):
+        """Start recording.
+
+        'stream_path' also appends every record to a JSON lines file as soon as the call
+        ends. 'profile' runs the outermost instrumented calls (or only the steps named in
+        'profile_steps') under cProfile and accumulates the statistics in 'profile_stats'.
+        """
+        self.enabled = True
+        if stream_path is not None:
+            self.stream = open(stream_path, 'a')
+        self.profile_steps = set(profile_steps or []) if profile or profile_steps else None
+
+    def disable(self):
+        """Stop recording. Records already taken are kept until 'reset'."""
+        self.enabled = False
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self.profile_steps = None
+
+    def reset(self):
+        self.records = []
+        self.profile_stats = None
+
+    def should_profile(self, step):
+        """Claim the profiler for a call of 'step', if it should be profiled and no other call holds it."""
+        if self.profile_steps is None:
+            return False
+        if not (step in self.profile_steps if self.profile_steps else not self.stack):
+            return False
+        with self.lock:
+            # cProfile cannot be nested, so calls inside a profiled call (or in other threads) are not profiled
+            if self.profiler is not None:
+                return False
+            self.profiler = cProfile.Profile()
+            return True
+
+    def start(self, call):
+        """Add 'call' to the running calls, marking every running call as overlapped if several threads run."""
+        with self.lock:
+            self.running.append(call)
+            if any(other.thread != call.thread for other in self.running):
+                for other in self.running:
+                    other.overlapped = True
+
+    def stop(self, call):
+        with self.lock:
+            self.running.remove(call)
+
+    def call(self, step, func, owner, args, kwargs):
+        """Run 'func' and record its measurements."""
+        if self.stack:
+            # The parent's peak so far would be lost when the mark is reset for this call
+            peak = read_memory_status()[1]
+            if peak is not None:
+                self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak)
+        profiler = self.profiler if self.should_profile(step) else None
+
+        call = Call(step, owner, peak_reset=reset_memory_peak())
+        self.start(call)
+        self.stack.append(call)
+        if profiler is not None:
+            profiler.enable()
+        error = None
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self.lock:
+                    self.profiler = None
+                    if self.profile_stats is None:
+                        self.profile_stats = pstats.Stats(profiler)
+                    else:
+                        self.profile_stats.add(profiler)
+            self.stack.pop()
+            self.stop(call)
+            self.finish(call, owner, result if error is None else None, error)
+        return result
+
+    def finish(self, call, owner, result, error):
+        wall_seconds = time.perf_counter() - call.start_wall
+        cpu_seconds = time.thread_time() - call.start_cpu
+        peak = max(read_memory_status()[1] or 0, call.child_peak)
+        if self.stack:
+            self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak)
+        peak_known = call.start_rss is not None and call.peak_reset and not call.overlapped
+        rows_out, columns_out = frame_shape(result)
+        if rows_out is None:
+            rows_out, columns_out = frame_shape(owner)
+
+        self.add_record({
+            'step': call.step,
+            'timestamp': call.start_time,
+            'wall_seconds': wall_seconds,
+            'cpu_seconds': cpu_seconds,
+            'peak_memory_delta_bytes': peak - call.start_rss if peak_known else None,
+            'rows_in': call.rows_in,
+            'columns_in': call.columns_in,
+            'rows_out': rows_out,
+            'columns_out': columns_out,
+            'depth': len(self.stack),
+            'error': error,
+        })
+
+    def iterate(self, step, iterator):
+        """Pass the chunks of a generator through, recording the time spent producing them.
+
+        Only the time inside the generator counts, not the consumer's work between
+        chunks. The chunks belong to the consumer, so no peak memory is recorded.
+        """
+        start_time = time.time()
+        wall_seconds = cpu_seconds = 0
+        rows = columns = 0
+        error = None
+        try:
+            while True:
+                start_wall = time.perf_counter()
+                start_cpu = time.thread_time()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall_seconds += time.perf_counter() - start_wall
+                    cpu_seconds += time.thread_time() - start_cpu
+                rows += len(chunk)
+                columns = chunk.shape[1]
+                yield chunk
+        except GeneratorExit:
+            raise  # The consumer stopped early, which is not an error
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.add_record({
+                'step': step, 'timestamp': start_time, 'wall_seconds': wall_seconds,
+                'cpu_seconds': cpu_seconds, 'peak_memory_delta_bytes': None,
+                'rows_in': None, 'columns_in': None, 'rows_out': rows, 'columns_out': columns,
+                'depth': len(self.stack), 'error': error,
+            })
+
+    def add_record(self, record):
+        with self.lock:
+            self.records.append(record)
+            if self.stream is not None:
+                self.stream.write(json.dumps(record) + "\n")
+                self.stream.flush()
+
+    def summary(self):
+        """One row per step: number of calls, errors, total times, largest peak and the last row flow."""
+        if not self.records:
+            return pd.DataFrame()
+        records = pd.DataFrame(self.records)
+        grouped = records.groupby('step', sort=False)
+        return pd.DataFrame({
+            'calls': grouped.size(),
+            'errors': grouped['error'].count(),
+            'wall_seconds': grouped['wall_seconds'].sum(),
+            'cpu_seconds': grouped['cpu_seconds'].sum(),
+            'peak_memory_delta_bytes': grouped['peak_memory_delta_bytes'].max(),
+            'rows_in': grouped['rows_in'].last(),
+            'rows_out': grouped['rows_out'].last(),
+            'columns_in': grouped['columns_in'].last(),
+            'columns_out': grouped['columns_out'].last(),
+        })
+
+    def write_json_lines(self, file_path):
+        """Write every record as one JSON object per line."""
+        with open(file_path, 'w') as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
+        print(f"\n{len(self.records)} instrumentation records saved to {file_path}")
+
+    def write_prometheus(self, file_path, prefix='eda_step'):
+        """Write the summary in the Prometheus text exposition format (e.g. for the node_exporter textfile collector)."""
+        metrics = [
+            ('calls_total', 'calls', 'counter', "Number of calls of the step."),
+            ('errors_total', 'errors', 'counter', "Number of calls of the step that raised an exception."),
+            ('wall_seconds_total', 'wall_seconds', 'counter', "Wall time spent in the step."),
+            ('cpu_seconds_total', 'cpu_seconds', 'counter', "CPU time spent in the step."),
+            ('peak_memory_delta_bytes', 'peak_memory_delta_bytes', 'gauge', "Largest resident memory increase during a call."),
+            ('rows_in', 'rows_in', 'gauge', "Rows before the last call."),
+            ('rows_out', 'rows_out', 'gauge', "Rows after the last call."),
+            ('columns_in', 'columns_in', 'gauge', "Columns before the last call."),
+            ('columns_out', 'columns_out', 'gauge', "Columns after the last call."),
+        ]
+        summary = self.summary()
+        lines = []
+        for name, column, metric_type, description in metrics:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+            for step, value in summary[column].items() if not summary.empty else []:
+                if pd.notna(value):
+                    # repr keeps every digit; ':g' would round byte counts to 6 significant digits
+                    lines.append(f'{prefix}_{name}{{step="{step}"}} {float(value)!r}')
+        # Written to a temporary file first, so a scraper never reads a half-written file
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, file_path)
+        print(f"\nMetrics of {len(summary)} steps saved to {file_path}")
+
+    def write(self, file_path):
+        """Write the records as JSON lines (.jsonl / .json) or the summary as Prometheus text (.prom / .txt)."""
+        if file_path.endswith(('.prom', '.txt')):
+            self.write_prometheus(file_path)
+        else:
+            self.write_json_lines(file_path)
+
+    def print_profile(self, limit=20, sort='cumulative'):
+        if self.profile_stats is None:
+            print("No profile was recorded. Enable instrumentation with profile=True.")
+            return
+        self.profile_stats.sort_stats(sort).print_stats(limit)
+
+# The instance every instrumented class reports to
+INSTRUMENTATION = Instrumentation()
+
+def instrument(func, step):
+    """Wrap one function so its calls are recorded while INSTRUMENTATION is enabled."""
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            if not INSTRUMENTATION.enabled:
+                yield from func(*args, **kwargs)
+                return
+            yield from INSTRUMENTATION.iterate(step, func(*args, **kwargs))
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not INSTRUMENTATION.enabled:
+            return func(*args, **kwargs)
+        return INSTRUMENTATION.call(step, func, args[0] if args else None, args, kwargs)
+    return wrapper
+
+def instrument_class(cls):
+    """Class decorator instrumenting every public method, named '<module>.<class>.<method>'."""
+    for name, member in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.isfunction(member):
+            continue
+        setattr(cls, name, instrument(member, f"{cls.__module__}.{cls.__name__}.{name}"))
+    return cls
+
+# Setting EDA_INSTRUMENTATION=1 enables the instrumentation without changing any script
+if os.environ.get('EDA_INSTRUMENTATION'):
+    INSTRUMENTATION.enable(os.environ.get('EDA_INSTRUMENTATION_STREAM'))
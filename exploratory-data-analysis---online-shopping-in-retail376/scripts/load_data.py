@@ -1,10 +1,19 @@
 import pandas as pd  
+import os
+from data_cache import CustomerActivityCache
+from storage import PROJECT_DIR
 
-file_path = r"C:\Users\nieve\exploratory-data-analysis---online-shopping-in-retail376\customer_activity_data.csv"
-df = pd.read_csv(file_path)
+def main():
+    """Load the cached 'customer_activity' data and show its first rows."""
+    # Read from the local cache kept up to date by db_utils.py instead of querying the database
+    cache_dir = os.path.join(PROJECT_DIR, 'customer_activity_cache')
+    df = CustomerActivityCache(cache_dir).load()
 
-# All columns
-pd.set_option("display.max_columns", None)
+    # All columns
+    pd.set_option("display.max_columns", None)
 
-print(f" Loaded data: {df.shape[0]} rows, {df.shape[1]} columns")
-print(df.head())  # First 5 rows
\ No newline at end of file
+    print(f" Loaded data: {df.shape[0]} rows, {df.shape[1]} columns")
+    print(df.head())  # First 5 rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import pandas as pd
+
+import data_transform
+import data_without_higly_correlated_columns
+import data_without_null_values
+import data_without_outliers
+import data_without_skewness
+import knn_imputer
+from data_cache import WATERMARK_FILE, CustomerActivityCache
+from instrumentation import INSTRUMENTATION
+from storage import PROJECT_DIR, save_dataframe, load_dataframe
+
+DEFAULT_SOURCE = os.path.join(PROJECT_DIR, 'customer_activity_cache')
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_DIR, '.pipeline_cache')
+DEFAULT_OUTPUT = os.path.join(PROJECT_DIR, 'data_cleaned.parquet')
+
+def hash_source(source):
+    """Content hash of the raw data: a single file, or a cache directory kept by db_utils.py."""
+    digest = hashlib.sha256()
+    if os.path.isdir(source):
+        # The watermark state changes with every sync that appends parts or refreshes the whole cache,
+        # so it identifies the cache contents
+        watermark_path = os.path.join(source, WATERMARK_FILE)
+        if os.path.exists(watermark_path):
+            with open(watermark_path, 'rb') as file:
+                digest.update(file.read())
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.parquet'):
+                digest.update(f"{name}:{os.path.getsize(os.path.join(source, name))}".encode())
+    else:
+        with open(source, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+class Stage:
+    """One step of the pipeline: a function of the outputs of its dependencies and its parameters.
+
+    'func' is called as func(*inputs, **params). 'modules' are the modules holding the
+    code the stage runs; their source is part of the cache key, so editing a cleaning
+    class reruns the stages that use it.
+    """
+
+    def __init__(self, name, func, deps=(), params=None, modules=()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.modules = list(modules)
+
+    def key(self, input_keys):
+        """Hash of the stage's code, its parameters and the keys of its inputs."""
+        code = [inspect.getsource(self.func)] + [inspect.getsource(module) for module in self.modules]
+        payload = json.dumps({'stage': self.name, 'params': self.params, 'inputs': input_keys,
+                              'code': hashlib.sha256("\n".join(code).encode()).hexdigest()},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+class Pipeline:
+    """Run a DAG of stages, caching every stage's output under the hash of its inputs and parameters.
+
+    Because a stage's key includes the keys of its dependencies, changing a parameter
+    only changes the keys (and reruns) of that stage and the stages after it; every
+    earlier output is read back from 'cache_dir'.
+    """
+
+    def __init__(self, stages, cache_dir=DEFAULT_CACHE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+
+    def order(self):
+        """Return the stages in dependency order, raising ValueError on unknown dependencies or cycles."""
+        ordered = []
+        state = {}
+
+        def visit(name):
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'.")
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"The pipeline has a cycle through stage '{name}'.")
+            state[name] = 'visiting'
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = 'done'
+            ordered.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def keys(self):
+        """Cache key of every stage."""
+        keys = {}
+        for stage in self.order():
+            keys[stage.name] = stage.key([keys[dep] for dep in stage.deps])
+        return keys
+
+    def cache_path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}.parquet")
+
+    def run(self, target=None, force=False):
+        """Compute 'target' (by default the last stage) and return (output, report).
+
+        Cached outputs are only read when a stage that must be recomputed needs them.
+        'force' recomputes every stage on the way to 'target'. The report has one row
+        per stage touched, saying whether it was 'cached' or 'computed'.
+        """
+        ordered = self.order()
+        target = target or ordered[-1].name
+        if target not in self.stages:
+            raise ValueError(f"Unknown stage '{target}'.")
+        keys = self.keys()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        outputs = {}
+        report = []
+
+        def resolve(name):
+            if name in outputs:
+                return outputs[name]
+            stage = self.stages[name]
+            path = self.cache_path(name, keys[name])
+            start = time.perf_counter()
+            if os.path.exists(path) and not force:
+                df = load_dataframe(path)
+                status = 'cached'
+            else:
+                inputs = [resolve(dep) for dep in stage.deps]
+                start = time.perf_counter()
+                df = stage.func(*inputs, **stage.params)
+                # Written atomically, so an interrupted run never leaves a partial entry
+                save_dataframe(df, path)
+                status = 'computed'
+            report.append({'stage': name, 'status': status, 'key': keys[name][:16],
+                           'rows': len(df), 'columns': df.shape[1],
+                           'seconds': round(time.perf_counter() - start, 3)})
+            outputs[name] = df
+            return df
+
+        df = resolve(target)
+        return df, pd.DataFrame(report)
+
+# Stage functions. Every stage works on a copy, so an output kept in memory for
+# another stage is never modified. The statistical stages see the durations of the
+# type transform as float seconds, like the standalone scripts, which run before it.
+
+def extract_stage(source, source_hash=None):
+    """Read the raw data from a cache directory (see db_utils.py) or a Parquet, Feather or CSV file.
+
+    'source_hash' is not used here; it is a parameter so that new raw data changes the key.
+    """
+    if os.path.isdir(source):
+        return CustomerActivityCache(source).load()
+    return load_dataframe(source)
+
+def null_values_stage(df, threshold=30, strategy='median'):
+    """Steps of data_without_null_values.py: drop rows without an OS, drop sparse columns and impute."""
+    transformer = data_without_null_values.DataFrameTransform(df.copy())
+    transformer.remove_missing_operating_systems()
+    transformer.drop_columns_with_missing_data(threshold=threshold)
+    transformer.impute_missing_data(strategy=strategy)
+    transformer.impute_missing_data(strategy='category')
+    return transformer.df
+
+def type_transform_stage(df):
+    """Type conversions of data_transform.py."""
+    return data_transform.DataTransform(df.copy()).apply_transforms()
+
+def skewness_stage(df, threshold=0.5):
+    """Log / square root / Box-Cox transformation of the skewed columns, as in data_without_skewness.py."""
+    transformer = data_without_skewness.DataFrameTransform(data_transform.numeric_view(df))
+    transformer.transform_skewed_columns(transformer.identify_skewed_columns(threshold))
+    return transformer.df
+
+def outliers_stage(df, bounds='sequential'):
+    """IQR outlier removal of data_without_outliers.py."""
+    transformer = data_without_outliers.DataFrameTransform(data_transform.numeric_view(df))
+    if transformer.remove_outliers(bounds=bounds) is None:
+        raise ValueError(f"Invalid bounds '{bounds}'. Use 'original' or 'sequential'.")
+    return transformer.df
+
+def correlation_stage(df, threshold=0.9):
+    """Highly correlated column removal of data_without_higly_correlated_columns.py."""
+    transformer = data_without_higly_correlated_columns.DataFrameTransform(data_transform.numeric_view(df))
+    transformer.remove_highly_correlated_columns(threshold=threshold)
+    return transformer.df
+
+def build_pipeline(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR, missing_threshold=30,
+                   strategy='median', skew_threshold=0.5, outlier_bounds='sequential',
+                   correlation_threshold=0.9):
+    """Build the cleaning pipeline: extract -> null_values -> type_transform -> skewness -> outliers -> correlation."""
+    stages = [
+        Stage('extract', extract_stage,
+              params={'source': source, 'source_hash': hash_source(source)}),
+        Stage('null_values', null_values_stage, deps=['extract'],
+              params={'threshold': missing_threshold, 'strategy': strategy},
+              modules=[data_without_null_values, knn_imputer]),
+        Stage('type_transform', type_transform_stage, deps=['null_values'],
+              modules=[data_transform]),
+        Stage('skewness', skewness_stage, deps=['type_transform'],
+              params={'threshold': skew_threshold}, modules=[data_without_skewness]),
+        Stage('outliers', outliers_stage, deps=['skewness'],
+              params={'bounds': outlier_bounds}, modules=[data_without_outliers]),
+        Stage('correlation', correlation_stage, deps=['outliers'],
+              params={'threshold': correlation_threshold},
+              modules=[data_without_higly_correlated_columns]),
+    ]
+    return Pipeline(stages, cache_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cleaning pipeline of 'customer_activity' with cached stages.")
+    parser.add_argument('--source', default=DEFAULT_SOURCE,
+                        help="Cache directory written by db_utils.py, or a Parquet, Feather or CSV file.")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="File for the output of the target stage.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--until', default=None, metavar='STAGE', help="Stop after this stage.")
+    parser.add_argument('--force', action='store_true', help="Recompute every stage, ignoring the cache.")
+    parser.add_argument('--missing-threshold', type=float, default=30)
+    parser.add_argument('--strategy', choices=['mean', 'median', 'knn'], default='median')
+    parser.add_argument('--skew-threshold', type=float, default=0.5)
+    parser.add_argument('--outlier-bounds', choices=['sequential', 'original'], default='sequential')
+    parser.add_argument('--correlation-threshold', type=float, default=0.9)
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Record every step and save the measurements as JSON lines (.jsonl) or Prometheus text (.prom).")
+    parser.add_argument('--profile', action='store_true', help="Run the steps under cProfile and print the slowest functions.")
+    args = parser.parse_args()
+
+    if args.metrics or args.profile:
+        INSTRUMENTATION.enable(profile=args.profile)
+
+    pipeline = build_pipeline(args.source, args.cache_dir, args.missing_threshold, args.strategy,
+                              args.skew_threshold, args.outlier_bounds, args.correlation_threshold)
+    df, report = pipeline.run(target=args.until, force=args.force)
+
+    save_dataframe(df, args.output)
+    print("\nPipeline stages:")
+    print(report.to_string(index=False))
+    print(f"\nOutput with {df.shape[0]} rows and {df.shape[1]} columns saved to {args.output}")
+
+    if args.metrics:
+        INSTRUMENTATION.write(args.metrics)
+    if args.profile:
+        INSTRUMENTATION.print_profile()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+VALID_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Declarative schema of 'customer_activity'. Every loader below applies the same
+# conversions as DataTransform.apply_transforms, but while reading. Numbers stay
+# int64 / float64: the cleaning scripts select their numeric columns with
+# select_dtypes(include=['float64', 'int64']), so a downcast column would silently
+# leave imputation, skewness, outliers and correlations, and NumPy returns float16 /
+# float32 results for int8 / float32 inputs. float32 would only save about 14% of the
+# frame, most of it being categories and timedeltas (see benchmarks/bench_typed_loader.py).
+CUSTOMER_ACTIVITY_SCHEMA = {
+    'administrative': 'count',
+    'administrative_duration': 'duration',
+    'informational': 'count',
+    'informational_duration': 'duration',
+    'product_related': 'count',
+    'product_related_duration': 'duration',
+    'bounce_rates': 'float',
+    'exit_rates': 'float',
+    'page_values': 'float',
+    'month': 'month',
+    'operating_systems': 'category',
+    'browser': 'category',
+    'region': 'category',
+    'traffic_type': 'category',
+    'visitor_type': 'category',
+    'weekend': 'bool',
+    'revenue': 'bool',
+}
+
+# dtypes handed to the CSV parser, so text columns become categories while parsing.
+# Numeric columns are parsed without a forced dtype: a bad cell would abort the whole
+# load, while 'apply_schema' coerces it to NaN and counts it as a failure.
+PARSE_DTYPES = {'month': 'category', 'category': 'category', 'bool': 'object'}
+
+# Month lookup table: invalid months become 'Jan', as in DataTransform.convert_month
+MONTH_DATES = pd.to_datetime(VALID_MONTHS, format='%b')
+
+def convert_month(series):
+    """Map month names to dates through the category codes instead of a per-row lambda."""
+    months = series.astype('category')
+    month_index = pd.Index(VALID_MONTHS).get_indexer(months.cat.categories)
+    # Categories that are not valid months fall back to 'Jan'. The trailing 'Jan' is
+    # what missing values (code -1) pick up, also when there are no categories at all
+    category_dates = MONTH_DATES[np.append(np.where(month_index >= 0, month_index, 0), 0)].to_numpy()
+    codes = months.cat.codes.to_numpy()
+    dates = category_dates[codes]
+    failures = int((np.append(month_index, -1)[codes] < 0).sum())
+    return pd.Series(dates, index=series.index, name=series.name), failures
+
+def apply_schema(df, schema=CUSTOMER_ACTIVITY_SCHEMA):
+    """Convert the columns of 'df' to their schema types and count failed values per column.
+
+    A value fails validation when it is present but cannot be converted (e.g. text in
+    a numeric column or an unknown month) or, for 'bool' and 'month' columns, when it
+    is missing and has to be replaced.
+    """
+    converted = {}
+    failures = {}
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if kind in ('count', 'float', 'duration'):
+            numeric = pd.to_numeric(series, errors='coerce')
+            failures[column] = int((numeric.isna() & series.notna()).sum())
+            if kind == 'duration':
+                converted[column] = pd.to_timedelta(numeric, unit='s')
+            elif kind == 'count' and not numeric.isna().any() and (numeric % 1 == 0).all():
+                converted[column] = numeric.astype('int64')
+            else:
+                converted[column] = numeric.astype('float64')
+        elif kind == 'month':
+            converted[column], failures[column] = convert_month(series)
+        elif kind == 'category':
+            converted[column] = series.astype('category')
+            failures[column] = 0
+        elif kind == 'bool':
+            text = series.astype('string').str.lower()
+            values = text.map({'true': True, 'false': False, '1': True, '0': False})
+            failures[column] = int(values.isna().sum())
+            # Missing values become True, like astype('bool') in DataTransform.convert_booleans
+            converted[column] = values.fillna(True).astype('bool')
+    return df.assign(**converted), pd.Series(failures, dtype='int64', name='failures')
+
+def load_csv(file_path, schema=CUSTOMER_ACTIVITY_SCHEMA, columns=None):
+    """Read a CSV export with the schema's types applied while parsing."""
+    header = pd.read_csv(file_path, nrows=0).columns
+    usecols = [column for column in header if columns is None or column in columns]
+    dtypes = {column: PARSE_DTYPES[kind] for column, kind in schema.items() if column in usecols and kind in PARSE_DTYPES}
+    df = pd.read_csv(file_path, usecols=usecols, dtype=dtypes)
+    return apply_schema(df, schema)
+
+def load_cache(cache, schema=CUSTOMER_ACTIVITY_SCHEMA, columns=None):
+    """Read the local Parquet cache (see data_cache.py) and apply the schema."""
+    return apply_schema(cache.load(columns=columns), schema)
+
+def load_sql(connector, table_name='customer_activity', schema=CUSTOMER_ACTIVITY_SCHEMA, columns=None,
+             chunksize=50000):
+    """Stream the table from the database, applying the schema to every chunk before concatenating.
+
+    Each chunk only holds some of the values of a categorical column, so the chunks are
+    given the sorted union of their categories (like one 'astype("category")' over the
+    whole table) before concatenating; otherwise those columns would fall back to text.
+    """
+    frames = []
+    failures = pd.Series(dtype='int64', name='failures')
+    for chunk in connector.fetch_data_in_chunks(table_name, columns=columns, chunksize=chunksize):
+        chunk, chunk_failures = apply_schema(chunk, schema)
+        frames.append(chunk)
+        failures = failures.add(chunk_failures, fill_value=0).astype('int64')
+    if not frames:
+        return pd.DataFrame(), failures
+    categories = {}
+    for column in frames[0].select_dtypes(include=['category']).columns:
+        values = set().union(*(frame[column].cat.categories for frame in frames))
+        categories[column] = pd.CategoricalDtype(pd.Index(sorted(values), dtype=frames[0][column].cat.categories.dtype))
+    frames = [frame.astype(categories) for frame in frames]
+    return pd.concat(frames, ignore_index=True), failures
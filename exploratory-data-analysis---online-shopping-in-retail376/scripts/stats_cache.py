@@ -0,0 +1,155 @@
+import weakref
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+class ColumnStatsCache:
+    """Cache of per-column statistics shared by the DataFrameTransform classes.
+
+    Every entry remembers the buffer of the column it was computed from. When a
+    column is reassigned or the rows are filtered, pandas hands back a new buffer,
+    so the entry no longer matches and is recomputed on the next request. Entries
+    only hold a weak reference to the array owning that buffer, so an old frame is
+    not kept alive by the cache: once it is freed (and its address could be reused),
+    its entries are dropped. Methods that write into a column in place must call
+    'invalidate' for that column.
+    Missing statistics are computed in one batch call for all requested columns,
+    split across a process pool when a ColumnEngine is given.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.entries = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @staticmethod
+    def _fingerprint(series):
+        """Identify the data a column points to: buffer address, length, stride and dtype.
+
+        Also return the array owning the buffer (the end of the '.base' chain, e.g. the
+        whole pandas block), which keeps the address valid for as long as it lives.
+        """
+        values = series.to_numpy()
+        owner = values
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        return (values.__array_interface__['data'][0], len(values), values.strides, str(values.dtype)), owner
+
+    @staticmethod
+    def _alive(refs):
+        return all(ref() is not None for ref in refs)
+
+    def _lookup(self, key, fingerprint):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint and self._alive(entry[1]):
+            self.hits[key[0]] += 1
+            return True, entry[2]
+        self.misses[key[0]] += 1
+        return False, None
+
+    def _store(self, key, fingerprint, owners, value):
+        """Add an entry, first dropping the entries whose frame has been freed."""
+        for stale in [name for name, entry in self.entries.items() if not self._alive(entry[1])]:
+            del self.entries[stale]
+        self.entries[key] = (fingerprint, [weakref.ref(owner) for owner in owners], value)
+
+    def column_stat(self, df, name, columns, compute):
+        """Return a Series of statistic 'name' for 'columns', computing only the stale ones.
+
+        'compute' receives the sub-frame of the columns to compute and returns a Series
+        indexed by column name.
+        """
+        results = {}
+        missing = []
+        fingerprints = {}
+        for column in columns:
+            fingerprints[column] = self._fingerprint(df[column])
+            found, value = self._lookup((name, column), fingerprints[column][0])
+            if found:
+                results[column] = value
+            else:
+                missing.append(column)
+
+        if missing:
+            computed = compute(df[missing])
+            for column in missing:
+                fingerprint, owner = fingerprints[column]
+                self._store((name, column), fingerprint, [owner], computed[column])
+                results[column] = computed[column]
+
+        return pd.Series(results, index=list(columns), dtype='float64')
+
+    def numeric_columns(self, df):
+        """Cached equivalent of df.select_dtypes(include=['float64', 'int64']).columns."""
+        key = ('numeric_columns', tuple(df.columns), tuple(df.dtypes.astype(str)))
+        found, value = self._lookup(key, key)
+        if not found:
+            value = df.select_dtypes(include=['float64', 'int64']).columns
+            self._store(key, key, [], value)
+        return value
+
+    def batch(self, stat, **params):
+        """Compute function for 'column_stat': the engine when there is one, pandas otherwise."""
+        if self.engine is not None:
+            return lambda sub_df: self.engine.column_stats(sub_df, sub_df.columns, stat, **params)
+        return lambda sub_df: getattr(sub_df, stat)(**params)
+
+    def skew(self, df, columns):
+        """Not cached: each frame's skewness is only asked for once, before its columns are transformed."""
+        return self.batch('skew')(df[list(columns)]).astype('float64')
+
+    def min(self, df, columns):
+        return self.column_stat(df, 'min', columns, self.batch('min'))
+
+    def mean(self, df, columns):
+        return self.column_stat(df, 'mean', columns, self.batch('mean'))
+
+    def median(self, df, columns):
+        return self.column_stat(df, 'median', columns, self.batch('median'))
+
+    def std(self, df, columns, ddof=0):
+        return self.column_stat(df, f'std_ddof{ddof}', columns, self.batch('std', ddof=ddof))
+
+    def quantile(self, df, columns, q):
+        return self.column_stat(df, f'quantile_{q}', columns, self.batch('quantile', q=q))
+
+    def zscores(self, df, columns):
+        """Absolute z-scores of the columns (like np.abs(stats.zscore(df[columns]))) from cached moments."""
+        return np.abs((df[columns] - self.mean(df, columns)) / self.std(df, columns, ddof=0))
+
+    def corr(self, df, columns):
+        """Correlation matrix of the columns, reused while none of them has changed."""
+        fingerprints = [self._fingerprint(df[column]) for column in columns]
+        key = ('corr', tuple(columns))
+        fingerprint = tuple(f for f, _ in fingerprints)
+        found, value = self._lookup(key, fingerprint)
+        if not found:
+            value = df[columns].corr()
+            self._store(key, fingerprint, [owner for _, owner in fingerprints], value)
+        return value
+
+    def invalidate(self, columns=None):
+        """Drop the cached statistics of the given columns (or of every column)."""
+        if columns is None:
+            self.entries.clear()
+            return
+        columns = set(columns)
+        for key in list(self.entries):
+            name, target = key[0], key[1]
+            if name == 'numeric_columns':
+                continue
+            targets = set(target) if isinstance(target, tuple) else {target}
+            if targets & columns:
+                del self.entries[key]
+
+    def summary(self):
+        """Hits and misses per statistic, to see how much work the cache saved."""
+        names = sorted(set(self.hits) | set(self.misses))
+        summary = pd.DataFrame({
+            'hits': [self.hits[name] for name in names],
+            'misses': [self.misses[name] for name in names],
+        }, index=names)
+        summary['hit_rate'] = summary['hits'] / (summary['hits'] + summary['misses'])
+        return summary
@@ -0,0 +1,393 @@
+import contextlib
+import gzip
+import json
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Folder of the project (the parent of 'scripts'), where the scripts read and write their data files
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Formats are picked from the file extension so the same call works for every stage
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+
+# CSV files can be compressed by adding one of these extensions (e.g. 'data.csv.gz')
+CSV_COMPRESSION = {'.gz': 'gzip', '.zst': 'zstd'}
+
+# Rows formatted per CSV task; each task becomes one block of the file (one gzip member / zstd frame)
+CSV_CHUNKSIZE = 100000
+
+# Directory name of missing partition values, as written by Hive, Spark and Arrow
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# Sidecar of a partitioned directory with the column order and the dtypes of the partition columns,
+# which the directory names alone do not keep
+PARTITION_SCHEMA_FILE = '_schema.json'
+
+def split_extension(file_path):
+    """Return the format extension and the CSV compression of a path, e.g. ('.csv', 'gzip') for 'data.csv.gz'."""
+    root, extension = os.path.splitext(file_path)
+    extension = extension.lower()
+    compression = CSV_COMPRESSION.get(extension)
+    if compression is not None:
+        extension = os.path.splitext(root)[1].lower()
+        if extension != '.csv':
+            raise ValueError(f"Only CSV files can be compressed by extension, not '{file_path}'.")
+    return extension, compression
+
+def get_format(file_path):
+    """Return 'parquet', 'feather' or 'csv' depending on the file extension."""
+    extension, _ = split_extension(file_path)
+    if extension in COLUMNAR_FORMATS:
+        return COLUMNAR_FORMATS[extension]
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError(f"Unsupported file extension '{extension}'. Use .parquet, .feather, .csv, .csv.gz or .csv.zst.")
+
+def remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+@contextlib.contextmanager
+def atomic_path(file_path):
+    """Yield a temporary path next to 'file_path' that replaces it once the block completes.
+
+    A crash or an exception leaves 'file_path' as it was and removes the temporary
+    file (or directory). A file is swapped in with a single rename; a directory that
+    already exists is moved aside first, so readers never see a half-written one.
+    Nothing is created if the block writes nothing. The temporary name keeps the
+    extensions of 'file_path', so the format can still be read from it.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    tmp_path = os.path.join(directory, f".tmp-{os.getpid()}.{name}")
+    remove_path(tmp_path)
+    try:
+        yield tmp_path
+        if os.path.exists(tmp_path):
+            if os.path.isdir(tmp_path) and os.path.exists(file_path):
+                old_path = os.path.join(directory, f".old-{os.getpid()}.{name}")
+                os.replace(file_path, old_path)
+                os.replace(tmp_path, file_path)
+                remove_path(old_path)
+            else:
+                os.replace(tmp_path, file_path)
+    finally:
+        remove_path(tmp_path)
+
+def csv_table(chunk):
+    """Arrow table of a chunk, with the columns Arrow's CSV writer cannot write as we want converted.
+
+    Durations are written as seconds (the unit of the source table) and dates without
+    a time of day as YYYY-MM-DD, like pandas.
+    """
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    for index, field in enumerate(table.schema):
+        column = table.column(index)
+        if pa.types.is_duration(field.type):
+            seconds = pc.divide(pc.cast(column, pa.int64()), {'s': 1, 'ms': 1e3, 'us': 1e6, 'ns': 1e9}[field.type.unit])
+            table = table.set_column(index, field.name, seconds)
+        elif pa.types.is_timestamp(field.type) and field.type.tz is None:
+            dates = pc.cast(column, pa.date32())
+            if pc.all(pc.equal(pc.cast(dates, field.type), column)).as_py() is not False:
+                table = table.set_column(index, field.name, dates)
+    return table
+
+def encode_csv_chunk(chunk, header, compression):
+    """CSV bytes of one chunk, compressed as a self-contained gzip member or zstd frame.
+
+    Arrow's CSV writer, zlib and zstd all release the GIL, so chunks are encoded in
+    parallel threads; concatenated members (or frames) form a valid compressed file.
+    """
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(csv_table(chunk), sink, pa_csv.WriteOptions(include_header=header))
+    data = sink.getvalue()
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == 'zstd':
+        return pa.Codec('zstd').compress(data, asbytes=True)
+    return data.to_pybytes()
+
+def write_csv(chunks, file_path, compression=None, max_workers=None):
+    """Write DataFrame chunks to one CSV file, encoding them on 'max_workers' threads. Return the rows written.
+
+    Chunks are written in order, and at most two per thread are held in memory at a time.
+    """
+    max_workers = max_workers or os.cpu_count()
+    rows_written = 0
+    pending = deque()
+    file = None
+    try:
+        with ThreadPoolExecutor(max_workers) as executor:
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                if file is None:
+                    file = open(file_path, 'wb')
+                pending.append(executor.submit(encode_csv_chunk, chunk, rows_written == 0, compression))
+                rows_written += len(chunk)
+                while len(pending) > 2 * max_workers:
+                    file.write(pending.popleft().result())
+            while pending:
+                file.write(pending.popleft().result())
+    finally:
+        if file is not None:
+            file.close()
+    return rows_written
+
+def row_chunks(df, chunksize=CSV_CHUNKSIZE):
+    """Split a DataFrame into consecutive chunks of at most 'chunksize' rows."""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def write_file(df, file_path, compression='zstd', max_workers=None):
+    """Write a DataFrame to 'file_path' in the format of its extension (not atomic, see 'save_dataframe')."""
+    file_format = get_format(file_path)
+    if file_format == 'parquet':
+        table = pa.Table.from_pandas(df, preserve_index=False, nthreads=max_workers or os.cpu_count())
+        pq.write_table(table, file_path, compression=compression)
+    elif file_format == 'feather':
+        feather.write_feather(df.reset_index(drop=True), file_path, compression=compression)
+    else:
+        write_csv(row_chunks(df), file_path, split_extension(file_path)[1], max_workers)
+
+def save_dataframe(df, file_path, compression='zstd', partition_cols=None, max_workers=None):
+    """Save a DataFrame keeping its dtypes (category, timedelta, bool...) in a compressed columnar file.
+
+    CSV files are written by several threads, gzip or zstd compressed for '.csv.gz' or
+    '.csv.zst'. With 'partition_cols', 'file_path' is a directory (see 'save_partitioned').
+    The file only appears, or replaces the previous one, once it is complete.
+    """
+    if partition_cols:
+        return save_partitioned(df, file_path, partition_cols, compression=compression, max_workers=max_workers)
+    get_format(file_path)  # Unsupported extensions fail before anything is written
+    with atomic_path(file_path) as tmp_path:
+        write_file(df, tmp_path, compression, max_workers)
+
+def partition_directory(partition_cols, values):
+    """Hive-style relative directory of one partition, e.g. 'month=May/region=Asia'."""
+    parts = []
+    for column, value in zip(partition_cols, values):
+        if pd.isna(value):
+            label = NULL_PARTITION
+        elif isinstance(value, pd.Timestamp) and value == value.normalize():
+            label = value.date().isoformat()  # Like the dates of the CSV files
+        else:
+            label = quote(str(value), safe='')
+        parts.append(f"{column}={label}")
+    return os.path.join(*parts)
+
+def save_partitioned(df, directory, partition_cols, extension='.parquet', compression='zstd', max_workers=None):
+    """Write one file per combination of 'partition_cols' values, in the Hive layout (month=May/part-0.parquet).
+
+    Spark, Arrow and 'load_dataframe' read the directory back as one table. The
+    partition columns are only stored in the directory names; their dtypes and the
+    column order are kept in '_schema.json', so 'load_dataframe' returns the frame
+    as it was saved (other readers see the partition columns as text). Partitions are written
+    on 'max_workers' threads into a temporary directory that replaces 'directory' once
+    every file is complete. Return the number of rows of each partition.
+    """
+    partition_cols = [partition_cols] if isinstance(partition_cols, str) else list(partition_cols)
+    get_format('part-0' + extension)
+
+    def write(item):
+        values, group = item
+        partition = partition_directory(partition_cols, values)
+        folder = os.path.join(tmp_dir, partition)
+        os.makedirs(folder, exist_ok=True)
+        write_file(group.drop(columns=partition_cols), os.path.join(folder, 'part-0' + extension), compression, 1)
+        return partition, len(group)
+
+    with atomic_path(directory) as tmp_dir:
+        os.makedirs(tmp_dir)
+        schema = {'columns': [str(column) for column in df.columns],
+                  'partition_dtypes': {column: describe_dtype(df[column]) for column in partition_cols}}
+        with open(os.path.join(tmp_dir, PARTITION_SCHEMA_FILE), 'w') as file:
+            json.dump(schema, file)
+        groups = df.groupby(partition_cols, observed=True, dropna=False, sort=True)
+        with ThreadPoolExecutor(max_workers or os.cpu_count()) as executor:
+            rows = dict(executor.map(write, groups))
+    print(f"\n{len(df)} rows saved to {directory} in {len(rows)} partitions by {partition_cols}")
+    return rows
+
+def save_chunks(chunks, file_path, compression='zstd', max_workers=None):
+    """Write an iterable of DataFrame chunks to a single file, one chunk at a time. Return the rows written.
+
+    CSV chunks are encoded on 'max_workers' threads. The file only appears, or replaces
+    the previous one, once every chunk is written.
+    """
+    file_format = get_format(file_path)
+    with atomic_path(file_path) as tmp_path:
+        if file_format == 'csv':
+            parts = (part for chunk in chunks for part in row_chunks(chunk))
+            return write_csv(parts, tmp_path, split_extension(file_path)[1], max_workers)
+
+        writer = None
+        schema = None
+        rows_written = 0
+        try:
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    if file_format == 'parquet':
+                        writer = pq.ParquetWriter(tmp_path, schema, compression=compression)
+                    else:
+                        options = pa.ipc.IpcWriteOptions(compression=compression)
+                        writer = pa.ipc.new_file(tmp_path, schema, options=options)
+                # Later chunks are cast to the schema of the first one
+                writer.write_table(table.cast(schema))
+                rows_written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows_written
+
+def partition_files(directory):
+    """Yield (file path, {partition column: value}) for every data file under a partitioned directory.
+
+    Hidden files and files starting with '_' (temporary files, '_watermark.json') are skipped.
+    """
+    for root, folders, files in os.walk(directory):
+        folders[:] = sorted(folder for folder in folders if not folder.startswith(('.', '_')))
+        relative = os.path.relpath(root, directory)
+        partition = {}
+        for part in ([] if relative == '.' else relative.split(os.sep)):
+            column, _, label = part.partition('=')
+            partition[column] = None if label == NULL_PARTITION else unquote(label)
+        for name in sorted(files):
+            if name.startswith(('.', '_')):
+                continue
+            try:
+                get_format(name)
+            except ValueError:
+                continue
+            yield os.path.join(root, name), partition
+
+def describe_dtype(series):
+    """JSON description of the dtype of a partition column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        return {'dtype': 'category', 'categories': [str(value) for value in categories],
+                'categories_dtype': str(categories.dtype), 'ordered': bool(series.cat.ordered)}
+    return {'dtype': str(series.dtype)}
+
+def parse_labels(labels, dtype):
+    """Convert partition labels (text, None when missing) back to 'dtype'."""
+    labels = pd.Series(labels, dtype=object)
+    if dtype == 'bool':
+        values = labels.map({'True': True, 'False': False})
+    elif dtype.startswith('datetime64'):
+        values = pd.to_datetime(labels)
+    elif dtype.startswith('timedelta64'):
+        values = pd.to_timedelta(labels)
+    elif dtype in ('str', 'string', 'object'):
+        values = labels
+    else:
+        values = pd.to_numeric(labels)
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        return values  # A missing value in an integer or bool column
+
+def partition_values(value, spec):
+    """One-row Series holding a partition value in the dtype described by 'spec' (text without one)."""
+    if spec is None:
+        return pd.Series([value], dtype='str')
+    if spec['dtype'] == 'category':
+        categories = parse_labels(spec['categories'], spec['categories_dtype'])
+        dtype = pd.CategoricalDtype(categories, ordered=spec['ordered'])
+        return pd.Series(pd.Categorical(parse_labels([value], spec['categories_dtype']), dtype=dtype))
+    return parse_labels([value], spec['dtype'])
+
+def read_partition_schema(directory):
+    """The '_schema.json' of a partitioned directory, or None if it was not written by 'save_partitioned'."""
+    path = os.path.join(directory, PARTITION_SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def add_partition_columns(frame, partition, columns=None, schema=None):
+    """Add the partition values of a file as columns, in their saved dtypes and order when 'schema' is given."""
+    dtypes = schema['partition_dtypes'] if schema is not None else {}
+    for column, value in partition.items():
+        if columns is None or column in columns:
+            values = partition_values(value, dtypes.get(column))
+            frame[column] = values.take(np.zeros(len(frame), dtype='intp')).set_axis(frame.index)
+    if schema is not None and columns is None:
+        order = [column for column in schema['columns'] if column in frame.columns]
+        frame = frame[order + [column for column in frame.columns if column not in order]]
+    return frame
+
+def load_partitioned(directory, columns=None):
+    """Load a directory written by 'save_partitioned', with the partition columns in their saved dtypes."""
+    schema = read_partition_schema(directory)
+    frames = []
+    for file_path, partition in partition_files(directory):
+        file_columns = None if columns is None else [column for column in columns if column not in partition]
+        frames.append(add_partition_columns(load_dataframe(file_path, file_columns), partition, columns, schema))
+    if not frames:
+        raise ValueError(f"No data files in '{directory}'.")
+    df = pd.concat(frames, ignore_index=True)
+    return df[columns] if columns is not None else df
+
+def iter_chunks(file_path, chunksize=100000, columns=None):
+    """Yield a file (or a partitioned directory, or the local cache) as DataFrames of at most 'chunksize' rows.
+
+    Only one chunk is held in memory at a time, whatever the size of the file.
+    """
+    if os.path.isdir(file_path):
+        schema = read_partition_schema(file_path)
+        for part_path, partition in partition_files(file_path):
+            file_columns = None if columns is None else [column for column in columns if column not in partition]
+            for chunk in iter_chunks(part_path, chunksize, file_columns):
+                chunk = add_partition_columns(chunk, partition, columns, schema)
+                yield chunk[columns] if columns is not None else chunk
+        return
+    file_format = get_format(file_path)
+    if file_format == 'parquet':
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif file_format == 'feather':
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    elif split_extension(file_path)[1] == 'zstd':
+        with pa.CompressedInputStream(pa.OSFile(file_path), 'zstd') as stream:
+            yield from pd.read_csv(stream, usecols=columns, chunksize=chunksize)
+    else:
+        with pd.read_csv(file_path, usecols=columns, chunksize=chunksize) as reader:
+            yield from reader
+
+def load_dataframe(file_path, columns=None, memory_map=True):
+    """Load a file saved with 'save_dataframe', optionally reading only some columns.
+
+    Columnar files are memory-mapped, so only the projected columns are actually read.
+    A directory is read as the partitions written by 'save_partitioned'.
+    """
+    if os.path.isdir(file_path):
+        return load_partitioned(file_path, columns)
+    file_format = get_format(file_path)
+    if file_format == 'parquet':
+        return pd.read_parquet(file_path, columns=columns, memory_map=memory_map)
+    if file_format == 'feather':
+        return feather.read_table(file_path, columns=columns, memory_map=memory_map).to_pandas()
+    if split_extension(file_path)[1] == 'zstd':
+        # pandas needs the optional 'zstandard' package for .zst, Arrow reads every frame natively
+        with pa.CompressedInputStream(pa.OSFile(file_path), 'zstd') as stream:
+            return pd.read_csv(stream, usecols=columns)
+    return pd.read_csv(file_path, usecols=columns)
@@ -0,0 +1,413 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from storage import PROJECT_DIR, iter_chunks
+
+# Columns the sessions are stratified by: purchases, new and returning visitors and seasons are all kept
+STRATA = ['revenue', 'visitor_type', 'month']
+
+class StratifiedSample:
+    """Reproducible stratified random sample of a table, drawn in one streaming pass.
+
+    Every row gets a random key from a seeded generator; each stratum keeps the
+    'rows_per_stratum' rows with the smallest keys (reservoir sampling), so rare strata
+    such as purchases by new visitors in February are as well covered as common ones.
+    Keys are drawn in row order, so the sample does not depend on the chunk size. Each
+    sampled row stands for N_h / n_h rows of its stratum (population / sampled rows),
+    and the estimates below are weighted accordingly, with confidence intervals from
+    the stratified variance formulas (means, totals, quantiles), Fisher's z with the
+    effective sample size (correlations) or a stratified bootstrap (skewness).
+    """
+
+    def __init__(self, strata=STRATA, rows_per_stratum=1000, seed=0):
+        self.strata_columns = [strata] if isinstance(strata, str) else list(strata)
+        self.rows_per_stratum = rows_per_stratum
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.strata = {}                                # Stratum values -> stratum number
+        self.population = np.zeros(0, dtype='int64')    # Rows seen per stratum
+        self.rows = None                                # Sampled rows, with their 'keys' and 'labels'
+        self.keys = None
+        self.labels = None
+
+    # Step 1: Draw the sample
+    def stratum_labels(self, chunk):
+        """Number of the stratum of every row of a chunk, registering the strata not seen yet."""
+        # Each column is factorized on its own and the codes combined, instead of hashing row tuples
+        combined = np.zeros(len(chunk), dtype='int64')
+        column_uniques = []
+        for column in self.strata_columns:
+            codes, uniques = pd.factorize(chunk[column], use_na_sentinel=False)
+            combined = combined * len(uniques) + codes
+            column_uniques.append(uniques)
+        combinations, codes = np.unique(combined, return_inverse=True)
+        numbers = np.empty(len(combinations), dtype='int64')
+        for position, combination in enumerate(combinations):
+            values = []
+            for uniques in reversed(column_uniques):
+                combination, code = divmod(combination, len(uniques))
+                value = uniques[code]
+                values.append(None if pd.isna(value) else value)
+            numbers[position] = self.strata.setdefault(tuple(reversed(values)), len(self.strata))
+        return numbers[codes.ravel()]
+
+    def smallest_keys(self, keys, labels):
+        """Positions of the 'rows_per_stratum' smallest keys of every stratum."""
+        order = np.lexsort((keys, labels))
+        sorted_labels = labels[order]
+        starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return np.sort(order[rank < self.rows_per_stratum])
+
+    def update(self, chunk):
+        """Add the rows of a chunk to the population counts and to the reservoirs."""
+        if chunk.empty:
+            return self
+        keys = self.rng.random(len(chunk))
+        labels = self.stratum_labels(chunk)
+        self.population = np.pad(self.population, (0, len(self.strata) - len(self.population)))
+        self.population += np.bincount(labels, minlength=len(self.strata))
+
+        # Only rows with a smaller key than the largest one kept in their (full) reservoir can enter it
+        threshold = np.full(len(self.strata), np.inf)
+        if self.rows is not None:
+            full = np.bincount(self.labels, minlength=len(self.strata)) >= self.rows_per_stratum
+            largest = np.full(len(self.strata), -np.inf)
+            np.maximum.at(largest, self.labels, self.keys)
+            threshold[full] = largest[full]
+        candidates = np.flatnonzero(keys < threshold[labels])
+        keep = candidates[self.smallest_keys(keys[candidates], labels[candidates])]
+        rows = chunk.iloc[keep].reset_index(drop=True)
+        keys, labels = keys[keep], labels[keep]
+        if self.rows is not None:
+            rows = pd.concat([self.rows, rows], ignore_index=True)
+            keys = np.concatenate([self.keys, keys])
+            labels = np.concatenate([self.labels, labels])
+            keep = self.smallest_keys(keys, labels)
+            rows = rows.iloc[keep].reset_index(drop=True)
+            keys, labels = keys[keep], labels[keep]
+        self.rows, self.keys, self.labels = rows, keys, labels
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        sample = cls(**kwargs)
+        for chunk in chunks:
+            sample.update(chunk)
+        return sample
+
+    @classmethod
+    def from_source(cls, source, chunksize=100000, table_name='customer_activity', **kwargs):
+        """Sample a CSV, Parquet or Feather file, the local cache directory or a database connector."""
+        if hasattr(source, 'fetch_data_in_chunks'):
+            chunks = source.fetch_data_in_chunks(table_name, chunksize=chunksize)
+        else:
+            chunks = iter_chunks(source, chunksize)
+        return cls.from_chunks(chunks, **kwargs)
+
+    # Step 2: Describe the sample
+    @property
+    def frame(self):
+        """The sampled rows (not a uniform sample: use 'weights', or 'proportional()' for plots)."""
+        self.check_fitted()
+        return self.rows
+
+    @property
+    def weights(self):
+        """Number of rows of the table each sampled row stands for."""
+        self.check_fitted()
+        sampled = np.bincount(self.labels, minlength=len(self.strata))
+        return pd.Series(self.population[self.labels] / sampled[self.labels], index=self.rows.index, name='weight')
+
+    def check_fitted(self):
+        if self.rows is None:
+            raise RuntimeError("The sample is empty. Call 'update()' or 'from_source()' first.")
+
+    def summary(self):
+        """Population and sampled rows of every stratum."""
+        self.check_fitted()
+        index = pd.MultiIndex.from_tuples(list(self.strata), names=self.strata_columns)
+        sampled = np.bincount(self.labels, minlength=len(self.strata))
+        summary = pd.DataFrame({'population': self.population, 'sampled': sampled}, index=index)
+        return summary.sort_index()
+
+    def proportional(self, n_rows=None):
+        """An equal-probability subsample (every stratum in its population share), to plot without weights.
+
+        At most as many rows as the least sampled stratum allows are returned.
+        """
+        self.check_fitted()
+        sampled = np.bincount(self.labels, minlength=len(self.strata))
+        share = self.population / self.population.sum()
+        largest = int(np.min(sampled[share > 0] / share[share > 0]))
+        n_rows = largest if n_rows is None else min(n_rows, largest)
+        # The rows with the smallest keys of a reservoir are a uniform sample of its stratum
+        quota = np.floor(share * n_rows).astype('int64')
+        order = np.lexsort((self.keys, self.labels))
+        starts = np.r_[0, np.cumsum(sampled)[:-1]]
+        rank = np.arange(len(order)) - starts[self.labels[order]]
+        keep = np.sort(order[rank < quota[self.labels[order]]])
+        return self.rows.iloc[keep].reset_index(drop=True)
+
+    def numeric_columns(self):
+        columns = self.rows.select_dtypes(include=['number', 'timedelta']).columns
+        return [column for column in columns if column not in self.strata_columns]
+
+    def values(self, column):
+        """A column as float64: durations in seconds, booleans as 0 or 1."""
+        series = self.rows[column]
+        if pd.api.types.is_timedelta64_dtype(series):
+            series = series.dt.total_seconds()
+        return series.to_numpy(dtype='float64', na_value=np.nan)
+
+    # Step 3: Estimates with confidence intervals
+    def strata_sums(self, arrays, domains, n_domains):
+        """Sum of every array per stratum (rows) and domain (columns)."""
+        cells = self.labels * n_domains + domains
+        size = len(self.strata) * n_domains
+        return [np.bincount(cells, weights=array, minlength=size).reshape(len(self.strata), n_domains)
+                for array in arrays]
+
+    def stratified_variance(self, sum_z, sum_zz):
+        """Variance of an estimated total, sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h, from the per stratum sums of z and z^2."""
+        sampled = np.bincount(self.labels, minlength=len(self.strata)).astype('float64')[:, None]
+        population = self.population.astype('float64')[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.where(sampled > 1, (sum_zz - sum_z ** 2 / sampled) / (sampled - 1), 0.0)
+            finite_population = np.where(sampled > 0, 1 - sampled / population, 0.0)
+            return np.maximum(population ** 2 * finite_population * variance / np.maximum(sampled, 1), 0).sum(axis=0)
+
+    def domains(self, by):
+        """Group number of every sampled row and the group labels, for 'by' columns (one group if None)."""
+        if by is None:
+            return np.zeros(len(self.rows), dtype='int64'), None
+        by = [by] if isinstance(by, str) else list(by)
+        codes, groups = pd.MultiIndex.from_frame(self.rows[by]).factorize()
+        groups = groups.set_names(by)
+        return np.asarray(codes, dtype='int64'), groups.get_level_values(0) if len(by) == 1 else groups
+
+    def estimate(self, kind, columns, by, confidence):
+        """Weighted totals or means (the ratio of the total to the number of known values) per group.
+
+        The variance of a mean R = Y / X comes from the linearized values y - R x, whose
+        per stratum sums follow from those of y, x, y^2, xy and x^2.
+        """
+        self.check_fitted()
+        single = isinstance(columns, str)
+        columns = self.numeric_columns() if columns is None else [columns] if single else list(columns)
+        domains, groups = self.domains(by)
+        n_domains = 1 if groups is None else len(groups)
+        weights = self.weights.to_numpy()
+        z = stats.norm.ppf(0.5 + confidence / 2)
+
+        results = {}
+        for column in columns:
+            values = self.values(column)
+            x = (~np.isnan(values)).astype('float64')
+            y = np.nan_to_num(values)
+            total_y = np.bincount(domains, weights=weights * y, minlength=n_domains)
+            if kind == 'total':
+                estimate = total_y
+                variance = self.stratified_variance(*self.strata_sums([y, y * y], domains, n_domains))
+            else:
+                total_x = np.bincount(domains, weights=weights * x, minlength=n_domains)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    estimate = total_y / total_x
+                sum_y, sum_x, sum_yy, sum_xy = self.strata_sums([y, x, y * y, x * y], domains, n_domains)
+                ratio = np.nan_to_num(estimate)
+                # x is 0 or 1, so the sum of x^2 is the sum of x
+                sum_z = sum_y - ratio * sum_x
+                sum_zz = sum_yy - 2 * ratio * sum_xy + ratio ** 2 * sum_x
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    variance = self.stratified_variance(sum_z, sum_zz) / total_x ** 2
+            error = np.sqrt(variance)
+            results[column] = pd.DataFrame({'estimate': estimate, 'lower': estimate - z * error,
+                                            'upper': estimate + z * error, 'std_error': error},
+                                           index=groups if groups is not None else None)
+        if groups is None:
+            result = pd.concat(results).droplevel(1)
+            return result.loc[columns[0]] if single else result
+        result = pd.concat(results, names=['column']).sort_index()
+        return result.loc[columns[0]] if single else result
+
+    def mean(self, columns=None, by=None, confidence=0.95):
+        """Estimated means of 'columns' (all numerical ones by default), optionally per group of 'by'."""
+        return self.estimate('mean', columns, by, confidence)
+
+    def total(self, columns=None, by=None, confidence=0.95):
+        """Estimated sums of 'columns' over the whole table, optionally per group of 'by'."""
+        return self.estimate('total', columns, by, confidence)
+
+    def group_revenue(self, by, column='revenue', confidence=0.95):
+        """Estimated sessions, purchases and conversion rate per group, like the notebook's revenue group-bys."""
+        purchases = self.total(column, by, confidence)
+        conversion = self.mean(column, by, confidence)
+        domains, groups = self.domains(by)
+        sessions = pd.Series(np.bincount(domains, weights=self.weights.to_numpy(), minlength=len(groups)), index=groups)
+        return pd.DataFrame({
+            'sessions': sessions.reindex(purchases.index),
+            'purchases': purchases['estimate'], 'purchases_lower': purchases['lower'],
+            'purchases_upper': purchases['upper'],
+            'conversion_rate': conversion['estimate'], 'conversion_lower': conversion['lower'],
+            'conversion_upper': conversion['upper'],
+        }, index=purchases.index)
+
+    def quantile(self, q=0.5, columns=None, confidence=0.95):
+        """Estimated quantile of 'columns', with Woodruff's interval.
+
+        The interval of the share of rows below the estimate, p +/- z * SE(p), is mapped
+        back to values through the weighted distribution of the sample.
+        """
+        self.check_fitted()
+        single = isinstance(columns, str)
+        columns = self.numeric_columns() if columns is None else [columns] if single else list(columns)
+        weights = self.weights.to_numpy()
+        domains = np.zeros(len(self.rows), dtype='int64')
+        z = stats.norm.ppf(0.5 + confidence / 2)
+
+        results = {}
+        for column in columns:
+            values = self.values(column)
+            present = ~np.isnan(values)
+            order = np.argsort(values[present], kind='stable')
+            sorted_values = values[present][order]
+            if sorted_values.size == 0:
+                results[column] = {'estimate': np.nan, 'lower': np.nan, 'upper': np.nan}
+                continue
+            share = np.cumsum(weights[present][order])
+            share /= share[-1]
+
+            def value_at(p):
+                return sorted_values[min(np.searchsorted(share, np.clip(p, 0, 1)), len(sorted_values) - 1)]
+
+            estimate = value_at(q)
+            below = (present & (values <= estimate)).astype('float64')
+            x = present.astype('float64')
+            sum_y, sum_x = self.strata_sums([below, x], domains, 1)
+            total_x = (weights * x).sum()
+            p = (weights * below).sum() / total_x
+            # The indicators are 0 or 1, so y^2 = xy = y and x^2 = x
+            variance = self.stratified_variance(sum_y - p * sum_x, sum_y * (1 - 2 * p) + p ** 2 * sum_x)[0] / total_x ** 2
+            error = np.sqrt(variance)
+            results[column] = {'estimate': estimate, 'lower': value_at(p - z * error), 'upper': value_at(p + z * error)}
+        result = pd.DataFrame.from_dict(results, orient='index')
+        return result.loc[columns[0]] if single else result
+
+    def skew(self, columns=None, confidence=0.95, replicates=200, batch_size=50):
+        """Estimated skewness (like 'Series.skew') of 'columns', with a stratified bootstrap interval.
+
+        Each replicate redraws every stratum's rows with replacement from the stratum. A
+        replicate only changes how many times each row is counted, so its moments are
+        the product of those counts with the weighted powers of the rows, computed once;
+        'batch_size' replicates are taken in one matrix product.
+        """
+        self.check_fitted()
+        single = isinstance(columns, str)
+        columns = self.numeric_columns() if columns is None else [columns] if single else list(columns)
+        values = np.column_stack([self.values(column) for column in columns])
+        weights = self.weights.to_numpy()
+        present = ~np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Powers are taken around the sample mean, which limits cancellation in m3 - 3 m1 m2 + 2 m1^3
+            shift = np.nan_to_num(np.nansum(values * weights[:, None], axis=0) / (present * weights[:, None]).sum(axis=0))
+        deviations = np.where(present, values - shift, 0.0)
+        powers = np.hstack([present, deviations, deviations ** 2, deviations ** 3]) * weights[:, None]
+        estimate = skew_from_sums(powers.sum(axis=0)[None, :], len(columns))[0]
+
+        rng = np.random.default_rng(self.seed)
+        order = np.argsort(self.labels, kind='stable')
+        labels = self.labels[order]
+        sampled = np.bincount(self.labels, minlength=len(self.strata))
+        starts = np.r_[0, np.cumsum(sampled)[:-1]]
+        boot = []
+        for first in range(0, replicates, batch_size):
+            counts = np.empty((min(batch_size, replicates - first), len(labels)))
+            for replicate in range(len(counts)):
+                rows = order[starts[labels] + (rng.random(len(labels)) * sampled[labels]).astype('int64')]
+                counts[replicate] = np.bincount(rows, minlength=len(labels))
+            boot.append(skew_from_sums(counts @ powers, len(columns)))
+        alpha = (1 - confidence) / 2
+        lower, upper = np.nanquantile(np.vstack(boot), [alpha, 1 - alpha], axis=0)
+        result = pd.DataFrame({'estimate': estimate, 'lower': lower, 'upper': upper}, index=columns)
+        return result.loc[columns[0]] if single else result
+
+    def corr(self, columns=None, confidence=0.95):
+        """Estimated Pearson correlations of every pair of 'columns', with Fisher's z interval.
+
+        Missing values are handled pairwise, like 'DataFrame.corr()'. The interval uses
+        the effective number of rows of the weighted sample, (sum w)^2 / sum w^2.
+        """
+        self.check_fitted()
+        columns = self.numeric_columns() if columns is None else list(columns)
+        values = np.column_stack([self.values(column) for column in columns])
+        weights = self.weights.to_numpy()[:, None]
+        present = (~np.isnan(values)).astype('float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.nansum(values * weights, axis=0) / (present * weights).sum(axis=0)
+        centred = np.where(present > 0, values - means, 0.0)
+
+        count = (present * weights).T @ present           # [i, j]: weight of the rows where i and j are known
+        sum_x = (centred * weights).T @ present           # [i, j]: weighted sum of x_i over those rows
+        sum_xx = (centred ** 2 * weights).T @ present
+        sum_xy = (centred * weights).T @ centred
+        effective_rows = count ** 2 / ((present * weights ** 2).T @ present)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = count * sum_xy - sum_x * sum_x.T
+            variance = count * sum_xx - sum_x ** 2
+            correlation = np.clip(covariance / np.sqrt(variance * variance.T), -1.0, 1.0)
+            error = stats.norm.ppf(0.5 + confidence / 2) / np.sqrt(effective_rows - 3)
+            lower = np.tanh(np.arctanh(correlation) - error)
+            upper = np.tanh(np.arctanh(correlation) + error)
+
+        first, second = np.triu_indices(len(columns), k=1)
+        index = pd.MultiIndex.from_arrays([np.array(columns)[first], np.array(columns)[second]],
+                                          names=['column', 'other'])
+        return pd.DataFrame({'estimate': correlation[first, second], 'lower': lower[first, second],
+                             'upper': upper[first, second], 'effective_rows': effective_rows[first, second]},
+                            index=index)
+
+def skew_from_sums(sums, n_columns):
+    """Skewness of every column from the weighted sums of 1, d, d^2 and d^3 (d: deviation from a shift).
+
+    Like 'Series.skew', the moment ratio is corrected by sqrt(n (n - 1)) / (n - 2), with
+    n the weighted number of known values.
+    """
+    n, s1, s2, s3 = (sums[:, part * n_columns:(part + 1) * n_columns] for part in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m1, m2, m3 = s1 / n, s2 / n, s3 / n
+        variance = m2 - m1 ** 2
+        third = m3 - 3 * m1 * m2 + 2 * m1 ** 3
+        return third / variance ** 1.5 * np.sqrt(n * (n - 1)) / (n - 2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw a stratified sample in one pass and print estimates with confidence intervals.")
+    parser.add_argument('--source', default=os.path.join(PROJECT_DIR, 'customer_activity_cache'),
+                        help="CSV, Parquet or Feather file, or the local cache directory.")
+    parser.add_argument('--rows-per-stratum', type=int, default=1000)
+    parser.add_argument('--strata', nargs='+', default=STRATA)
+    parser.add_argument('--by', default='region', help="Column to estimate the revenue by.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sample = StratifiedSample.from_source(args.source, strata=args.strata, rows_per_stratum=args.rows_per_stratum,
+                                          seed=args.seed)
+    print(f"\n{len(sample.frame)} rows sampled from {sample.population.sum()} in {len(sample.strata)} strata "
+          f"({time.perf_counter() - start:.2f} s)")
+
+    start = time.perf_counter()
+    pd.set_option("display.width", 200)
+    print("\nMeans:\n", sample.mean().round(4))
+    print("\nMedians:\n", sample.quantile(0.5).round(4))
+    print("\nSkewness:\n", sample.skew().round(3))
+    print("\nStrongest correlations:\n", sample.corr().sort_values('estimate', key=abs, ascending=False).head(10).round(3))
+    print(f"\nRevenue by {args.by}:\n", sample.group_revenue(args.by).round(3))
+    print(f"\nEstimates computed in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+
+class CorrelationAccumulator:
+    """Pearson correlation matrix built chunk by chunk from pairwise co-moment sums.
+
+    Missing values are handled pairwise, like 'DataFrame.corr()', so the result of
+    streaming all chunks (or merging the accumulators of several workers) matches a
+    single in-memory pass. Sums are taken around a per-column shift to limit
+    cancellation error on large tables.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns is not None else None
+        self.shift = None
+        self.count = None    # [i, j]: rows where both i and j are present
+        self.sum_x = None    # [i, j]: sum of x_i over those rows
+        self.sum_xx = None   # [i, j]: sum of x_i ** 2 over those rows
+        self.sum_xy = None   # [i, j]: sum of x_i * x_j over those rows
+
+    def update(self, chunk):
+        """Add the rows of a DataFrame chunk to the running sums."""
+        if self.columns is None:
+            self.columns = list(chunk.select_dtypes(include=['float64', 'int64']).columns)
+
+        values = chunk[self.columns].to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        if self.shift is None:
+            with np.errstate(invalid='ignore'):
+                column_sums = np.where(present, values, 0.0).sum(axis=0)
+                self.shift = np.nan_to_num(column_sums / present.sum(axis=0))
+
+        centred = np.where(present, values - self.shift, 0.0)
+        mask = present.astype('float64')
+        self._add(self.shift, mask.T @ mask, centred.T @ mask, (centred ** 2).T @ mask, centred.T @ centred)
+        return self
+
+    def merge(self, other):
+        """Combine the sums of another accumulator (e.g. from a worker) into this one."""
+        if other.count is None:
+            return self
+        if self.columns is not None and self.columns != other.columns:
+            raise ValueError("Cannot merge accumulators built on different columns.")
+        self.columns = other.columns
+        self._add(other.shift, other.count, other.sum_x, other.sum_xx, other.sum_xy)
+        return self
+
+    def _add(self, shift, count, sum_x, sum_xx, sum_xy):
+        """Re-express sums taken around 'shift' around this accumulator's shift, then add them."""
+        if self.count is None:
+            self.shift = shift
+            self.count, self.sum_x, self.sum_xx, self.sum_xy = count, sum_x, sum_xx, sum_xy
+            return
+
+        # x - self.shift = (x - shift) + d
+        d = (shift - self.shift)[:, None]
+        sum_x_shifted = sum_x + d * count
+        self.sum_xx = self.sum_xx + sum_xx + 2 * d * sum_x + d ** 2 * count
+        self.sum_xy = self.sum_xy + sum_xy + d * sum_x.T + d.T * sum_x + d * d.T * count
+        self.sum_x = self.sum_x + sum_x_shifted
+        self.count = self.count + count
+
+    def correlation(self):
+        """Return the correlation matrix as a DataFrame, like 'DataFrame.corr()'."""
+        n = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = n * self.sum_xy - self.sum_x * self.sum_x.T
+            variance = n * self.sum_xx - self.sum_x ** 2
+            correlation = covariance / np.sqrt(variance * variance.T)
+        correlation[n < 2] = np.nan
+        return pd.DataFrame(np.clip(correlation, -1.0, 1.0), index=self.columns, columns=self.columns)
+
+class QuantileSketch:
+    """Mergeable quantile sketch with a guaranteed relative error on the returned values.
+
+    Values are counted in logarithmic buckets of ratio gamma = (1 + a) / (1 - a), where
+    'a' is 'relative_accuracy'; any quantile is returned within a factor (1 +/- a) of an
+    actual value at that rank. Memory grows with the log of the value range, not with
+    the number of rows.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_counts(self, store, values):
+        keys, counts = np.unique(np.ceil(np.log(values) / self.log_gamma).astype('int64'), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        """Add an array or Series of values; missing values are ignored."""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self._add_counts(self.positive, values[values > 0])
+        self._add_counts(self.negative, -values[values < 0])
+        self.zero_count += int((values == 0).sum())
+        self.count += len(values)
+        return self
+
+    def merge(self, other):
+        """Combine the counts of another sketch built with the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracies.")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Return the approximate q-quantile, or NaN if no values were added."""
+        if self.count == 0:
+            return np.nan
+
+        rank = q * (self.count - 1)
+        seen = 0
+        # Walk the buckets from the most negative value to the largest positive one
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -2 * self.gamma ** key / (self.gamma + 1)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.positive) / (self.gamma + 1)
+
+class ColumnProfile:
+    """Single-pass, mergeable per-column statistics over a stream of DataFrame chunks.
+
+    Collects row and null counts for every column, sums and quantile sketches for the
+    numeric columns and value frequencies for the text columns, so dropping, checking
+    and imputing missing data can all be decided from one scan.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.columns = []
+        self.rows = 0
+        self.null_counts = pd.Series(dtype='int64')
+        self.sums = pd.Series(dtype='float64')
+        self.value_counts = pd.Series(dtype='int64')
+        self.sketches = {}
+        self.category_counts = {}
+
+    def update(self, chunk):
+        """Add the statistics of one DataFrame chunk."""
+        self.columns += [column for column in chunk.columns if column not in self.columns]
+        self.rows += len(chunk)
+        self.null_counts = self.null_counts.add(chunk.isnull().sum(), fill_value=0).astype('int64')
+
+        numeric_chunk = chunk.select_dtypes(include=['float64', 'int64'])
+        self.sums = self.sums.add(numeric_chunk.sum(), fill_value=0)
+        self.value_counts = self.value_counts.add(numeric_chunk.count(), fill_value=0).astype('int64')
+        for column in numeric_chunk.columns:
+            sketch = self.sketches.setdefault(column, QuantileSketch(self.relative_accuracy))
+            sketch.update(numeric_chunk[column].to_numpy())
+
+        for column in chunk.select_dtypes(include=['object', 'string']).columns:
+            counts = chunk[column].value_counts()
+            self.category_counts[column] = self.category_counts.get(column, counts.iloc[:0]).add(counts, fill_value=0)
+        return self
+
+    def merge(self, other):
+        """Combine the statistics collected by another profile (e.g. from a worker)."""
+        self.columns += [column for column in other.columns if column not in self.columns]
+        self.rows += other.rows
+        self.null_counts = self.null_counts.add(other.null_counts, fill_value=0).astype('int64')
+        self.sums = self.sums.add(other.sums, fill_value=0)
+        self.value_counts = self.value_counts.add(other.value_counts, fill_value=0).astype('int64')
+        for column, sketch in other.sketches.items():
+            self.sketches.setdefault(column, QuantileSketch(self.relative_accuracy)).merge(sketch)
+        for column, counts in other.category_counts.items():
+            self.category_counts[column] = self.category_counts.get(column, counts.iloc[:0]).add(counts, fill_value=0)
+        return self
+
+    def missing_percentage(self):
+        """Percentage of missing values per column, like 'df.isnull().mean() * 100'."""
+        return self.null_counts.reindex(self.columns) / self.rows * 100
+
+    def missing_summary(self):
+        """Count and percentage of missing values per column."""
+        return pd.DataFrame({'Count': self.null_counts.reindex(self.columns),
+                             'Percentage': self.missing_percentage()})
+
+    def mean(self):
+        """Mean of every numeric column."""
+        return self.sums / self.value_counts
+
+    def quantile(self, q):
+        """Approximate q-quantile of every numeric column."""
+        return pd.Series({column: sketch.quantile(q) for column, sketch in self.sketches.items()}, dtype='float64')
+
+    def median(self):
+        """Approximate median of every numeric column."""
+        return self.quantile(0.5)
+
+    def most_frequent(self):
+        """Most frequent value of every text column."""
+        return pd.Series({column: counts.idxmax() for column, counts in self.category_counts.items() if len(counts)})
+
+class NullPatternProfile:
+    """Streaming summary of where values are missing, sized by bins rather than rows.
+
+    Rows are grouped into at most 'max_bins' consecutive bins; for each bin and column
+    it keeps the number of missing values. When more rows arrive than the bins can
+    hold, neighbouring bins are merged two by two. It also counts how many rows share
+    each distinct null pattern (the set of columns missing in the row).
+    """
+
+    def __init__(self, max_bins=200):
+        self.max_bins = max_bins
+        self.columns = None
+        self.rows = 0
+        self.rows_per_bin = 1
+        self.bin_rows = np.zeros(0, dtype='int64')
+        self.bin_nulls = np.zeros((0, 0), dtype='int64')
+        self.pattern_counts = {}
+
+    def _merge_bins(self):
+        """Halve the number of bins by adding up neighbouring pairs."""
+        if len(self.bin_rows) % 2:
+            self.bin_rows = np.append(self.bin_rows, 0)
+            self.bin_nulls = np.vstack([self.bin_nulls, np.zeros((1, len(self.columns)), dtype='int64')])
+        self.bin_rows = self.bin_rows[0::2] + self.bin_rows[1::2]
+        self.bin_nulls = self.bin_nulls[0::2] + self.bin_nulls[1::2]
+        self.rows_per_bin *= 2
+
+    def update(self, chunk):
+        """Add the null mask of one DataFrame chunk."""
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.bin_nulls = np.zeros((0, len(self.columns)), dtype='int64')
+        if chunk.empty:
+            return self
+
+        nulls = chunk[self.columns].isnull().to_numpy()
+        total_rows = self.rows + len(nulls)
+        while -(-total_rows // self.rows_per_bin) > self.max_bins:
+            self._merge_bins()
+
+        # Add the chunk's null counts to the bins its rows fall in
+        bin_index = (self.rows + np.arange(len(nulls))) // self.rows_per_bin
+        n_bins = bin_index[-1] + 1
+        if n_bins > len(self.bin_rows):
+            extra = n_bins - len(self.bin_rows)
+            self.bin_rows = np.append(self.bin_rows, np.zeros(extra, dtype='int64'))
+            self.bin_nulls = np.vstack([self.bin_nulls, np.zeros((extra, len(self.columns)), dtype='int64')])
+        starts = np.flatnonzero(np.r_[True, bin_index[1:] != bin_index[:-1]])
+        self.bin_nulls[bin_index[starts]] += np.add.reduceat(nulls.astype('int64'), starts, axis=0)
+        self.bin_rows[bin_index[starts]] += np.diff(np.r_[starts, len(nulls)])
+        self.rows = total_rows
+
+        # Count rows per distinct null pattern, using the packed bits of each row as the key
+        patterns, counts = np.unique(np.packbits(nulls, axis=1), axis=0, return_counts=True)
+        for pattern, count in zip(patterns, counts.tolist()):
+            key = pattern.tobytes()
+            self.pattern_counts[key] = self.pattern_counts.get(key, 0) + count
+        return self
+
+    def update_frame(self, df, chunksize=100000):
+        """Profile an in-memory DataFrame a slice at a time, so the null mask stays small."""
+        for start in range(0, len(df), chunksize):
+            self.update(df.iloc[start:start + chunksize])
+        if self.columns is None:
+            self.update(df)
+        return self
+
+    def null_density(self):
+        """Fraction of missing values per (row bin, column)."""
+        with np.errstate(invalid='ignore'):
+            density = self.bin_nulls / self.bin_rows[:, None]
+        index = pd.RangeIndex(0, len(self.bin_rows) * self.rows_per_bin, self.rows_per_bin, name='first_row')
+        return pd.DataFrame(density, index=index, columns=self.columns)
+
+    def missing_percentage(self):
+        """Percentage of missing values per column."""
+        return pd.Series(self.bin_nulls.sum(axis=0) / max(self.rows, 1) * 100, index=self.columns)
+
+    def patterns(self):
+        """Distinct null patterns (True = missing) with the number of rows showing each."""
+        keys = list(self.pattern_counts)
+        if not keys:
+            # No rows seen yet: the same layout, without any pattern
+            patterns = pd.DataFrame(columns=list(self.columns if self.columns is not None else []), dtype=bool)
+            patterns['rows'] = pd.Series(dtype='int64')
+            return patterns
+        packed = np.frombuffer(b''.join(keys), dtype='uint8').reshape(len(keys), -1)
+        masks = np.unpackbits(packed, axis=1)[:, :len(self.columns)].astype(bool)
+        patterns = pd.DataFrame(masks, columns=self.columns)
+        patterns['rows'] = [self.pattern_counts[key] for key in keys]
+        return patterns.sort_values('rows', ascending=False, ignore_index=True)
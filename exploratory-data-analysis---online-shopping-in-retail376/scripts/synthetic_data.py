@@ -0,0 +1,114 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from storage import save_chunks
+
+# Category values and weights, roughly as they appear in the 'customer_activity' table
+MONTHS = {'Feb': 0.015, 'Mar': 0.155, 'May': 0.273, 'June': 0.023, 'Jul': 0.035, 'Aug': 0.035,
+          'Sep': 0.036, 'Oct': 0.045, 'Nov': 0.243, 'Dec': 0.14}
+OPERATING_SYSTEMS = {'Windows': 0.52, 'MACOS': 0.21, 'Android': 0.11, 'iOS': 0.1, 'ChromeOS': 0.03,
+                     'Ubuntu': 0.02, 'Other': 0.01}
+BROWSERS = {'Google Chrome': 0.62, 'Safari': 0.2, 'Mozilla Firefox': 0.07, 'Microsoft Edge': 0.05,
+            'Samsung Internet': 0.03, 'Opera': 0.02, 'Internet Explorer': 0.01}
+REGIONS = {'North America': 0.39, 'Western Europe': 0.19, 'Eastern Europe': 0.09, 'Asia': 0.1,
+           'South America': 0.05, 'Africa': 0.06, 'Northern Africa': 0.04, 'Southern Africa': 0.03,
+           'Oceania': 0.05}
+TRAFFIC_TYPES = {'Google search': 0.32, 'Direct Traffic': 0.2, 'Facebook ads': 0.13, 'Instagram ads': 0.1,
+                 'Twitter': 0.05, 'Bing search': 0.07, 'Youtube channel': 0.05, 'Affiliate marketing': 0.05,
+                 'Other': 0.03}
+VISITOR_TYPES = {'Returning_Visitor': 0.85, 'New_Visitor': 0.14, 'Other': 0.01}
+
+# Share of missing values per column, similar to the pulled export
+NULL_RATES = {
+    'administrative': 0.046,
+    'administrative_duration': 0.07,
+    'informational_duration': 0.027,
+    'product_related': 0.046,
+    'product_related_duration': 0.017,
+    'operating_systems': 0.001,
+}
+
+# Share of sessions whose durations are inflated far beyond the rest, as outliers
+OUTLIER_RATE = 0.005
+
+def choice(rng, weights, n_rows):
+    """Draw 'n_rows' values from a {value: weight} dict."""
+    values = list(weights)
+    probabilities = np.array(list(weights.values()))
+    return np.array(values, dtype=object)[rng.choice(len(values), n_rows, p=probabilities / probabilities.sum())]
+
+def generate_chunk(n_rows, rng):
+    """One chunk of 'customer_activity'-shaped rows, as returned by the database."""
+    # Page counts drive the durations, so each count is correlated with its duration
+    administrative = rng.negative_binomial(1, 0.3, n_rows).astype('float64')
+    informational = rng.negative_binomial(1, 0.7, n_rows).astype('float64')
+    product_related = rng.negative_binomial(1.5, 0.05, n_rows).astype('float64')
+    administrative_duration = administrative * rng.gamma(2, 40, n_rows)
+    informational_duration = informational * rng.gamma(2, 50, n_rows)
+    product_related_duration = product_related * rng.gamma(3, 12, n_rows)
+
+    outliers = rng.random(n_rows) < OUTLIER_RATE
+    product_related_duration[outliers] *= rng.uniform(5, 15, outliers.sum())
+    administrative_duration[outliers] *= rng.uniform(5, 15, outliers.sum())
+
+    # Exit rates follow bounce rates closely, as single-page sessions count in both
+    bounce_rates = np.clip(rng.beta(0.5, 20, n_rows), 0, 0.2)
+    exit_rates = np.clip(bounce_rates + rng.beta(2, 150, n_rows), 0, 0.2)
+
+    # Most sessions have no page value; those that do are far more likely to end in a purchase
+    page_values = np.where(rng.random(n_rows) < 0.22, rng.lognormal(2.5, 1, n_rows), 0.0)
+    purchase_probability = np.where(page_values > 0, 0.55, 0.04)
+
+    df = pd.DataFrame({
+        'administrative': administrative,
+        'administrative_duration': administrative_duration,
+        'informational': informational,
+        'informational_duration': informational_duration,
+        'product_related': product_related,
+        'product_related_duration': product_related_duration,
+        'bounce_rates': bounce_rates,
+        'exit_rates': exit_rates,
+        'page_values': page_values,
+        'month': choice(rng, MONTHS, n_rows),
+        'operating_systems': choice(rng, OPERATING_SYSTEMS, n_rows),
+        'browser': choice(rng, BROWSERS, n_rows),
+        'region': choice(rng, REGIONS, n_rows),
+        'traffic_type': choice(rng, TRAFFIC_TYPES, n_rows),
+        'visitor_type': choice(rng, VISITOR_TYPES, n_rows),
+        'weekend': rng.random(n_rows) < 0.23,
+        'revenue': rng.random(n_rows) < purchase_probability,
+    })
+    for column, rate in NULL_RATES.items():
+        df[column] = df[column].mask(rng.random(n_rows) < rate)
+    return df
+
+def generate_chunks(n_rows, chunksize=1000000, seed=0):
+    """Yield 'n_rows' synthetic rows in chunks, so sizes up to tens of millions fit in memory.
+
+    Chunk i is drawn from its own generator seeded with (seed, i), so the data only
+    depends on 'seed' and 'chunksize'.
+    """
+    for index, start in enumerate(range(0, n_rows, chunksize)):
+        rng = np.random.default_rng([seed, index])
+        yield generate_chunk(min(chunksize, n_rows - start), rng)
+
+def generate(n_rows, chunksize=1000000, seed=0):
+    """Return 'n_rows' synthetic rows of 'customer_activity' as one DataFrame."""
+    return pd.concat(generate_chunks(n_rows, chunksize, seed), ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic 'customer_activity' data.")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    parser.add_argument('--output', default='synthetic_customer_activity.parquet',
+                        help="Parquet, Feather or CSV file, written one chunk at a time.")
+    args = parser.parse_args()
+
+    rows_written = save_chunks(generate_chunks(args.rows, args.chunksize, args.seed), args.output)
+    print(f"\n{rows_written} synthetic rows saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+from streaming_stats import CorrelationAccumulator
+
+class TransformPlan:
+    """Lazy version of the DataFrameTransform chain that copies the data only once.
+
+    The methods only record the requested steps and return the plan, so calls can be
+    chained. 'collect' then runs them without building intermediate frames:
+    - every row filter (missing 'operating_systems', outliers) is merged into one
+      boolean mask over the original rows,
+    - imputation values and skewness transformations are recorded per column and
+      applied to one column at a time when a statistic needs its current values,
+    - dropped columns are never copied at all.
+    Only the final frame is allocated, each kept column once, plus one column of
+    scratch space while statistics are computed. The steps take the same decisions
+    as the eager classes, on the same (filtered, imputed, transformed) values.
+    """
+
+    def __init__(self, df, chunksize=100000):
+        self.df = df
+        self.chunksize = chunksize  # Rows per block when the correlation matrix is accumulated
+        self.steps = []
+
+    # Recorded steps, named after the DataFrameTransform methods they replace
+
+    def remove_missing_operating_systems(self):
+        self.steps.append(('remove_missing_operating_systems', {}))
+        return self
+
+    def drop_columns_with_missing_data(self, threshold=30):
+        self.steps.append(('drop_columns_with_missing_data', {'threshold': threshold}))
+        return self
+
+    def impute_missing_data(self, strategy='median'):
+        if strategy not in ('mean', 'median', 'category'):
+            print("Invalid strategy. Use 'mean', 'median', or 'category'.")
+            return self
+        self.steps.append(('impute_missing_data', {'strategy': strategy}))
+        return self
+
+    def transform_skewed_columns(self, threshold=0.5):
+        self.steps.append(('transform_skewed_columns', {'threshold': threshold}))
+        return self
+
+    def remove_outliers(self, bounds='sequential'):
+        if bounds not in ('original', 'sequential'):
+            print("Invalid bounds. Use 'original' or 'sequential'.")
+            return self
+        self.steps.append(('remove_outliers', {'bounds': bounds}))
+        return self
+
+    def remove_highly_correlated_columns(self, threshold=0.9):
+        self.steps.append(('remove_highly_correlated_columns', {'threshold': threshold}))
+        return self
+
+    # Execution
+
+    def values(self, column, rows=None):
+        """Current values of a column: its original values on 'rows' with the recorded fill and transforms.
+
+        'rows' is a boolean mask or an array of positions (the current mask by default).
+        The result is always a new array, so it can be modified in place.
+        """
+        rows = self.mask if rows is None else rows
+        if column not in self.numeric:
+            values = self.df[column].iloc[rows]
+            if column in self.fill_values:
+                values = values.fillna(self.fill_values[column])
+            return values.array
+
+        values = self.df[column].to_numpy()[rows]
+        if column in self.fill_values and values.dtype.kind == 'f':
+            values[np.isnan(values)] = self.fill_values[column]
+        for method, lmbda in self.transforms.get(column, []):
+            if values.dtype != np.float64:
+                values = values.astype('float64')
+            if method == 'log1p':
+                np.log1p(values, out=values)
+            elif method == 'sqrt':
+                np.sqrt(values, out=values)
+            else:
+                np.add(values, 1, out=values)
+                special.boxcox(values, lmbda, out=values)
+        return values
+
+    def numeric_columns(self):
+        return [column for column in self.columns if column in self.numeric]
+
+    def collect(self):
+        """Run the recorded steps and return the resulting DataFrame."""
+        self.mask = np.ones(len(self.df), dtype=bool)
+        self.columns = list(self.df.columns)
+        self.numeric = set(self.df.select_dtypes(include=['float64', 'int64']).columns)
+        self.fill_values = {}
+        self.transforms = {}
+
+        for name, params in self.steps:
+            getattr(self, f'run_{name}')(**params)
+
+        # Single materialization pass: each kept column is gathered, filled and transformed once
+        data = {column: self.values(column) for column in self.columns}
+        result = pd.DataFrame(data, index=self.df.index[self.mask], copy=False)
+        print(f"\nPlan of {len(self.steps)} steps collected. Data shape: {result.shape}")
+        return result
+
+    def run_remove_missing_operating_systems(self):
+        self.mask &= self.df['operating_systems'].notna().to_numpy()
+
+    def run_drop_columns_with_missing_data(self, threshold):
+        columns_to_drop = []
+        for column in self.columns:
+            if column in self.fill_values:
+                continue  # Already imputed, so nothing is missing any more
+            if self.df[column].isna().to_numpy()[self.mask].mean() * 100 > threshold:
+                columns_to_drop.append(column)
+        self.columns = [column for column in self.columns if column not in columns_to_drop]
+        print(f"\nDropped columns with more than {threshold}% missing data: {columns_to_drop}")
+
+    def run_impute_missing_data(self, strategy):
+        if strategy == 'category':
+            for column in self.columns:
+                dtype = self.df[column].dtype
+                if dtype == object or isinstance(dtype, pd.StringDtype):
+                    self.fill_values.setdefault(column, "Unknown")
+            return
+        for column in self.numeric_columns():
+            series = pd.Series(self.values(column))
+            self.fill_values.setdefault(column, series.mean() if strategy == 'mean' else series.median())
+
+    def run_transform_skewed_columns(self, threshold):
+        for column in self.numeric_columns():
+            values = self.values(column)
+            if abs(pd.Series(values).skew()) <= threshold:
+                continue
+            # Same choice of transformation as DataFrameTransform.transform_skewed_columns
+            minimum = values.min()
+            if minimum > 0:
+                step = ('log1p', None)
+            elif minimum >= 0:
+                step = ('sqrt', None)
+            else:
+                _, lmbda = stats.boxcox(values + 1)
+                step = ('boxcox', lmbda)
+            self.transforms.setdefault(column, []).append(step)
+
+    def run_remove_outliers(self, bounds):
+        keep = np.ones(self.mask.sum(), dtype=bool)
+        for column in self.numeric_columns():
+            # 'sequential' takes each column's quartiles on the rows left by the previous columns
+            values = self.values(column)
+            in_play = keep if bounds == 'sequential' else slice(None)
+            Q1, Q3 = pd.Series(values[in_play]).quantile([0.25, 0.75])
+            IQR = Q3 - Q1
+            keep &= (values >= Q1 - 1.5 * IQR) & (values <= Q3 + 1.5 * IQR)
+        self.mask[self.mask] = keep
+        print(f"\nRemaining rows after removing outliers: {self.mask.sum()}")
+
+    def run_remove_highly_correlated_columns(self, threshold):
+        # Accumulated over blocks of rows, so the numeric block is never copied as a whole
+        columns = self.numeric_columns()
+        positions = np.flatnonzero(self.mask)
+        accumulator = CorrelationAccumulator(columns)
+        for start in range(0, len(positions), self.chunksize):
+            rows = positions[start:start + self.chunksize]
+            accumulator.update(pd.DataFrame({column: self.values(column, rows) for column in columns}))
+        correlation_matrix = accumulator.correlation()
+
+        upper_triangle = np.triu(np.abs(correlation_matrix.to_numpy()), k=1)
+        highly_correlated = list(correlation_matrix.columns[(upper_triangle > threshold).any(axis=0)])
+        self.columns = [column for column in self.columns if column not in highly_correlated]
+        print(f"\nRemoved the following highly correlated columns: {highly_correlated}")
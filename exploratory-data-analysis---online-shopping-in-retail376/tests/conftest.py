@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts are flat modules importing each other by name, as when they are run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
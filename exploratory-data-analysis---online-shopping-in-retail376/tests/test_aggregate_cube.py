@@ -0,0 +1,32 @@
+import contextlib
+import io
+
+import pandas as pd
+
+from aggregate_cube import DIMENSIONS, AggregateCube
+from data_transform import DataTransform
+from synthetic_data import generate
+
+def sorted_cells(cube):
+    cells = cube.cells.astype({dimension: 'str' for dimension in DIMENSIONS})
+    return cells.sort_values(DIMENSIONS, ignore_index=True)
+
+def test_incremental_update_matches_rebuild():
+    with contextlib.redirect_stdout(io.StringIO()):
+        sessions = DataTransform(generate(4000, seed=6)).apply_transforms()
+        rebuilt = AggregateCube.build(sessions)
+        updated = AggregateCube.build(sessions.iloc[:2500]).update(sessions.iloc[2500:])
+    expected = sorted_cells(rebuilt)
+    pd.testing.assert_frame_equal(sorted_cells(updated)[expected.columns], expected)
+    pd.testing.assert_frame_equal(updated.query('region', 'revenue').sort_index(),
+                                  rebuilt.query('region', 'revenue').sort_index())
+
+def test_raw_and_converted_months_share_their_cells():
+    raw = generate(200, seed=7)
+    raw['month'] = 'June'
+    converted = raw.assign(month=pd.Timestamp('1900-06-01'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        cube = AggregateCube.build(raw).update(converted)
+    sessions = cube.query('month', 'sessions')
+    assert sessions.index.tolist() == ['Jun']
+    assert sessions['sessions'].tolist() == [400]
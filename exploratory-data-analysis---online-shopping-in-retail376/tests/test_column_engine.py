@@ -0,0 +1,46 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from column_engine import ColumnEngine
+from data_without_skewness import DataFrameTransform
+
+def build_frame(n_rows, n_columns, seed=0):
+    """Skewed numeric columns; one in three has negative values, so it needs Box-Cox."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_columns):
+        values = rng.gamma(1 + i % 3, 1, n_rows)
+        data[f'column_{i}'] = values - 0.5 if i % 3 == 0 else values
+    return pd.DataFrame(data)
+
+def run_steps(df, engine):
+    transformer = DataFrameTransform(df.copy(), engine=engine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transformer.transform_skewed_columns(transformer.identify_skewed_columns())
+    quantiles = transformer.stats_cache.quantile(transformer.df, list(transformer.df.columns), 0.75)
+    return transformer.df, quantiles
+
+def test_parallel_matches_serial():
+    df = build_frame(20000, 6)
+    expected, expected_quantiles = run_steps(df, None)
+    output, quantiles = run_steps(df, ColumnEngine(max_workers=2, min_cells=0))
+    pd.testing.assert_frame_equal(output, expected)
+    pd.testing.assert_series_equal(quantiles, expected_quantiles)
+
+def test_pool_and_block_are_reused_until_the_frame_changes():
+    df = build_frame(5000, 4)
+    columns = list(df.columns)
+    with ColumnEngine(max_workers=2, min_cells=0) as engine:
+        pd.testing.assert_series_equal(engine.column_stats(df, columns, 'mean'), df.mean())
+        executor, path = engine.executor, engine.block_path
+        pd.testing.assert_series_equal(engine.column_stats(df, columns[:2], 'quantile', q=0.75),
+                                       df[columns[:2]].quantile(0.75), check_names=False)
+        assert engine.executor is executor and engine.block_path == path
+
+        filtered = df[df['column_1'] > 1]
+        pd.testing.assert_series_equal(engine.column_stats(filtered, columns, 'mean'), filtered.mean())
+        assert engine.executor is executor and engine.block_path != path
+    assert engine.executor is None and engine.block_path is None
@@ -0,0 +1,32 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from data_transform import BatchTransform, DataTransform
+from schema import apply_schema
+from synthetic_data import generate
+
+def quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+def test_month_without_valid_values_becomes_jan():
+    df = generate(20, seed=1)
+    df['month'] = np.nan
+    transformed = quiet(DataTransform(df).apply_transforms)
+    assert (transformed['month'] == pd.Timestamp('1900-01-01')).all()
+
+    converted, failures = apply_schema(df[['month']])
+    assert (converted['month'] == pd.Timestamp('1900-01-01')).all()
+    assert failures['month'] == len(df)
+
+def test_batch_transform_matches_single_run():
+    raw = generate(3000, seed=2)
+    raw.loc[raw.index[-500:], 'month'] = np.nan  # The last chunk has no valid month
+    chunks = [raw.iloc[start:start + 500] for start in range(0, len(raw), 500)]
+
+    single = quiet(DataTransform(raw.copy()).apply_transforms)
+    batches = quiet(lambda: pd.concat(BatchTransform().fit(chunks).transform_chunks(chunks, 2), ignore_index=True))
+    pd.testing.assert_frame_equal(batches, single)
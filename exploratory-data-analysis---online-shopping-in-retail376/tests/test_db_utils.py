@@ -0,0 +1,59 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from data_without_higly_correlated_columns import DataFrameTransform as CorrelationTransform
+from data_without_null_values import DataFrameTransform as NullValuesTransform
+from data_without_outliers import DataFrameTransform as OutliersTransform
+from db_utils import RDSDatabaseConnector
+from synthetic_data import generate
+
+CREDENTIALS = {'RDS_HOST': 'localhost', 'RDS_PASSWORD': '', 'RDS_USER': '', 'RDS_DATABASE': '', 'RDS_PORT': 0}
+
+@pytest.fixture
+def connector(tmp_path):
+    connector = RDSDatabaseConnector(CREDENTIALS)
+    connector.create_engine(connection_string=f"sqlite:///{tmp_path / 'customer_activity.db'}")
+    generate(5000, seed=5).to_sql('customer_activity', connector.engine, index=False)
+    yield connector
+    connector.engine.dispose()
+
+def clean_locally(connector):
+    df = pd.concat(connector.fetch_data_in_chunks(), ignore_index=True)
+    nulls = NullValuesTransform(df)
+    nulls.remove_missing_operating_systems()
+    nulls.drop_columns_with_missing_data(threshold=30)
+    nulls.impute_missing_data(strategy='median')
+    nulls.impute_missing_data(strategy='category')
+    outliers = OutliersTransform(nulls.df)
+    outliers.remove_outliers(bounds='original')
+    correlation = CorrelationTransform(outliers.df)
+    correlation.remove_highly_correlated_columns(threshold=0.9)
+    return correlation.df.reset_index(drop=True)
+
+@pytest.mark.parametrize('pushdown', [False, None])
+def test_cleaning_in_database_matches_local(connector, pushdown):
+    pushdown = connector.supports_pushdown() if pushdown is None else pushdown
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = clean_locally(connector)
+        summary = connector.cleaning_summary(missing_threshold=30, strategy='median', correlation_threshold=0.9,
+                                             pushdown=pushdown)
+        output = connector.fetch_cleaned_data(summary)
+    pd.testing.assert_frame_equal(output[expected.columns].reset_index(drop=True), expected)
+
+def test_in_memory_sqlite_engine():
+    connector = RDSDatabaseConnector(CREDENTIALS)
+    connector.create_engine(connection_string='sqlite://')
+    assert pd.read_sql('SELECT 1 AS one', connector.engine)['one'].tolist() == [1]
+
+def test_partitioned_read_keeps_large_integer_keys(tmp_path):
+    connector = RDSDatabaseConnector(CREDENTIALS)
+    connector.create_engine(connection_string=f"sqlite:///{tmp_path / 'keys.db'}")
+    first = 2 ** 62  # Beyond the 53 bits a float keeps
+    df = pd.DataFrame({'id': range(first, first + 1001), 'value': range(1001)})
+    df.to_sql('sessions', connector.engine, index=False)
+    output = connector.fetch_data_partitioned('sessions', 'id', num_partitions=4, max_workers=2)
+    pd.testing.assert_frame_equal(output, df)
+    connector.engine.dispose()
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from pipeline import Pipeline, Stage, hash_source
+
+def source_stage(rows):
+    return pd.DataFrame({'value': range(rows)})
+
+def scale_stage(df, factor=1):
+    return df.assign(value=df['value'] * factor)
+
+def shift_stage(df, offset=0):
+    return df.assign(value=df['value'] + offset)
+
+def build(cache_dir, factor=1, offset=0):
+    return Pipeline([
+        Stage('source', source_stage, params={'rows': 5}),
+        Stage('scale', scale_stage, deps=['source'], params={'factor': factor}),
+        Stage('shift', shift_stage, deps=['scale'], params={'offset': offset}),
+    ], cache_dir)
+
+def statuses(report):
+    return dict(zip(report['stage'], report['status']))
+
+def test_rerun_reads_the_cached_output(tmp_path):
+    build(tmp_path).run()
+    df, report = build(tmp_path).run()
+    assert statuses(report) == {'shift': 'cached'}
+    assert df['value'].tolist() == [0, 1, 2, 3, 4]
+
+def test_parameter_change_reruns_the_stage_and_its_dependents_only(tmp_path):
+    build(tmp_path).run()
+    df, report = build(tmp_path, factor=2).run()
+    assert statuses(report) == {'source': 'cached', 'scale': 'computed', 'shift': 'computed'}
+    assert df['value'].tolist() == [0, 2, 4, 6, 8]
+
+    _, report = build(tmp_path, factor=2, offset=1).run()
+    assert statuses(report) == {'scale': 'cached', 'shift': 'computed'}
+
+def test_force_recomputes_every_stage(tmp_path):
+    build(tmp_path).run()
+    _, report = build(tmp_path).run(force=True)
+    assert set(report['status']) == {'computed'}
+
+def test_source_hash_follows_the_data(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text("value\n1\n")
+    first = hash_source(str(path))
+    assert hash_source(str(path)) == first
+    path.write_text("value\n2\n")
+    assert hash_source(str(path)) != first
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from schema import CUSTOMER_ACTIVITY_SCHEMA, apply_schema
+from synthetic_data import generate
+
+def test_numeric_columns_stay_visible_to_the_cleaning_steps():
+    df = generate(500, seed=3)
+    df['administrative'] = df['administrative'].fillna(0)  # A count column without gaps
+    converted, _ = apply_schema(df)
+    numeric = set(converted.select_dtypes(include=['float64', 'int64']).columns)
+    expected = {column for column, kind in CUSTOMER_ACTIVITY_SCHEMA.items() if kind in ('count', 'float')}
+    assert numeric == expected
+    assert converted['administrative'].dtype == 'int64'
+
+def test_bad_numeric_values_are_counted():
+    df = pd.DataFrame({'administrative': ['1', 'abc', None], 'bounce_rates': ['0.1', '0.2', 'x']})
+    converted, failures = apply_schema(df)
+    assert failures.to_dict() == {'administrative': 1, 'bounce_rates': 1}
+    assert converted['administrative'].isna().sum() == 2
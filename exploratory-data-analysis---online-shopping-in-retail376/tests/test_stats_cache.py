@@ -0,0 +1,31 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from stats_cache import ColumnStatsCache
+
+def test_cached_until_the_rows_change():
+    df = pd.DataFrame(np.random.default_rng(0).random((1000, 3)), columns=['a', 'b', 'c'])
+    cache = ColumnStatsCache()
+    first = cache.quantile(df, ['a', 'b'], 0.75)
+    pd.testing.assert_series_equal(cache.quantile(df, ['a', 'b'], 0.75), first)
+    assert cache.hits['quantile_0.75'] == 2
+
+    filtered = df[df['a'] > 0.5]
+    pd.testing.assert_series_equal(cache.quantile(filtered, ['a'], 0.75), filtered[['a']].quantile(0.75),
+                                  check_names=False)
+
+def test_old_frames_are_not_kept_alive():
+    cache = ColumnStatsCache()
+    df = pd.DataFrame(np.random.default_rng(1).random((1000, 3)), columns=['a', 'b', 'c'])
+    cache.mean(df, ['a', 'b', 'c'])
+    cache.corr(df, ['a', 'b'])
+    block = weakref.ref(df['a'].to_numpy().base)
+    for threshold in [0.1, 0.2]:
+        df = df[df['a'] > threshold]
+        cache.mean(df, ['a', 'b', 'c'])
+    gc.collect()
+    assert block() is None
+    assert len(cache.entries) == 3
@@ -0,0 +1,31 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from data_transform import DataTransform
+from storage import iter_chunks, load_dataframe, save_dataframe
+from synthetic_data import generate
+
+@pytest.fixture(scope='module')
+def sessions():
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataTransform(generate(2000, seed=8)).apply_transforms()
+    return df.assign(session=range(len(df)))
+
+@pytest.mark.parametrize('partition_cols', [['month'], ['region', 'weekend']])
+def test_partitioned_round_trip(tmp_path, sessions, partition_cols):
+    directory = str(tmp_path / 'sessions')
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_dataframe(sessions, directory, partition_cols=partition_cols)
+    for loaded in [load_dataframe(directory), pd.concat(iter_chunks(directory, 300), ignore_index=True)]:
+        loaded = loaded.sort_values('session', ignore_index=True)
+        pd.testing.assert_frame_equal(loaded, sessions)
+
+@pytest.mark.parametrize('extension', ['.parquet', '.feather', '.csv.gz'])
+def test_file_round_trip(tmp_path, sessions, extension):
+    path = str(tmp_path / f'sessions{extension}')
+    save_dataframe(sessions, path)
+    loaded = load_dataframe(path)
+    assert len(loaded) == len(sessions) and list(loaded.columns) == list(sessions.columns)
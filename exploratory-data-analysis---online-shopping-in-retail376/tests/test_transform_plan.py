@@ -0,0 +1,43 @@
+import contextlib
+import io
+
+import pandas as pd
+
+from data_without_higly_correlated_columns import DataFrameTransform as CorrelationTransform
+from data_without_null_values import DataFrameTransform as NullValuesTransform
+from data_without_outliers import DataFrameTransform as OutliersTransform
+from data_without_skewness import DataFrameTransform as SkewnessTransform
+from synthetic_data import generate
+from transform_plan import TransformPlan
+
+def run_eager(df):
+    transformer = NullValuesTransform(df)
+    transformer.remove_missing_operating_systems()
+    transformer.drop_columns_with_missing_data(threshold=30)
+    transformer.impute_missing_data(strategy='median')
+    transformer.impute_missing_data(strategy='category')
+    transformer = SkewnessTransform(transformer.df)
+    transformer.transform_skewed_columns(transformer.identify_skewed_columns())
+    transformer = OutliersTransform(transformer.df)
+    transformer.remove_outliers()
+    transformer = CorrelationTransform(transformer.df)
+    transformer.remove_highly_correlated_columns(threshold=0.9)
+    return transformer.df
+
+def run_lazy(df):
+    return (TransformPlan(df)
+            .remove_missing_operating_systems()
+            .drop_columns_with_missing_data(threshold=30)
+            .impute_missing_data(strategy='median')
+            .impute_missing_data(strategy='category')
+            .transform_skewed_columns()
+            .remove_outliers()
+            .remove_highly_correlated_columns(threshold=0.9)
+            .collect())
+
+def test_plan_matches_eager_chain():
+    df = generate(5000, seed=4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        eager = run_eager(df.copy())
+        lazy = run_lazy(df.copy())
+    pd.testing.assert_frame_equal(lazy, eager)